@@ -0,0 +1,2 @@
+python -m skid_steering.benchmarks.bench_move --output bench_move.json %*
+pause
\ No newline at end of file
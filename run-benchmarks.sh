@@ -0,0 +1 @@
+python -m skid_steering.benchmarks.bench_move --output bench_move.json "$@"
@@ -0,0 +1,378 @@
+__author__ = 'Paul Pearce'
+
+import random
+
+import skid_steering.InputHandler as IH
+from skid_steering.Configuration import get_configuration
+from skid_steering.MotorState import motor_state
+from skid_steering.TransitionTable import reference_transition
+
+
+def _index_below(min_motor_value, step_value, value):
+    """
+
+    :return: The step index i such that min + n * step < value exactly when n < i
+    """
+    return -((min_motor_value - value) // step_value)
+
+
+def _index_above(min_motor_value, step_value, value):
+    """
+
+    :return: The step index i such that min + n * step > value exactly when n > i
+    """
+    return (value - min_motor_value) // step_value
+
+
+def shared_transitions(min_motor_value, max_motor_value, step_value):
+    """
+    The StepTransitions of a configuration, built once and kept with its cached Configuration.Configuration so every
+    handler with the configuration shares them.
+    :param min_motor_value: As for InputHandler
+    :param max_motor_value: As for InputHandler
+    :param step_value: As for InputHandler
+    :return: A StepTransitions
+    """
+    config = get_configuration(min_motor_value, max_motor_value, step_value)
+
+    if config.transitions is None:
+        config.transitions = StepTransitions(min_motor_value, max_motor_value, step_value)
+
+    return config.transitions
+
+
+class StepTransitions(object):
+    __slots__ = ("min_motor_value", "max_motor_value", "step_value", "zero", "non_negative", "spin_sum",
+                 "reverse_limit", "forward_limit", "spin_limit", "forward_gap", "back_gap", "by_key")
+
+    def __init__(self, min_motor_value, max_motor_value, step_value):
+        """
+        Constructor - the steering rules of InputHandler rewritten over step indices, a motor value being
+        min + index * step. Every comparison the branch logic makes against 0, max and -max is worked out once here as
+        a step index threshold, so a transition is a few integer comparisons whatever the size of the grid.
+        :param min_motor_value: As for InputHandler
+        :param max_motor_value: As for InputHandler
+        :param step_value: As for InputHandler
+        :return:
+
+        Each transition takes and returns (left index, right index). Only motor values on the grid (min + n * step)
+        can be represented, as are all those reachable from the stopped state.
+        """
+        # Validates the configuration
+        IH.InputHandler(min_motor_value, max_motor_value, step_value, IH.INSTRUMENTATION_OFF)
+
+        self.min_motor_value    =   min_motor_value
+        self.max_motor_value    =   max_motor_value
+        self.step_value         =   step_value
+
+        below   =   lambda value: _index_below(min_motor_value, step_value, value)
+        above   =   lambda value: _index_above(min_motor_value, step_value, value)
+
+        # The index of a stopped motor, and of a spinning (left == -right) pair summed, None if not on the grid
+        self.zero           =   -min_motor_value // step_value if not min_motor_value % step_value else None
+        self.spin_sum       =   -2 * min_motor_value // step_value if not 2 * min_motor_value % step_value else None
+
+        self.non_negative   =   below(0)                        # value >= 0
+
+        # Another step backwards passes -max, another forwards passes (or when spinning reaches) max
+        self.reverse_limit  =   below(-max_motor_value)         # index <= this: index - 1 < -max
+        self.forward_limit  =   above(max_motor_value)          # index >= this: index + 1 > max
+        self.spin_limit     =   below(max_motor_value) - 1      # index >= this: index + 1 >= max
+
+        # Another step towards 0 reaches it
+        self.forward_gap    =   above(0) + 1                    # index <= this: index - 1 <= 0
+        self.back_gap       =   below(0) - 1                    # index >= this: index + 1 >= 0
+
+        self.by_key = {
+            IH.STOP:    self.stop,
+            IH.LEFT:    self.left,
+            IH.RIGHT:   self.right,
+            IH.FORWARD: self.forward,
+            IH.BACK:    self.back,
+        }
+
+    def index_of(self, value):
+        """
+
+        :param value: A motor value on the grid
+        :return: Its step index
+        """
+        return (value - self.min_motor_value) // self.step_value
+
+    def value_of(self, index):
+        """
+
+        :param index: A step index
+        :return: Its motor value
+        """
+        return self.min_motor_value + index * self.step_value
+
+    def stop(self, left, right):
+        return 0, 0
+
+    def left(self, left, right):
+        if left + right == self.spin_sum:
+            # Stopped or spinning, spin (more) left unless both motors are at their limits
+            if left <= self.reverse_limit and right >= self.spin_limit:
+                return left, right
+
+            return left - 1, right + 1
+
+        non_negative = self.non_negative
+
+        if left >= non_negative and right >= non_negative:
+            if right < self.forward_limit:
+                return left, right + 1
+            if left > self.forward_gap:
+                return left - 1, right
+
+            return left, right
+
+        if left < non_negative and right < non_negative:
+            if right > self.reverse_limit:
+                return left, right - 1
+            if left < self.back_gap:
+                return left + 1, right
+
+            return left, right
+
+        raise Exception("Unknown state when turning Left")
+
+    def right(self, left, right):
+        if left + right == self.spin_sum:
+            if right <= self.reverse_limit and left >= self.spin_limit:
+                return left, right
+
+            return left + 1, right - 1
+
+        non_negative = self.non_negative
+
+        if left >= non_negative and right >= non_negative:
+            if left < self.forward_limit:
+                return left + 1, right
+            if right > self.forward_gap:
+                return left, right - 1
+
+            return left, right
+
+        if left < non_negative and right < non_negative:
+            if left > self.reverse_limit:
+                return left - 1, right
+            if right < self.back_gap:
+                return left, right + 1
+
+            return left, right
+
+        raise Exception("Unknown state when turning Right")
+
+    def forward(self, left, right):
+        if left == right:
+            # Straight ahead (or stopped), faster unless a motor would pass max
+            if left >= self.forward_limit:
+                return left, right
+
+            return left + 1, right + 1
+
+        if left + right == self.spin_sum:
+            return 0, 0
+
+        # Turning, straighten up
+        if left >= self.non_negative and right >= self.non_negative:
+            if left >= self.forward_limit:
+                return left, left
+            if right >= self.forward_limit or left < right:
+                return right, right
+
+            return left, left
+
+        if left < right:
+            return right, right
+
+        return left, left
+
+    def back(self, left, right):
+        if left == right:
+            if left <= self.reverse_limit:
+                return left, right
+
+            return left - 1, right - 1
+
+        if left + right == self.spin_sum:
+            return 0, 0
+
+        if left < self.non_negative and right < self.non_negative:
+            if left <= self.reverse_limit:
+                return left, left
+            if right <= self.reverse_limit:
+                return right, right
+            if left < right:
+                return left, left
+
+            return right, right
+
+        if left < right:
+            return left, left
+
+        return right, right
+
+
+class AnalyticInputHandler(IH.InputHandler):
+    __slots__ = ("_transitions", "_left_index", "_right_index")
+
+    def __init__(self, min_motor_value, max_motor_value, step_value, transitions=None,
+                 instrumentation=IH.INSTRUMENTATION_OFF):
+        """
+        Constructor - an InputHandler whose move() is a StepTransitions function of the step indices, so needs no
+        table however large the grid (e.g. 0, 65535, 1 for 16 bit PWM).
+        :param min_motor_value: As for InputHandler
+        :param max_motor_value: As for InputHandler
+        :param step_value: As for InputHandler
+        :param transitions: StepTransitions for the same configuration, defaults to the shared ones (see
+        shared_transitions())
+        :param instrumentation: As for InputHandler, except trace - there are no steps of the steering logic to log
+        :return:
+
+        The motor values produced are identical to the (reference) InputHandler for every key sequence, including
+        the exceptions raised (see verify_transitions()), but no logging is done when moving.
+        """
+        if instrumentation == IH.INSTRUMENTATION_TRACE:
+            raise Exception("AnalyticInputHandler cannot trace the steering logic, use the reference InputHandler")
+
+        IH.InputHandler.__init__(self, min_motor_value, max_motor_value, step_value, instrumentation)
+
+        if transitions is None:
+            transitions = shared_transitions(min_motor_value, max_motor_value, step_value)
+        elif (transitions.min_motor_value, transitions.max_motor_value, transitions.step_value) != \
+                (min_motor_value, max_motor_value, step_value):
+            raise Exception("Step transitions were built for a different configuration")
+
+        self._transitions   =   transitions
+        self._left_index    =   0
+        self._right_index   =   0
+
+    def move(self, input):
+        """
+        Given the logical input movement key, determine the new left and right (logical) motor values.
+        :param input: A logical movement key value
+        :return: The new motor values as a MotorState.MotorState
+        """
+        if self._latency is not None:
+            return self._latency.move(self, input)
+
+        transitions = self._transitions
+
+        try:
+            transition = transitions.by_key.get(input)
+        except TypeError:
+            transition = None
+
+        if transition is None:
+            raise IH.InvalidInputError("Invalid input: " + "[" + str(input) + "]")
+
+        left, right = transition(self._left_index, self._right_index)
+
+        initial_left    =   self._current_motor_left_value
+        initial_right   =   self._current_motor_right_value
+
+        self._left_index                    =   left
+        self._right_index                   =   right
+        self._current_motor_left_value      =   current_left    =   transitions.value_of(left)
+        self._current_motor_right_value     =   current_right   =   transitions.value_of(right)
+
+        if self._check_invariant and (left == transitions.zero) != (right == transitions.zero):
+            errorMessage = "Internal consistancy check failure - Motor values are invalid - one motor is stationery:"
+            errorMessage = errorMessage + " Initial motor values: " + "L/R" + str([initial_left, initial_right])
+            errorMessage = errorMessage + " Input: " + "[" + str(input) + "]"
+            errorMessage = errorMessage + " Current motor values: " + "L/R" + str([current_left, current_right])
+
+            raise Exception(errorMessage)
+
+        for sink in self._sinks:
+            sink.publish(current_left, current_right)
+
+        for listener in self._listeners:
+            listener(input, current_left, current_right)
+
+        return motor_state(current_left, current_right)
+
+    def restore(self, snapshot):
+        """
+        As InputHandler.restore()
+        """
+        IH.InputHandler.restore(self, snapshot)
+
+        self._left_index    =   self._transitions.index_of(self._current_motor_left_value)
+        self._right_index   =   self._transitions.index_of(self._current_motor_right_value)
+
+    def _stop(self):
+        """
+        Set motor value to stop the vehicle motors
+        :return:
+        """
+        IH.InputHandler._stop(self)
+
+        self._left_index    =   0
+        self._right_index   =   0
+
+
+def verify_transitions(transitions, samples=1 << 16, seed=0):
+    """
+    Check every StepTransitions function against the reference (branch logic) implementation, from every state of the
+    grid covering -max .. max with a step of margin each way, or, when that has more than samples states, from every
+    pair of indices near a threshold and samples random states.
+    :param transitions: The StepTransitions to check
+    :param samples: The most states to check exhaustively, and the number of random states otherwise
+    :param seed: For the random states
+    :return: The number of states checked
+    """
+    min_motor_value =   transitions.min_motor_value
+    max_motor_value =   transitions.max_motor_value
+    step_value      =   transitions.step_value
+
+    scratch = IH.InputHandler(min_motor_value, max_motor_value, step_value, IH.INSTRUMENTATION_OFF)
+
+    first   =   transitions.index_of(min(min_motor_value, -max_motor_value)) - 1
+    last    =   transitions.index_of(max(min_motor_value, max_motor_value)) + 1
+
+    if (last - first + 1) ** 2 <= samples:
+        indices = range(first, last + 1)
+        states  = [(left, right) for left in indices for right in indices]
+    else:
+        thresholds  =   [0, transitions.non_negative, transitions.reverse_limit, transitions.forward_limit,
+                         transitions.spin_limit, transitions.forward_gap, transitions.back_gap]
+        if transitions.zero is not None:
+            thresholds.append(transitions.zero)
+
+        near    =   sorted(set(index + offset for index in thresholds for offset in range(-2, 3)
+                               if first <= index + offset <= last))
+        states  =   [(left, right) for left in near for right in near]
+
+        generator = random.Random(seed)
+        states.extend((generator.randint(first, last), generator.randint(first, last)) for count in range(samples))
+
+    for left, right in states:
+        left_value  =   transitions.value_of(left)
+        right_value =   transitions.value_of(right)
+
+        for key in IH.KEYS:
+            expected = reference_transition(scratch, left_value, right_value, key)
+
+            try:
+                next_left, next_right = transitions.by_key[key](left, right)
+
+                # As AnalyticInputHandler.move() checks
+                error = None
+                if (next_left == transitions.zero) != (next_right == transitions.zero):
+                    error = "Internal consistancy check failure"
+            except Exception as e:
+                next_left, next_right, error = left, right, str(e)
+
+            actual = (transitions.value_of(next_left), transitions.value_of(next_right), error)
+
+            if actual[:2] != expected[:2] or (error is None) != (expected[2] is None) or \
+                    (error is not None and not expected[2].startswith(error)):
+                raise Exception("Step transitions differ from the reference: key [" + str(key) + "] from L/R" +
+                                str([left_value, right_value]) + " gave " + str(actual) + ", expected " +
+                                str(expected))
+
+    return len(states)
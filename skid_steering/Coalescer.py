@@ -0,0 +1,127 @@
+__author__ = 'Paul Pearce'
+
+from collections import deque
+
+import skid_steering.InputHandler as IH
+import skid_steering.TransitionTable as TT
+
+
+class Coalescer(object):
+    def __init__(self, handler, on_update=None):
+        """
+        Constructor - a stage in front of InputHandler.move that queues keys and drops those that cannot change the
+        motor values, e.g. the auto repeat of a held key once the motors are at their limit.
+        :param handler: The InputHandler to move
+        :param on_update: Called with (left, right) once per drained batch that changed the motor values
+        :return:
+
+        A key is dropped when
+            it is STOP and the vehicle is already stopped
+            the same key was last used at the same motor values without changing them (the steering logic only
+            depends on the motor values, so it would not change them this time either)
+            the handler is table driven (TransitionTable.TableInputHandler) and the table says the key is a no-op
+        """
+        self._handler       =   handler
+        self._on_update     =   on_update
+        self._pending       =   deque()
+
+        # The last (key, motor values) that was used without changing the motor values
+        self._no_op         =   None
+
+        self._key_listeners =   ()
+
+        self.accepted       =   0
+        self.dropped        =   0
+
+    def push(self, key):
+        """
+        Queue a key, it is used (or dropped) by the next drain()
+        :param key: A logical movement key value
+        :return:
+        """
+        self._pending.append(key)
+
+        for listener in self._key_listeners:
+            listener(key)
+
+    def drain(self):
+        """
+        Move the handler for every queued key that could change the motor values.
+        :return: (left, right) - the motor values after the batch
+        """
+        handler     =   self._handler
+        pending     =   self._pending
+
+        initial     =   (handler._current_motor_left_value, handler._current_motor_right_value)
+        stopped     =   (handler._min_motor_value, handler._min_motor_value)
+
+        while pending:
+            key     =   pending.popleft()
+            before  =   (handler._current_motor_left_value, handler._current_motor_right_value)
+
+            if self._is_no_op(key, before, stopped):
+                self.dropped += 1
+                continue
+
+            handler.move(key)
+            self.accepted += 1
+
+            if before == (handler._current_motor_left_value, handler._current_motor_right_value):
+                self._no_op = (key, before)
+
+        current = (handler._current_motor_left_value, handler._current_motor_right_value)
+
+        if current != initial and self._on_update is not None:
+            self._on_update(current[0], current[1])
+
+        return current
+
+    def coalesce(self, keys):
+        """
+        Queue a burst of keys and drain them
+        :param keys: An iterable of logical movement key values
+        :return: (left, right) - the motor values after the burst
+        """
+        if self._key_listeners:
+            for key in keys:
+                self.push(key)
+        else:
+            self._pending.extend(keys)
+
+        return self.drain()
+
+    def add_key_listener(self, listener):
+        """
+        Call a listener for every key pushed, whether or not it is dropped - e.g. Watchdog, which must see a key held
+        at the limit as input even though it never reaches the handler's move().
+        :param listener: Called with (key)
+        :return:
+        """
+        self._key_listeners = self._key_listeners + (listener,)
+
+    def remove_key_listener(self, listener):
+        """
+        Stop calling a listener for every key pushed
+        :param listener: A listener added with add_key_listener()
+        :return:
+        """
+        listeners = list(self._key_listeners)
+        listeners.remove(listener)
+
+        self._key_listeners = tuple(listeners)
+
+    def _is_no_op(self, key, current, stopped):
+        if key == IH.STOP and current == stopped:
+            return True
+
+        if self._no_op is not None and self._no_op[0] == key and self._no_op[1] == current:
+            return True
+
+        table = getattr(self._handler, "_table", None)
+        if table is not None:
+            slot = TT.KEY_SLOTS.get(key)
+
+            if slot is not None:
+                return table.next[self._handler._state * len(TT.KEYS) + slot] == self._handler._state
+
+        return False
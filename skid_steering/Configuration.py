@@ -0,0 +1,189 @@
+__author__ = 'Paul Pearce'
+
+from collections import OrderedDict
+
+# The number of configurations cached, unless resized
+DEFAULT_SIZE = 128
+
+# The largest C int, an 'i' array item
+INT_MAX = (1 << 31) - 1
+
+
+def is_integral(min_motor_value, max_motor_value, step_value):
+    """
+    Whether every motor value of a configuration fits an 'i' array (a C int), as the table driven engines store them.
+    Not kept with the cached Configuration, which (0.0, 100.0, 20.0) shares with (0, 100, 20) as they compare equal.
+    :param min_motor_value: As for InputHandler
+    :param max_motor_value: As for InputHandler
+    :param step_value: As for InputHandler
+    :return: True if they are all ints, and -max .. max is in range
+    """
+    return type(min_motor_value) is int and type(max_motor_value) is int and type(step_value) is int and \
+        abs(min_motor_value) <= INT_MAX and max_motor_value <= INT_MAX
+
+
+class Configuration(object):
+    __slots__ = ("min_motor_value", "max_motor_value", "step_value", "reverse_limit", "forward_limit", "back_limit",
+                 "table", "transitions", "verified")
+
+    def __init__(self, min_motor_value, max_motor_value, step_value):
+        """
+        Constructor - a validated (min, max, step) and everything worked out from it, shared by every handler with the
+        same configuration. Get one from get_configuration() rather than making it.
+        :param min_motor_value: As for InputHandler
+        :param max_motor_value: As for InputHandler
+        :param step_value: As for InputHandler
+        :return:
+        """
+        if min_motor_value > max_motor_value:
+            raise Exception("min value cannot be > max value")
+
+        if min_motor_value == max_motor_value:
+            raise Exception("Cann have min == max")
+
+        if step_value < 1:
+            raise Exception("step value must be >= 1")
+
+        if (max_motor_value - min_motor_value) < step_value:
+            raise Exception("step is too big")
+
+        self.min_motor_value    =   min_motor_value
+        self.max_motor_value    =   max_motor_value
+        self.step_value         =   step_value
+
+        # Full speed in reverse, and the motor values from which a step forward or back would pass full speed
+        self.reverse_limit      =   max_motor_value * -1
+        self.forward_limit      =   max_motor_value - step_value
+        self.back_limit         =   step_value - max_motor_value
+
+        # Built on first use - a TransitionTable.TransitionTable and an Analytic.StepTransitions
+        self.table              =   None
+        self.transitions        =   None
+
+        # Handler class InputHandler.verify_configuration() has proven -> the (left, right) states the proof covers
+        self.verified           =   {}
+
+    def on_grid(self, value):
+        """
+
+        :param value: A motor value
+        :return: True if the value is one the steering logic can set a motor to - min plus a whole number of steps,
+        from full speed in reverse to full speed forward
+        """
+        return self.reverse_limit <= value <= self.max_motor_value and \
+            (value - self.min_motor_value) % self.step_value == 0
+
+
+class ConfigurationCache(object):
+    def __init__(self, size=DEFAULT_SIZE):
+        """
+        Constructor - the most recently used configurations, keyed by (min, max, step).
+        :param size: The number of configurations to keep, the least recently used is dropped to make room
+        :return:
+        """
+        if size < 1:
+            raise Exception("size must be >= 1")
+
+        self.size       =   size
+        self._entries   =   OrderedDict()
+
+        self.hits       =   0
+        self.misses     =   0
+        self.evictions  =   0
+
+    def get(self, min_motor_value, max_motor_value, step_value):
+        """
+
+        :param min_motor_value: As for InputHandler
+        :param max_motor_value: As for InputHandler
+        :param step_value: As for InputHandler
+        :return: The Configuration, validated and cached on first use (an invalid configuration raises, and is not
+        cached)
+        """
+        key         =   (min_motor_value, max_motor_value, step_value)
+        entries     =   self._entries
+        config      =   entries.get(key)
+
+        if config is not None:
+            self.hits += 1
+
+            try:
+                entries.move_to_end(key)
+            except KeyError:
+                # Evicted by another thread in the meantime, it is still good to use
+                pass
+
+            return config
+
+        self.misses += 1
+
+        config = Configuration(min_motor_value, max_motor_value, step_value)
+
+        # Another thread may have made the same configuration, keep the first so there is one copy
+        config = entries.setdefault(key, config)
+
+        while len(entries) > self.size:
+            try:
+                entries.popitem(last=False)
+                self.evictions += 1
+            except KeyError:
+                break
+
+        return config
+
+    def resize(self, size):
+        """
+        Change the number of configurations kept, dropping the least recently used if there are too many
+        :param size: As for the constructor
+        :return:
+        """
+        if size < 1:
+            raise Exception("size must be >= 1")
+
+        self.size = size
+
+        while len(self._entries) > size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Drop every configuration and zero the counters
+        :return:
+        """
+        self._entries.clear()
+
+        self.hits       =   0
+        self.misses     =   0
+        self.evictions  =   0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def snapshot(self):
+        """
+
+        :return: The counters as a dict
+        """
+        return {
+            "size":         self.size,
+            "entries":      len(self._entries),
+            "hits":         self.hits,
+            "misses":       self.misses,
+            "evictions":    self.evictions,
+        }
+
+
+################################################################
+# The process wide cache, shared by every handler
+CACHE = ConfigurationCache()
+
+
+def get_configuration(min_motor_value, max_motor_value, step_value):
+    """
+    The cached Configuration of (min, max, step), see ConfigurationCache.get()
+    """
+    return CACHE.get(min_motor_value, max_motor_value, step_value)
@@ -0,0 +1,178 @@
+__author__ = 'Paul Pearce'
+
+import os
+import time
+from collections import deque
+
+import skid_steering.InputHandler as IH
+from skid_steering.Scheduler import TickScheduler
+from skid_steering.Statistics import LatencyStatistics
+
+
+class ControlLoop(object):
+    def __init__(self, handler, period, on_tick=None, cpu=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        Constructor - run an InputHandler at a fixed rate. Each tick moves it for every key posted since the last one,
+        polls its output sinks (so a pair held back by a rate limit is written), then calls on_tick (e.g. a
+        Ramp.MotorRamp's tick). The ticks are scheduled by a Scheduler.TickScheduler against absolute deadlines, so they
+        do not drift however long the moves (and their logging) take.
+        :param handler: The InputHandler to move
+        :param period: Seconds between ticks
+        :param on_tick: Called with the clock time of the tick after the keys are moved, or None
+        :param cpu: The CPU core to pin the thread calling run() to while it runs, or None not to pin it
+        :param clock: Seconds
+        :param sleep: Sleep for a number of seconds
+        :return:
+
+        Example loop = ControlLoop(ih, 1.0 / 200, ramp.tick, cpu=3)
+                threading.Thread(target=read_keys, args=(loop.post,), daemon=True).start()
+                loop.run()
+
+        Measured for each tick
+            jitter      how late it started after its deadline
+            duration    how long it took, the maximum is the worst case
+            overruns    it ended after the next tick's deadline (the deadlines missed are skipped, see TickScheduler)
+
+        A key the handler rejects (InputHandler.InvalidInputError) is counted as rejected. Any other exception from a
+        move (e.g. the steering logic failing its consistency check) is counted as a failure, kept as last_failure, and
+        the motors are stopped; the loop keeps ticking.
+
+        Pinning uses os.sched_setaffinity(0, ...) (Linux), which sets the affinity of the calling thread only, so the
+        thread running the loop is pinned and any other threads (e.g. reading keys) are not. The affinity is put back
+        when run() returns.
+        """
+        if cpu is not None and not hasattr(os, "sched_setaffinity"):
+            raise Exception("CPU pinning is not supported on this platform")
+
+        self._handler   =   handler
+        self._on_tick   =   on_tick
+        self._cpu       =   cpu
+        self._clock     =   clock
+        self._events    =   deque()
+
+        self.scheduler  =   TickScheduler(period, clock, sleep)
+
+        self.reset()
+
+    def post(self, key):
+        """
+        Queue a key for the next tick, safe to call from another thread
+        :param key: A logical movement key value
+        :return:
+        """
+        self._events.append(key)
+
+    def run(self, ticks=None):
+        """
+        Run the loop until stop() is called or (if given) a number of ticks have been made
+        :param ticks: The number of ticks to make, None to run until stopped
+        :return:
+        """
+        affinity = None
+
+        if self._cpu is not None:
+            affinity = os.sched_getaffinity(0)
+            os.sched_setaffinity(0, {self._cpu})
+
+        try:
+            self.scheduler.run(self.tick, ticks)
+        finally:
+            if affinity is not None:
+                os.sched_setaffinity(0, affinity)
+
+    def stop(self):
+        """
+        Stop run() after the current tick
+        :return:
+        """
+        self.scheduler.stop()
+
+    def tick(self, now):
+        """
+        Move the handler for the queued keys, poll its output sinks and call on_tick, called by the scheduler
+        :param now: The clock time at the start of the tick
+        :return:
+        """
+        deadline    =   self.scheduler.deadline
+        events      =   self._events
+        handler     =   self._handler
+        move        =   handler.move
+
+        if deadline is not None:
+            self.jitter.record(now - deadline)
+
+        # Only the keys queued when the tick started, so a flood of keys cannot hold the tick up
+        for count in range(len(events)):
+            try:
+                move(events.popleft())
+                self.moves += 1
+            except IH.InvalidInputError:
+                self.rejected += 1
+            except Exception as e:
+                self.failures       +=  1
+                self.last_failure   =   e
+
+                self._stop_motors()
+
+        for sink in handler._sinks:
+            sink.poll()
+
+        if self._on_tick is not None:
+            self._on_tick(now)
+
+        end = self._clock()
+
+        self.duration.record(end - now)
+
+        if deadline is not None and end > deadline + self.scheduler.period:
+            self.overruns += 1
+
+    def _stop_motors(self):
+        """
+        Stop the motors after a move failed, if the steering logic cannot even do that, put the handler in its stopped
+        state directly (its own _stop(), so an engine's state goes with the motor values) and tell the output sinks
+        :return:
+        """
+        handler = self._handler
+
+        try:
+            handler.move(IH.STOP)
+        except Exception:
+            handler._stop()
+
+            for sink in handler._sinks:
+                sink.publish(handler._current_motor_left_value, handler._current_motor_right_value)
+
+    def reset(self):
+        """
+        Forget the measurements
+        :return:
+        """
+        self.jitter         =   LatencyStatistics()
+        self.duration       =   LatencyStatistics()
+        self.overruns       =   0
+        self.moves          =   0
+        self.rejected       =   0
+        self.failures       =   0
+        self.last_failure   =   None
+
+    def snapshot(self):
+        """
+
+        :return: The measurements as a dict, jitter and duration as Statistics.LatencyStatistics snapshots
+        """
+        return {
+            "ticks":    self.duration.count,
+            "skipped":  self.scheduler.skipped,
+            "overruns": self.overruns,
+            "moves":    self.moves,
+            "rejected": self.rejected,
+            "failures": self.failures,
+            "jitter":   self.jitter.snapshot(),
+            "duration": self.duration.snapshot(),
+        }
+
+    def __str__(self):
+        return "ticks=%d skipped=%d overruns=%d moves=%d rejected=%d failures=%d\njitter   %s\nduration %s" % (
+            self.duration.count, self.scheduler.skipped, self.overruns, self.moves, self.rejected, self.failures,
+            self.jitter, self.duration)
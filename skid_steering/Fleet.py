@@ -0,0 +1,211 @@
+__author__ = 'Paul Pearce'
+
+from array import array
+
+import skid_steering.InputHandler as IH
+import skid_steering.TransitionTable as TT
+
+
+class Fleet(object):
+    def __init__(self, configurations=()):
+        """
+        Constructor - many vehicles, each steered as if by its own InputHandler.
+        :param configurations: An iterable of (min_motor_value, max_motor_value, step_value), one per vehicle
+        :return:
+
+        Example fleet = Fleet([(0, 25, 10)] * 1000 + [(0, 100, 20)] * 500)
+
+        Rather than an object per vehicle, every vehicle is a slot in a set of arrays. The transition tables of the
+        distinct configurations are concatenated into one table, so a vehicle's state is a single (fleet wide) state
+        number and moving it is a single lookup whatever its configuration. As the arrays are of C ints, a configuration
+        that is not all ints (e.g. floats) is refused by add().
+        """
+
+        ##########################
+        # Per distinct configuration
+        self._config_min    =   array('i')
+        self._config_max    =   array('i')
+        self._config_step   =   array('i')
+        self._config_start  =   array('i')      # The fleet wide number of the configuration's stopped state
+        self._configs       =   {}
+
+        ##########################
+        # Fleet wide state tables
+        self._lefts         =   array('i')
+        self._rights        =   array('i')
+        self._next          =   array('i')
+        self._errors        =   {}
+
+        ##########################
+        # Per vehicle
+        self._config        =   array('i')
+        self._state         =   array('i')
+        self._left          =   array('i')
+        self._right         =   array('i')
+
+        for min_motor_value, max_motor_value, step_value in configurations:
+            self.add(min_motor_value, max_motor_value, step_value)
+
+    def __len__(self):
+        """
+
+        :return: The number of vehicles
+        """
+        return len(self._state)
+
+    def add(self, min_motor_value, max_motor_value, step_value):
+        """
+        Add a stopped vehicle to the fleet.
+        :param min_motor_value: As for InputHandler
+        :param max_motor_value: As for InputHandler
+        :param step_value: As for InputHandler
+        :return: The index of the vehicle
+        """
+        # Before looking for the configuration, (0.0, 100.0, 20.0) == (0, 100, 20)
+        TT.check_integral(min_motor_value, max_motor_value, step_value)
+
+        config = self._add_configuration(min_motor_value, max_motor_value, step_value)
+
+        start = self._config_start[config]
+
+        self._config.append(config)
+        self._state.append(start)
+        self._left.append(self._lefts[start])
+        self._right.append(self._rights[start])
+
+        return len(self._state) - 1
+
+    def step(self, keys):
+        """
+        Move every vehicle by one key, as InputHandler.move would.
+        :param keys: An iterable (or NumPy array) of logical movement key values, one per vehicle
+
+        All the keys are checked before any vehicle is moved, and every vehicle is moved before an exception raised by
+        the steering logic is reported (for the first vehicle that raised one).
+        """
+        keys = IH.validate_keys(keys)
+
+        if len(keys) != len(self._state):
+            raise Exception("Expected " + str(len(self._state)) + " keys, got " + str(len(keys)))
+
+        slots       =   [TT.KEY_SLOTS[key] for key in keys]
+        width       =   len(TT.KEYS)
+
+        transitions =   self._next
+        lefts       =   self._lefts
+        rights      =   self._rights
+
+        state_of    =   self._state
+        left        =   self._left
+        right       =   self._right
+
+        failed      =   None
+
+        for vehicle, slot in enumerate(slots):
+            cell    =   state_of[vehicle] * width + slot
+            state   =   transitions[cell]
+
+            if state < 0:
+                state = -state - 1
+
+                if failed is None:
+                    failed = (vehicle, cell)
+
+            state_of[vehicle]   =   state
+            left[vehicle]       =   lefts[state]
+            right[vehicle]      =   rights[state]
+
+        if failed is not None:
+            raise Exception(self._errors[failed[1]] + " for vehicle " + str(failed[0]))
+
+    def stop(self):
+        """
+        Stop every vehicle
+        :return:
+        """
+        for vehicle in range(len(self._state)):
+            start = self._config_start[self._config[vehicle]]
+
+            self._state[vehicle]    =   start
+            self._left[vehicle]     =   self._lefts[start]
+            self._right[vehicle]    =   self._rights[start]
+
+    def left_motor_values(self):
+        """
+
+        :return: A read only view of every vehicle's current left motor value, it follows the values as they change,
+        but must be released before any vehicle is added
+        """
+        return memoryview(self._left).toreadonly()
+
+    def right_motor_values(self):
+        """
+
+        :return: A read only view of every vehicle's current right motor value, it follows the values as they change,
+        but must be released before any vehicle is added
+        """
+        return memoryview(self._right).toreadonly()
+
+    def left_motor_value(self, vehicle):
+        """
+
+        :param vehicle: The index of a vehicle
+        :return: The current left motor value of the vehicle
+        """
+        return self._left[vehicle]
+
+    def right_motor_value(self, vehicle):
+        """
+
+        :param vehicle: The index of a vehicle
+        :return: The current right motor value of the vehicle
+        """
+        return self._right[vehicle]
+
+    def configuration(self, vehicle):
+        """
+
+        :param vehicle: The index of a vehicle
+        :return: The (min_motor_value, max_motor_value, step_value) of the vehicle
+        """
+        config = self._config[vehicle]
+
+        return self._config_min[config], self._config_max[config], self._config_step[config]
+
+    def _add_configuration(self, min_motor_value, max_motor_value, step_value):
+        """
+        Append the transition table of a configuration to the fleet wide table, unless already there.
+        :return: The index of the configuration
+        """
+        key = (min_motor_value, max_motor_value, step_value)
+
+        config = self._configs.get(key)
+        if config is not None:
+            return config
+
+        table   =   TT.shared_table(min_motor_value, max_motor_value, step_value)
+
+        offset  =   len(self._lefts)
+        cells   =   len(self._next)
+
+        for state in table.next:
+            if state < 0:
+                self._next.append(-(-state - 1 + offset) - 1)
+            else:
+                self._next.append(state + offset)
+
+        for cell, error in table.errors.items():
+            self._errors[cell + cells] = error
+
+        self._lefts.extend(table.lefts)
+        self._rights.extend(table.rights)
+
+        config = len(self._config_min)
+
+        self._config_min.append(min_motor_value)
+        self._config_max.append(max_motor_value)
+        self._config_step.append(step_value)
+        self._config_start.append(offset)
+        self._configs[key] = config
+
+        return config
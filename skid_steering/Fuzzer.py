@@ -0,0 +1,378 @@
+__author__ = 'Paul Pearce'
+
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+from collections import OrderedDict, namedtuple
+
+import skid_steering.Analytic as A
+import skid_steering.InputHandler as IH
+import skid_steering.TransitionTable as TT
+
+################################################################
+# Kinds of failure
+DIVERGENCE  =   "divergence"    # An engine's motor values or exception differ from the reference
+INVARIANT   =   "invariant"     # The reference itself raised, e.g. the internal consistency check
+
+# keys is the (shrunk) key sequence from the stopped state that shows the failure, expected and actual are outcomes
+Failure = namedtuple("Failure", ["kind", "engine", "configuration", "keys", "expected", "actual"])
+
+# The configurations whose handlers are kept, the least recently used are dropped (shrinking revisits a few)
+MAX_HANDLERS = 16
+
+# The outcome of a key sequence: the motor values after each key up to any exception, the exception message (or None)
+# and the motor values left after it
+Outcome = namedtuple("Outcome", ["states", "error", "final"])
+
+
+def _moves(handler, keys):
+    """
+    Run keys through a handler one move() at a time
+    :return: An Outcome
+    """
+    move    =   handler.move
+    states  =   []
+
+    try:
+        for key in keys:
+            states.append(move(key))
+    except Exception as e:
+        return Outcome(states, str(e), handler.motor_state())
+
+    return Outcome(states, None, states[-1] if states else handler.motor_state())
+
+
+def _batch(handler, keys):
+    """
+    Run keys through a handler with a single move_many()
+    :return: An Outcome
+    """
+    try:
+        left, right = handler.move_many(keys)
+    except Exception as e:
+        final           =   handler.motor_state()
+        message, index  =   str(e).rsplit(" at index ", 1)
+
+        # move_many() does not give the motor values before the exception, so run the keys up to it again
+        handler._stop()
+        left, right = handler.move_many(keys[:int(index)])
+
+        return Outcome(list(zip(left, right)), message, final)
+
+    states = list(zip(left, right))
+
+    return Outcome(states, None, states[-1] if states else handler.motor_state())
+
+
+################################################################
+# The engines that can be compared with the reference, name -> (handler class, run). A handler is made once per
+# configuration and reset to the stopped state (_stop()) between sequences.
+ENGINES = {
+    "reference-batch":  (IH.InputHandler, _batch),
+    "table":            (TT.TableInputHandler, _moves),
+    "table-batch":      (TT.TableInputHandler, _batch),
+    "analytic":         (A.AnalyticInputHandler, _moves),
+}
+
+
+def random_configuration(rnd, max_steps=8):
+    """
+    A random valid (min, max, step), mostly with min 0 as deployed, sometimes with min off 0 or off the step grid
+    :param rnd: A random.Random
+    :param max_steps: The most steps from stopped to full speed, keeping the reachable states few
+    :return: (min_motor_value, max_motor_value, step_value)
+    """
+    step_value      =   rnd.randint(1, 20)
+    min_motor_value =   0 if rnd.random() < 0.75 else rnd.randint(-2 * step_value, 2 * step_value)
+    max_motor_value =   max(min_motor_value + step_value, rnd.randint(step_value, max_steps * step_value + step_value))
+
+    return min_motor_value, max_motor_value, step_value
+
+
+class Fuzzer(object):
+    def __init__(self, engines=None, seed=None, max_keys=32, max_steps=8):
+        """
+        Constructor - differential fuzzing of the steering logic. Random configurations and random key sequences are run
+        through the reference InputHandler and each engine, any difference in the motor values after each key, or in
+        the exceptions raised, is a failure and shrunk to a minimal reproducer.
+        :param engines: Names from ENGINES, defaults to them all
+        :param seed: For the random configurations and keys, None for a random seed
+        :param max_keys: The longest key sequence
+        :param max_steps: As for random_configuration()
+        :return:
+
+        Example failures = Fuzzer(seed=1).run(sequences=100000)
+
+        Handlers are made once per configuration and reset between sequences, so a sequence costs only its moves. Only
+        those of the MAX_HANDLERS most recently used configurations are kept.
+        """
+        if engines is None:
+            engines = sorted(ENGINES)
+
+        for name in engines:
+            if name not in ENGINES:
+                raise Exception("Unknown engine: " + "[" + str(name) + "]")
+
+        self.engines    =   list(engines)
+        self.seed       =   seed if seed is not None else random.randrange(1 << 32)
+        self.max_keys   =   max_keys
+        self.max_steps  =   max_steps
+
+        self._random    =   random.Random(self.seed)
+        self._handlers  =   OrderedDict()
+
+        self.sequences  =   0
+        self.keys       =   0
+        self.failures   =   []
+
+    def run(self, sequences=None, seconds=None, sequences_per_configuration=1000, stop_on_failure=True):
+        """
+        Fuzz until a number of sequences have been run, or for a time
+        :param sequences: The number of key sequences to run, None for no limit
+        :param seconds: How long to run for, None for no limit
+        :param sequences_per_configuration: Key sequences run with each random configuration
+        :param stop_on_failure: Stop at the first failure, rather than at the first for each configuration
+        :return: The failures found (also kept in failures)
+        """
+        if sequences is None and seconds is None:
+            raise Exception("sequences or seconds must be given")
+
+        deadline    =   time.monotonic() + seconds if seconds is not None else None
+        rnd         =   self._random
+        keys        =   IH.KEYS
+
+        while True:
+            configuration = random_configuration(rnd, self.max_steps)
+
+            for count in range(sequences_per_configuration):
+                if sequences is not None and self.sequences >= sequences:
+                    return self.failures
+
+                sequence = rnd.choices(keys, k=rnd.randint(1, self.max_keys))
+
+                failure = self.check(configuration, sequence)
+
+                self.sequences  +=  1
+                self.keys       +=  len(sequence)
+
+                if failure is not None:
+                    self.failures.append(self.shrink(failure))
+
+                    if stop_on_failure:
+                        return self.failures
+
+                    break
+
+            if deadline is not None and time.monotonic() >= deadline:
+                return self.failures
+
+    def check(self, configuration, keys):
+        """
+        Run a key sequence through the reference and every engine
+        :param configuration: (min_motor_value, max_motor_value, step_value)
+        :param keys: The logical movement keys, from the stopped state
+        :return: The first Failure, or None
+        """
+        cache       =   self._handlers
+        handlers    =   cache.get(configuration)
+
+        if handlers is None:
+            handlers = cache[configuration] = self._make_handlers(configuration)
+
+            while len(cache) > MAX_HANDLERS:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(configuration)
+
+        reference = handlers[0]
+        reference._stop()
+        expected = _moves(reference, keys)
+
+        if expected.error is not None:
+            return Failure(INVARIANT, "reference", configuration, keys, expected, None)
+
+        for name, handler, run in handlers[1:]:
+            handler._stop()
+            actual = run(handler, keys)
+
+            if actual != expected:
+                return Failure(DIVERGENCE, name, configuration, keys, expected, actual)
+
+        return None
+
+    def shrink(self, failure):
+        """
+        Make a failure as small as possible: drop every key after it shows, remove as many other keys as possible, then
+        try smaller configurations that still fail
+        :param failure: A Failure
+        :return: The shrunk Failure
+        """
+        def fails(configuration, keys):
+            found = self.check(configuration, keys)
+
+            if found is not None and found.kind == failure.kind and found.engine == failure.engine:
+                return found
+
+            return None
+
+        failure = fails(failure.configuration, self._shrink_keys(failure.configuration, failure.keys, fails)) or failure
+
+        for configuration in self._smaller_configurations(failure.configuration):
+            found = fails(configuration, failure.keys)
+
+            if found is not None:
+                return self.shrink(found)
+
+        return failure
+
+    def _shrink_keys(self, configuration, keys, fails):
+        """
+        Delta debugging - remove chunks of keys, halving the chunk size, while the failure still shows
+        """
+        # Nothing after the failing key matters
+        for end in range(1, len(keys) + 1):
+            if fails(configuration, keys[:end]):
+                keys = keys[:end]
+                break
+
+        chunk = len(keys) // 2
+        while chunk >= 1:
+            start = 0
+            while start < len(keys):
+                candidate = keys[:start] + keys[start + chunk:]
+
+                if candidate and fails(configuration, candidate):
+                    keys = candidate
+                else:
+                    start += chunk
+
+            chunk //= 2
+
+        return keys
+
+    @staticmethod
+    def _smaller_configurations(configuration):
+        """
+
+        :return: Valid configurations simpler than a configuration, simplest first
+        """
+        min_motor_value, max_motor_value, step_value = configuration
+
+        candidates = [
+            (0, max_motor_value, step_value),
+            (min_motor_value, max_motor_value - step_value, step_value),
+            (min_motor_value, max_motor_value - 1, step_value),
+            (min_motor_value // 2, max_motor_value, step_value),
+            (min_motor_value, max_motor_value, step_value // 2),
+        ]
+
+        for candidate in candidates:
+            smaller_min, smaller_max, smaller_step = candidate
+
+            if candidate != configuration and abs(smaller_min) <= abs(min_motor_value) and \
+                    smaller_max <= max_motor_value and smaller_step >= 1 and smaller_max - smaller_min >= smaller_step:
+                yield candidate
+
+    def _make_handlers(self, configuration):
+        # Engines of the same class share the table (or transitions) of a configuration, built only if one needs it
+        handlers = [IH.InputHandler(*configuration, instrumentation=IH.INSTRUMENTATION_OFF)]
+
+        for name in self.engines:
+            handler_class, run = ENGINES[name]
+
+            if handler_class is TT.TableInputHandler:
+                table = TT.shared_table(*configuration)
+                handler = handler_class(*configuration, table=table, instrumentation=IH.INSTRUMENTATION_OFF)
+            elif handler_class is A.AnalyticInputHandler:
+                transitions = A.shared_transitions(*configuration)
+                handler = handler_class(*configuration, transitions=transitions, instrumentation=IH.INSTRUMENTATION_OFF)
+            else:
+                handler = handler_class(*configuration, instrumentation=IH.INSTRUMENTATION_OFF)
+
+            handlers.append((name, handler, run))
+
+        return handlers
+
+
+def describe(failure):
+    """
+
+    :param failure: A Failure
+    :return: A description of it, with a reproducer
+    """
+    names = dict((key, name) for name, key in
+                 [("STOP", IH.STOP), ("LEFT", IH.LEFT), ("RIGHT", IH.RIGHT), ("FORWARD", IH.FORWARD), ("BACK", IH.BACK)])
+
+    lines = [
+        failure.kind + " in " + failure.engine + " with configuration (min, max, step) " + str(failure.configuration),
+        "Keys: " + ", ".join(names[key] for key in failure.keys),
+        "Reference: " + _describe_outcome(failure.expected),
+    ]
+
+    if failure.actual is not None:
+        lines.append(failure.engine.capitalize() + ": " + _describe_outcome(failure.actual))
+
+    return "\n".join(lines)
+
+
+def _describe_outcome(outcome):
+    text = "L/R " + " ".join(str(list(state)) for state in outcome.states)
+
+    if outcome.error is not None:
+        text += " then raised [" + outcome.error + "] leaving L/R" + str(list(outcome.final))
+
+    return text
+
+
+def _fuzz(engines, seed, seconds):
+    """
+    Fuzz in a worker process
+    :return: (sequences, keys, failures)
+    """
+    fuzzer = Fuzzer(engines, seed)
+    fuzzer.run(seconds=seconds, stop_on_failure=False)
+
+    return fuzzer.sequences, fuzzer.keys, fuzzer.failures
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="python -m skid_steering.Fuzzer",
+                                     description="Differential fuzzing of the steering engines against InputHandler")
+    parser.add_argument("--seconds", type=float, default=60.0, help="how long to fuzz for (default 60)")
+    parser.add_argument("--seed", type=int, help="the seed of the first job (default random), job n uses seed + n")
+    parser.add_argument("--jobs", type=int, default=multiprocessing.cpu_count(),
+                        help="processes to fuzz in (default one per CPU)")
+    parser.add_argument("--engine", action="append", choices=sorted(ENGINES),
+                        help="engine to compare with the reference, may be repeated (default all)")
+
+    arguments   =   parser.parse_args(argv[1:])
+    seed        =   arguments.seed if arguments.seed is not None else random.randrange(1 << 32)
+    jobs        =   [(arguments.engine, seed + job, arguments.seconds) for job in range(arguments.jobs)]
+
+    start = time.monotonic()
+
+    if arguments.jobs == 1:
+        results = [_fuzz(*jobs[0])]
+    else:
+        with multiprocessing.Pool(arguments.jobs) as pool:
+            results = pool.starmap(_fuzz, jobs)
+
+    elapsed     =   time.monotonic() - start
+    sequences   =   sum(result[0] for result in results)
+    keys        =   sum(result[1] for result in results)
+    failures    =   [failure for result in results for failure in result[2]]
+
+    print("Seed " + str(seed) + ", " + str(arguments.jobs) + " jobs: " + str(sequences) + " sequences (" + str(keys) +
+          " keys) in " + "%.1f" % elapsed + "s, " + "%.0f" % (sequences * 60 / elapsed) + " sequences per minute")
+
+    for failure in failures:
+        print("")
+        print(describe(failure))
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
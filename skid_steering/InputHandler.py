@@ -10,17 +10,152 @@ RIGHT   =   6
 FORWARD =   8
 BACK =   2
 
+KEYS    =   (STOP, LEFT, RIGHT, FORWARD, BACK)
+
+################################################################
+# How much logging InputHandler does when moving
+#
+# off       No string formatting and no logger calls at all
+# summary   One line per move giving the input and motor values
+# trace     Every step of the steering logic (the original output)
+INSTRUMENTATION_OFF     =   "off"
+INSTRUMENTATION_SUMMARY =   "summary"
+INSTRUMENTATION_TRACE   =   "trace"
+
+INSTRUMENTATION_MODES   =   (INSTRUMENTATION_OFF, INSTRUMENTATION_SUMMARY, INSTRUMENTATION_TRACE)
+
 import math
-import logging
+from array import array
+
+from skid_steering.Configuration import get_configuration, is_integral
+from skid_steering.MotorState import motor_state
+
+# logging.INFO - logging is slow to import, so it is only imported by handlers that log
+_INFO = 20
+
+
+def _get_logger():
+    import logging
+
+    return logging.getLogger("SkidSteering.InputHandler")
+
+
+class InvalidInputError(Exception):
+    """
+    A value given as a logical movement key is not one of KEYS
+    """
+    pass
+
+
+def validate_keys(keys):
+    """
+    Check a sequence of logical movement keys before any of them are used.
+    :param keys: An iterable (or NumPy array) of logical movement key values
+    :return: The keys as a list
+    """
+    if hasattr(keys, "tolist"):
+        # A NumPy array, tolist() converts to Python ints far faster than iterating it
+        keys = keys.tolist()
+    else:
+        keys = list(keys)
+
+    try:
+        valid = set(KEYS).issuperset(keys)
+    except TypeError:
+        valid = False
+
+    if not valid:
+        for index, key in enumerate(keys):
+            if key not in KEYS:
+                raise InvalidInputError("Invalid input: " + "[" + str(key) + "] at index " + str(index))
+
+    return keys
+
+
+def _at_index(error, index):
+    """
+    An exception to raise (from error) when a key of a batch raised one
+    :param error: The exception the key raised
+    :param index: The index of the key in the batch
+    :return: An exception of the same type, with the index after its message (a plain Exception if the type cannot be
+    made from a message alone)
+    """
+    message = str(error) + " at index " + str(index)
+
+    try:
+        return type(error)(message)
+    except Exception:
+        return Exception(message)
+
+
+def verify_configuration(min_motor_value, max_motor_value, step_value, handler_class=None):
+    """
+    Prove, by searching every reachable motor state with every key, that the steering logic never fails the internal
+    consistency check (or otherwise raises) for a configuration. The proof is kept with the cached
+    Configuration.Configuration, so this is only done once per configuration (unless it is evicted from the cache).
+    :param min_motor_value: As for InputHandler
+    :param max_motor_value: As for InputHandler
+    :param step_value: As for InputHandler
+    :param handler_class: The InputHandler (sub-)class whose steering logic is to be proven, defaults to InputHandler
+    :return:
+    """
+    if handler_class is None:
+        handler_class = InputHandler
+
+    config = get_configuration(min_motor_value, max_motor_value, step_value)
+
+    if handler_class in config.verified:
+        return
+
+    # Imported here as it imports this module
+    from skid_steering.StateExplorer import StateExplorer
+
+    explorer = StateExplorer(min_motor_value, max_motor_value, step_value, handler_class=handler_class).explore()
+
+    if explorer.violations:
+        finding = explorer.violations[0]
+
+        raise Exception("Configuration failed verification: " + finding.message + " after keys " + str(finding.keys))
+
+    config.verified[handler_class] = frozenset(explorer.states())
+
+
+# Handler class -> the names of all its slots (its own and inherited), for fork()
+_slot_names = {}
+
+
+def _get_slot_names(handler_class):
+    names = _slot_names.get(handler_class)
+
+    if names is None:
+        names = []
+
+        for klass in reversed(handler_class.__mro__):
+            slots = klass.__dict__.get("__slots__", ())
+            names.extend([slots] if isinstance(slots, str) else slots)
+
+        names = _slot_names[handler_class] = tuple(name for name in names if name not in ("__dict__", "__weakref__"))
+
+    return names
+
 
 class InputHandler(object):
-    def __init__(self, min_motor_value, max_motor_value, step_value):
+    # Millions of handlers are created by fleet simulations and replay jobs, so no per instance __dict__
+    __slots__ = ("_logger", "_min_motor_value", "_max_motor_value", "_step_value", "_instrumentation", "_trace",
+                 "_summary", "_current_motor_left_value", "_current_motor_right_value", "_sinks", "_listeners",
+                 "_check_invariant", "_latency", "_config")
+
+    def __init__(self, min_motor_value, max_motor_value, step_value, instrumentation=INSTRUMENTATION_TRACE,
+                 verified=False):
         """
         Constructor
         :param min_motor_value: The value to stop the motor turning.
         :param max_motor_value: The value value to spin the motor at max. speed
         :param step_value: How many increment each key press will move the motor value up or down. It is assumed that
         the same range will be valid for reversing a motor.
+        :param instrumentation: One of INSTRUMENTATION_MODES, how much logging to do when moving.
+        :param verified: Prove (once per configuration) that no reachable motor state can fail the internal consistency
+        check, so move() need not check it. The check is still made in trace instrumentation mode.
         :return:
 
         Example ih = IH.InputHandler(0, 100, 20)
@@ -28,38 +163,46 @@ class InputHandler(object):
         The logical motors can handle a range of -100 to +100 (full reverse to full forward), and 5 (100/20)
         forward/back keypress's will move the motor from stopped to full speed in the relevant direction.
 
+        The configuration is validated, and its limits worked out, once per process (see Configuration) and shared by
+        every handler with the same configuration.
         """
 
-        self._logger = logging.getLogger("SkidSteering.InputHandler")
+        self._logger = _get_logger() if instrumentation != INSTRUMENTATION_OFF else None
 
         # Sanity checks
 
-        if min_motor_value > max_motor_value:
-            raise Exception("min value cannot be > max value")
-
-        if(min_motor_value == max_motor_value):
-            raise Exception("Cann have min == max")
-
-        if step_value < 1:
-            raise Exception("step value must be >= 1")
-
-        if (max_motor_value - min_motor_value) < step_value:
-            raise Exception("step is too big")
+        if instrumentation not in INSTRUMENTATION_MODES:
+            raise Exception("Unknown instrumentation mode: " + "[" + str(instrumentation) + "]")
 
+        self._config                =   get_configuration(min_motor_value, max_motor_value, step_value)
 
         self._min_motor_value       =   min_motor_value
         self._max_motor_value       =   max_motor_value
         self._step_value            =   step_value
 
+        self._instrumentation       =   instrumentation
+        self._trace                 =   instrumentation == INSTRUMENTATION_TRACE
+        self._summary               =   instrumentation == INSTRUMENTATION_SUMMARY
+
         self._current_motor_left_value     =   0
         self._current_motor_right_value    =   0
 
+        self._sinks                 =   ()
+        self._listeners             =   ()
+        self._latency               =   None
+
+        if verified:
+            verify_configuration(min_motor_value, max_motor_value, step_value, type(self))
+
+        self._check_invariant       =   not verified or self._trace
+
         self._stop()
 
     def move(self, input):
         """
         Given the logical input movement key, determine the new left and right (logical) motor values.
         :param input: A logical movement key value
+        :return: The new motor values as a MotorState.MotorState
 
         Below are some of the actions performed when the vehicle is in various states
 
@@ -86,11 +229,16 @@ class InputHandler(object):
         From the above, all the other states and actions can be inferred.
 
         """
-        initialMotorValues = "L/R" + str([self._current_motor_left_value, self._current_motor_right_value])
+        if self._latency is not None:
+            return self._latency.move(self, input)
+
+        initial_left    =   self._current_motor_left_value
+        initial_right   =   self._current_motor_right_value
 
-        self._logger.info("Initial motor values: " + initialMotorValues)
+        if self._trace:
+            self._logger.info("Initial motor values: " + "L/R" + str([initial_left, initial_right]))
 
-        self._logger.info("Input: [" + str(input) + "]")
+            self._logger.info("Input: [" + str(input) + "]")
 
         ################
         # Generic action
@@ -105,25 +253,223 @@ class InputHandler(object):
         elif input == STOP:
             self._stop()
         else:
-            raise Exception("Invalid input: " + "[" + str(input) + "]")
+            raise InvalidInputError("Invalid input: " + "[" + str(input) + "]")
+
+        if self._trace:
+            self._logger.info("Current motor values: " + "L/R" + str([self._current_motor_left_value, self._current_motor_right_value]))
+        elif self._summary and self._logger.isEnabledFor(_INFO):
+            self._logger.info("Input: [" + str(input) + "] " +
+                              "L/R" + str([initial_left, initial_right]) + " -> " +
+                              "L/R" + str([self._current_motor_left_value, self._current_motor_right_value]))
+
+        if self._check_invariant:
+            #############################################################################
+            # Sanity checks - cannot have one motor moving while another motor stationery
+            problem_left_motor_speed   =   self._current_motor_left_value == 0 and self._current_motor_right_value != 0
+            problem_right_motor_speed  =   self._current_motor_left_value != 0 and self._current_motor_right_value == 0
+
+            if problem_left_motor_speed or problem_right_motor_speed:
+                initialMotorValues = "L/R" + str([initial_left, initial_right])
+                currentMotorValues = "L/R" + str([self._current_motor_left_value, self._current_motor_right_value])
+
+                errorMessage = "Internal consistancy check failure - Motor values are invalid - one motor is stationery:"
+                errorMessage = errorMessage + " Initial motor values: " + initialMotorValues
+                errorMessage = errorMessage + " Input: " + "[" + str(input) + "]"
+                errorMessage = errorMessage + " Current motor values: " + currentMotorValues
+
+                raise Exception(errorMessage)
+
+        for sink in self._sinks:
+            sink.publish(self._current_motor_left_value, self._current_motor_right_value)
+
+        for listener in self._listeners:
+            listener(input, self._current_motor_left_value, self._current_motor_right_value)
+
+        return motor_state(self._current_motor_left_value, self._current_motor_right_value)
+
+    def move_many(self, keys):
+        """
+        Move through a sequence of logical input movement keys, as if move() was called for each in turn.
+        :param keys: An iterable (or NumPy array) of logical movement key values
+        :return: (left, right) - arrays ('i' typecode, or 'd' for a configuration with motor values that are not all C
+        ints, e.g. floats) of the motor values after each key
+
+        All the keys are checked before any are used, an invalid key raises an exception giving its index and leaves
+        the motor values unchanged. An exception raised by a move is raised again as the same type, with the index of
+        its key after the message, chained from it. The returned arrays support the buffer protocol, so
+        numpy.frombuffer(left, dtype=numpy.int32) gives a view of them without copying.
+
+        When nothing sees the moves one by one (no output sinks, move listeners, move latency or logging), each
+        transition - (motor values, key) - is worked out by move() only the first time it is met in the sequence and
+        looked up after that.
+        """
+        keys        =   validate_keys(keys)
+        typecode    =   'i' if is_integral(self._min_motor_value, self._max_motor_value, self._step_value) else 'd'
+
+        left    =   array(typecode, [0]) * len(keys)
+        right   =   array(typecode, [0]) * len(keys)
+
+        move    =   self.move
+        index   =   0
+
+        # The steering state must be just the motor values for a transition to be reused (see restore())
+        observed = self._sinks or self._listeners or self._latency is not None or self._logger is not None or \
+            type(self).restore is not InputHandler.restore
+
+        try:
+            if observed:
+                for index, key in enumerate(keys):
+                    move(key)
+
+                    left[index]     =   self._current_motor_left_value
+                    right[index]    =   self._current_motor_right_value
+            else:
+                transitions     =   {}
+                current_left    =   self._current_motor_left_value
+                current_right   =   self._current_motor_right_value
+
+                for index, key in enumerate(keys):
+                    transition  =   (current_left, current_right, key)
+                    following   =   transitions.get(transition)
 
-        currentMotorValues = "L/R" + str([self._current_motor_left_value, self._current_motor_right_value])
+                    if following is None:
+                        self._current_motor_left_value      =   current_left
+                        self._current_motor_right_value     =   current_right
 
-        self._logger.info("Current motor values: " + currentMotorValues)
+                        move(key)
+
+                        following = transitions[transition] = (self._current_motor_left_value,
+                                                                self._current_motor_right_value)
+
+                    current_left, current_right = following
+
+                    left[index]     =   current_left
+                    right[index]    =   current_right
+
+                self._current_motor_left_value      =   current_left
+                self._current_motor_right_value     =   current_right
+        except Exception as e:
+            raise _at_index(e, index) from e
+
+        return left, right
+
+    def add_output_sink(self, sink):
+        """
+        Publish the motor values to an output sink after every move, the sink only writes them when they change.
+        :param sink: An OutputSink.OutputSink
+        :return:
+        """
+        self._sinks = self._sinks + (sink,)
+
+        sink.publish(self._current_motor_left_value, self._current_motor_right_value)
+
+    def remove_output_sink(self, sink):
+        """
+        Stop publishing the motor values to an output sink
+        :param sink: An OutputSink.OutputSink added with add_output_sink()
+        :return:
+        """
+        sinks = list(self._sinks)
+        sinks.remove(sink)
+
+        self._sinks = tuple(sinks)
+
+    def add_move_listener(self, listener):
+        """
+        Call a listener after every successful move, whether or not the motor values changed.
+        :param listener: Called with (input, left, right)
+        :return:
+        """
+        self._listeners = self._listeners + (listener,)
+
+    def remove_move_listener(self, listener):
+        """
+        Stop calling a listener after every move
+        :param listener: A listener added with add_move_listener()
+        :return:
+        """
+        listeners = list(self._listeners)
+        listeners.remove(listener)
+
+        self._listeners = tuple(listeners)
+
+    def set_move_latency(self, latency):
+        """
+        Time every move
+        :param latency: A Latency.MoveLatency to record the time of each move in, or None to stop timing
+        :return:
+        """
+        self._latency = latency
+
+    def motor_state(self):
+        """
+
+        :return: The current motor values as a MotorState.MotorState
+        """
+        return motor_state(self._current_motor_left_value, self._current_motor_right_value)
+
+    def snapshot(self):
+        """
+        The steering state, to restore() later - only the motor values matter, everything else is the configuration
+        :return: The current motor values as a MotorState.MotorState
+        """
+        return motor_state(self._current_motor_left_value, self._current_motor_right_value)
+
+    def restore(self, snapshot):
+        """
+        Put the steering state back as it was when a snapshot was taken. Output sinks and move listeners are not told,
+        this is for trying keys out (see fork()), not for moving the vehicle.
+        :param snapshot: A MotorState.MotorState (or (left, right)) from snapshot(), of this or a handler with the same
+        configuration
+        :return:
+
+        A verified handler restored to a state its proof does not cover (one not reachable from the stopped state)
+        checks the internal consistency of every move from then on.
+        """
+        left, right = snapshot
+
+        if not (self._config.on_grid(left) and self._config.on_grid(right)):
+            raise Exception("Motor state is not on the grid: " + "L/R" + str([left, right]))
+
+        if not self._check_invariant and (left, right) not in self._config.verified.get(type(self), ()):
+            self._check_invariant = True
+
+        self._current_motor_left_value      =   left
+        self._current_motor_right_value     =   right
+
+    def fork(self, instrumentation=None):
+        """
+        A new handler in the same steering state, to try keys on without moving this one. The configuration (and any
+        compiled transition data) is shared, only the motor state is copied - far cheaper than copy.deepcopy().
+        :param instrumentation: One of INSTRUMENTATION_MODES for the new handler, None for the same as this one
+        :return: A handler of the same class, with no output sinks, move listeners or move latency
+        """
+        if instrumentation is not None and instrumentation not in INSTRUMENTATION_MODES:
+            raise Exception("Unknown instrumentation mode: " + "[" + str(instrumentation) + "]")
+
+        fork = object.__new__(type(self))
+
+        for name in _get_slot_names(type(self)):
+            try:
+                setattr(fork, name, getattr(self, name))
+            except AttributeError:
+                pass
 
-        #############################################################################
-        # Sanity checks - cannot have one motor moving while another motor stationery
-        problem_left_motor_speed   =   self._current_motor_left_value == 0 and self._current_motor_right_value != 0
-        problem_right_motor_speed  =   self._current_motor_left_value != 0 and self._current_motor_right_value == 0
+        if hasattr(self, "__dict__"):
+            fork.__dict__.update(self.__dict__)
 
-        if problem_left_motor_speed or problem_right_motor_speed:
-            errorMessage = "Internal consistancy check failure - Motor values are invalid - one motor is stationery:"
-            errorMessage = errorMessage + " Initial motor values: " + initialMotorValues
-            errorMessage = errorMessage + " Input: " + "[" + str(input) + "]"
-            errorMessage = errorMessage + " Current motor values: " + currentMotorValues
+        fork._sinks     =   ()
+        fork._listeners =   ()
+        fork._latency   =   None
 
-            raise Exception(errorMessage)
+        if instrumentation is not None and instrumentation != self._instrumentation:
+            fork._logger            =   _get_logger() if instrumentation != INSTRUMENTATION_OFF else None
+            fork._instrumentation   =   instrumentation
+            fork._trace             =   instrumentation == INSTRUMENTATION_TRACE
+            fork._summary           =   instrumentation == INSTRUMENTATION_SUMMARY
+            fork._check_invariant   =   self._check_invariant or fork._trace
 
+        return fork
 
     def left_motor_value(self):
         """
@@ -131,7 +477,8 @@ class InputHandler(object):
         :return: The current left motor value
         """
 
-        self._logger.debug(self._current_motor_left_value)
+        if self._trace:
+            self._logger.debug(self._current_motor_left_value)
 
         return self._current_motor_left_value
 
@@ -140,7 +487,8 @@ class InputHandler(object):
 
         :return: The current right motor value
         """
-        self._logger.debug(self._current_motor_right_value)
+        if self._trace:
+            self._logger.debug(self._current_motor_right_value)
 
         return self._current_motor_right_value
 
@@ -154,7 +502,8 @@ class InputHandler(object):
 
         value =  moving and dM == 0.0
 
-        self._logger.debug(str(value))
+        if self._trace:
+            self._logger.debug(str(value))
 
         return value
 
@@ -170,21 +519,24 @@ class InputHandler(object):
 
         value   =   moving and dM != 0.0
 
-        self._logger.debug(str(value))
+        if self._trace:
+            self._logger.debug(str(value))
 
         return value
 
     def _is_turning_left(self):
         value = self._current_motor_left_value < self._current_motor_right_value
 
-        self._logger.debug(str(value))
+        if self._trace:
+            self._logger.debug(str(value))
 
         return value
 
     def _is_turning_right(self):
         value = self._current_motor_right_value < self._current_motor_left_value
 
-        self._logger.debug(str(value))
+        if self._trace:
+            self._logger.debug(str(value))
 
         return value
 
@@ -195,7 +547,8 @@ class InputHandler(object):
         """
         value   =    self._current_motor_left_value >= 0 and self._current_motor_right_value >= 0
 
-        self._logger.debug(str(value))
+        if self._trace:
+            self._logger.debug(str(value))
 
         return value
 
@@ -203,7 +556,8 @@ class InputHandler(object):
     def _is_moving_back(self):
         value   =    self._current_motor_left_value < 0 and self._current_motor_right_value < 0
 
-        self._logger.debug(str(value))
+        if self._trace:
+            self._logger.debug(str(value))
 
         return value
 
@@ -215,7 +569,8 @@ class InputHandler(object):
         """
         value   =    self._current_motor_left_value == 0 and self._current_motor_right_value == 0
 
-        self._logger.debug(str(value))
+        if self._trace:
+            self._logger.debug(str(value))
 
         return value
 
@@ -226,7 +581,8 @@ class InputHandler(object):
         """
         value   =    not self._is_stopped()
 
-        self._logger.debug(str(value))
+        if self._trace:
+            self._logger.debug(str(value))
 
         return value
 
@@ -237,7 +593,8 @@ class InputHandler(object):
         :return:
         """
 
-        self._logger.info("Entering")
+        if self._trace:
+            self._logger.info("Entering")
 
         self._current_motor_left_value      =   self._min_motor_value
         self._current_motor_right_value     =   self._min_motor_value
@@ -249,7 +606,8 @@ class InputHandler(object):
         :return:
         """
 
-        self._logger.info("Entering")
+        if self._trace:
+            self._logger.info("Entering")
 
         if self._is_spinning() or self._is_stopped():
             #########################################################
@@ -259,7 +617,7 @@ class InputHandler(object):
 
             ###########################
             # Slow left, speed up right
-            near_limit_left     = target_left_value < (self._max_motor_value * -1)
+            near_limit_left     = target_left_value < self._config.reverse_limit
             near_limit_right    = target_right_value >= self._max_motor_value
 
             if near_limit_left and near_limit_right:
@@ -290,7 +648,7 @@ class InputHandler(object):
             #########################################################
             # Are we near the limits of max speed in either direction
             near_limit_left    = (self._current_motor_left_value + self._step_value) >= 0
-            near_limit_right    = (self._current_motor_right_value - self._step_value) < (self._max_motor_value * -1)
+            near_limit_right    = (self._current_motor_right_value - self._step_value) < self._config.reverse_limit
 
             if not near_limit_right :
                 # speed up right motor
@@ -310,7 +668,8 @@ class InputHandler(object):
         :return:
         """
 
-        self._logger.info("Entering")
+        if self._trace:
+            self._logger.info("Entering")
 
         if self._is_spinning() or self._is_stopped():
             #########################################################
@@ -320,7 +679,7 @@ class InputHandler(object):
 
             ###########################
             # Slow right, speed up left
-            near_limit_right   = target_right_value < (self._max_motor_value * -1)
+            near_limit_right   = target_right_value < self._config.reverse_limit
             near_limit_left    = target_left_value >= self._max_motor_value
 
             if near_limit_left and near_limit_right:
@@ -351,7 +710,7 @@ class InputHandler(object):
             #########################################################
             # Are we near the limits of max speed in either direction
             near_limit_right    = (self._current_motor_right_value + self._step_value) >= 0
-            near_limit_left    = (self._current_motor_left_value - self._step_value) < (self._max_motor_value * -1)
+            near_limit_left    = (self._current_motor_left_value - self._step_value) < self._config.reverse_limit
 
             if not near_limit_left :
                 # speed up left motor
@@ -371,12 +730,14 @@ class InputHandler(object):
         :return:
         """
 
-        self._logger.info("Entering")
+        if self._trace:
+            self._logger.info("Entering")
 
         #####################################
-        # Are we near the limits of max speed
-        near_limit_left   = (self._current_motor_left_value + self._step_value) > self._max_motor_value
-        near_limit_right  = (self._current_motor_right_value + self._step_value) > self._max_motor_value
+        # Are we near the limits of max speed - would a step forward pass it
+        forward_limit     = self._config.forward_limit
+        near_limit_left   = self._current_motor_left_value > forward_limit
+        near_limit_right  = self._current_motor_right_value > forward_limit
         near_limits      =  near_limit_left or near_limit_right
 
         if self._is_spinning():
@@ -411,12 +772,14 @@ class InputHandler(object):
         :return:
         """
 
-        self._logger.info("Entering")
+        if self._trace:
+            self._logger.info("Entering")
 
         #####################################
-        # Are we near the limits of max speed
-        near_limit_left     = (self._current_motor_left_value  - self._step_value) < (self._max_motor_value * -1)
-        near_limit_right    = (self._current_motor_right_value - self._step_value) < (self._max_motor_value * -1)
+        # Are we near the limits of max speed - would a step back pass it
+        back_limit          = self._config.back_limit
+        near_limit_left     = self._current_motor_left_value  < back_limit
+        near_limit_right    = self._current_motor_right_value < back_limit
         near_limits         = near_limit_left or near_limit_right
 
         if self._is_spinning():
@@ -0,0 +1,215 @@
+__author__ = 'Paul Pearce'
+
+import configparser
+
+import skid_steering.InputHandler as IH
+import skid_steering.TransitionTable as TT
+
+################################################################
+# The logical movement key of each action name used in key map profiles
+ACTIONS = {
+    "stop":     IH.STOP,
+    "left":     IH.LEFT,
+    "right":    IH.RIGHT,
+    "forward":  IH.FORWARD,
+    "back":     IH.BACK,
+}
+
+# The largest raw code a profile may map, so the dispatch array stays small (Linux key codes are below 0x300)
+MAX_CODE = 0xFFFF
+
+
+class UnknownKeyError(IH.InvalidInputError):
+    def __init__(self, code, profile):
+        """
+        Constructor - a raw code is not mapped by a key map profile. The message is only built if it is asked for.
+        :param code: The raw code
+        :param profile: The name of the profile
+        :return:
+        """
+        IH.InvalidInputError.__init__(self, code, profile)
+
+        self.code       =   code
+        self.profile    =   profile
+
+    def __str__(self):
+        return "Unknown key: " + "[" + str(self.code) + "] in profile " + "[" + str(self.profile) + "]"
+
+
+class KeyMap(object):
+    def __init__(self, name, codes):
+        """
+        Constructor - a device profile mapping raw key codes (bytes, input event codes, gamepad buttons) to logical
+        movement keys, compiled into a dense array indexed by raw code so a lookup is a single index.
+        :param name: The name of the profile
+        :param codes: Raw code -> logical movement key value
+        :return:
+
+        Example wasd = KeyMap("wasd", {ord('w'): IH.FORWARD, ord('a'): IH.LEFT, ord('s'): IH.BACK,
+                                       ord('d'): IH.RIGHT, ord(' '): IH.STOP})
+                ih.move(wasd.lookup(raw_code))
+        """
+        for code, key in codes.items():
+            if not isinstance(code, int) or not 0 <= code <= MAX_CODE:
+                raise Exception("Raw code must be 0 .. " + str(MAX_CODE) + ": " + "[" + str(code) + "] in profile " +
+                                "[" + str(name) + "]")
+
+            if key not in IH.KEYS:
+                raise IH.InvalidInputError("Invalid input: " + "[" + str(key) + "] for raw code " +
+                                           "[" + str(code) + "] in profile " + "[" + str(name) + "]")
+
+        self.name   =   name
+        self.codes  =   dict(codes)
+
+        # Raw code -> logical movement key, and the table column (TransitionTable.KEY_SLOTS) of the key, None where
+        # unmapped
+        self.keys   =   [None] * (max(codes, default=-1) + 1)
+        self.slots  =   [None] * len(self.keys)
+
+        for code, key in codes.items():
+            self.keys[code]     =   key
+            self.slots[code]    =   TT.KEY_SLOTS[key]
+
+    def get(self, code):
+        """
+
+        :param code: A raw code
+        :return: Its logical movement key, or None if it is not mapped
+        """
+        keys = self.keys
+
+        if type(code) is int and 0 <= code < len(keys):
+            return keys[code]
+
+        return None
+
+    def lookup(self, code):
+        """
+
+        :param code: A raw code
+        :return: Its logical movement key, UnknownKeyError is raised if it is not mapped
+        """
+        key = self.get(code)
+
+        if key is None:
+            raise UnknownKeyError(code, self.name)
+
+        return key
+
+    def move(self, handler, code):
+        """
+        Move a handler for a raw code, see bind() to move the same handler for many
+        :param handler: The InputHandler
+        :param code: A raw code, UnknownKeyError is raised if it is not mapped (and the handler is not moved)
+        :return: As for InputHandler.move()
+        """
+        keys = self.keys
+
+        if type(code) is int and 0 <= code < len(keys):
+            key = keys[code]
+
+            if key is not None:
+                return handler.move(key)
+
+        raise UnknownKeyError(code, self.name)
+
+    def bind(self, handler):
+        """
+        Compile the profile for one handler - a TransitionTable.TableInputHandler (that does not override move()) is
+        moved by the table column of each raw code, so a raw code reaches its transition in a single lookup, any other
+        handler by the logical key.
+        :param handler: The InputHandler
+        :return: A function of a raw code, that moves the handler as move() does
+        """
+        if type(handler).move is TT.TableInputHandler.move:
+            targets, move_target = self.slots, handler.move_slot
+        else:
+            targets, move_target = self.keys, handler.move
+
+        name    =   self.name
+        size    =   len(targets)
+
+        def move(code):
+            if type(code) is int and 0 <= code < size:
+                target = targets[code]
+
+                if target is not None:
+                    return move_target(target)
+
+            raise UnknownKeyError(code, name)
+
+        return move
+
+    def __len__(self):
+        """
+
+        :return: The number of raw codes mapped
+        """
+        return len(self.codes)
+
+
+def _parse_code(text):
+    """
+
+    :param text: A quoted character ('w') or an integer (decimal, or 0x hex)
+    :return: The raw code
+    """
+    if len(text) == 3 and text[0] == text[2] and text[0] in "'\"":
+        return ord(text[1])
+
+    return int(text, 0)
+
+
+def load_profiles(source):
+    """
+    Load key map profiles from an INI file, one section per profile, each option an action with a comma separated list
+    of the raw codes for it.
+    :param source: A path, an open file, or a configparser.ConfigParser already read
+    :return: Profile name -> KeyMap
+
+    Example [wasd]
+            forward = 'w', 'W'
+            left    = 'a'
+            back    = 's'
+            right   = 'd'
+            stop    = ' '
+
+            [gamepad]
+            forward = 0x220
+            ...
+    """
+    if isinstance(source, configparser.ConfigParser):
+        parser = source
+    else:
+        parser = configparser.ConfigParser()
+
+        if hasattr(source, "read"):
+            parser.read_file(source)
+        elif not parser.read(source):
+            raise Exception("Key map file [" + str(source) + "] cannot be read")
+
+    profiles = {}
+
+    for name in parser.sections():
+        codes = {}
+
+        for action, value in parser.items(name):
+            if action not in ACTIONS:
+                raise Exception("Unknown action: " + "[" + action + "] in profile " + "[" + name + "]")
+
+            for text in value.split(","):
+                text = text.strip()
+
+                try:
+                    code = _parse_code(text)
+                except ValueError:
+                    raise Exception("Invalid raw code: " + "[" + text + "] in profile " + "[" + name + "]")
+
+                if codes.get(code, ACTIONS[action]) != ACTIONS[action]:
+                    raise Exception("Raw code [" + text + "] has two actions in profile " + "[" + name + "]")
+
+                codes[code] = ACTIONS[action]
+
+        profiles[name] = KeyMap(name, codes)
+
+    return profiles
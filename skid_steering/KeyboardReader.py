@@ -0,0 +1,220 @@
+__author__ = 'Paul Pearce'
+
+import abc
+import asyncio
+import logging
+import os
+import struct
+import time
+
+import skid_steering.InputHandler as IH
+from skid_steering.KeyMap import KeyMap
+from skid_steering.Statistics import LatencyStatistics
+
+################################################################
+# The characters of the numeric keypad keys, as read from a terminal, serial console or pipe
+CHARACTER_KEYS = {
+    ord('5'):   IH.STOP,
+    ord('4'):   IH.LEFT,
+    ord('6'):   IH.RIGHT,
+    ord('8'):   IH.FORWARD,
+    ord('2'):   IH.BACK,
+}
+
+################################################################
+# The Linux input event codes of the numeric keypad keys (linux/input-event-codes.h)
+KEY_KP8     =   72
+KEY_KP4     =   75
+KEY_KP5     =   76
+KEY_KP6     =   77
+KEY_KP2     =   80
+
+INPUT_EVENT_KEYS = {
+    KEY_KP5:    IH.STOP,
+    KEY_KP4:    IH.LEFT,
+    KEY_KP6:    IH.RIGHT,
+    KEY_KP8:    IH.FORWARD,
+    KEY_KP2:    IH.BACK,
+}
+
+EV_KEY          =   1
+KEY_PRESSED     =   1
+KEY_REPEATED    =   2
+
+# struct input_event - struct timeval time; __u16 type; __u16 code; __s32 value;
+INPUT_EVENT     =   struct.Struct("llHHi")
+
+
+class KeyboardReader(abc.ABC):
+    def __init__(self, handler, fd, keys, loop=None, clock=time.perf_counter):
+        """
+        Constructor - read raw key events from a file descriptor without blocking the event loop, and move the
+        InputHandler for each. Sub-classes implement _decode(data) for the format read.
+        :param handler: The InputHandler to move
+        :param fd: The file descriptor to read, it is made non-blocking
+        :param keys: A KeyMap.KeyMap (or a dict of raw key code -> logical movement key value), raw codes it does not
+        map are ignored
+        :param loop: The asyncio event loop to read in, defaults to the running loop when started
+        :param clock: Seconds, used to measure the latency from reading an event to the handler having moved
+        :return:
+
+        The latency of a key is measured from the read() that returned it - one timestamp per read, not per key (a pipe
+        or terminal gives none, and an input event's time is on the kernel's wall clock), so for keys read together it
+        includes the moves of those before it in the same read. It is the time a key waited in this process, not the
+        time since it was typed.
+        """
+        self._logger    =   logging.getLogger("SkidSteering.KeyboardReader")
+
+        self._handler   =   handler
+        self._fd        =   fd
+        self._keys      =   keys if isinstance(keys, KeyMap) else KeyMap(type(self).__name__, keys)
+        self._loop      =   loop
+        self._clock     =   clock
+
+        self._buffer    =   b""
+        self._closed    =   None
+
+        self._key_listeners = ()
+
+        self.latency    =   LatencyStatistics()
+        self.ignored    =   0
+        self.errors     =   0
+
+    def start(self):
+        """
+        Start reading, the handler is moved from within the event loop as events arrive
+        :return:
+        """
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+
+        self._closed = self._loop.create_future()
+
+        os.set_blocking(self._fd, False)
+        self._loop.add_reader(self._fd, self._on_readable)
+
+    def stop(self):
+        """
+        Stop reading, the file descriptor is left open
+        :return:
+        """
+        if self._closed is not None and not self._closed.done():
+            self._loop.remove_reader(self._fd)
+            self._closed.set_result(None)
+
+    async def run(self):
+        """
+        Read until the end of the input, or stop() is called
+        :return:
+        """
+        self.start()
+
+        await self._closed
+
+    def add_key_listener(self, listener):
+        """
+        Call a listener for every mapped key read, before the handler is moved - e.g. Watchdog, so a key counts as
+        input even if moving for it fails.
+        :param listener: Called with (logical movement key value)
+        :return:
+        """
+        self._key_listeners = self._key_listeners + (listener,)
+
+    def remove_key_listener(self, listener):
+        """
+        Stop calling a listener for every mapped key read
+        :param listener: A listener added with add_key_listener()
+        :return:
+        """
+        listeners = list(self._key_listeners)
+        listeners.remove(listener)
+
+        self._key_listeners = tuple(listeners)
+
+    def _on_readable(self):
+        try:
+            data = os.read(self._fd, 4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            # e.g. EIO when the other end of a pty has gone away
+            self._logger.exception("Reading")
+            data = b""
+
+        if not data:
+            self.stop()
+            return
+
+        read_at = self._clock()
+
+        self._buffer, raw_keys = self._decode(self._buffer + data)
+
+        # Raw codes are never negative
+        keys = self._keys.keys
+
+        for raw_key in raw_keys:
+            key = keys[raw_key] if raw_key < len(keys) else None
+
+            if key is None:
+                self.ignored += 1
+                continue
+
+            for listener in self._key_listeners:
+                listener(key)
+
+            try:
+                self._handler.move(key)
+            except Exception:
+                self.errors += 1
+                self._logger.exception("Moving for raw key: " + "[" + str(raw_key) + "]")
+
+            self.latency.record(self._clock() - read_at)
+
+    @abc.abstractmethod
+    def _decode(self, data):
+        """
+        Split the data read into raw key codes
+        :param data: The bytes read (after any left over from the last read)
+        :return: (left over bytes, raw key codes)
+        """
+
+
+class CharacterKeyboardReader(KeyboardReader):
+    def __init__(self, handler, fd, keys=CHARACTER_KEYS, loop=None, clock=time.perf_counter):
+        """
+        Constructor - each byte read is a raw key, e.g. from a terminal in raw mode, a serial console or a pipe.
+        :param handler: As for KeyboardReader
+        :param fd: As for KeyboardReader
+        :param keys: A KeyMap.KeyMap (or dict) of byte value -> logical movement key value
+        :param loop: As for KeyboardReader
+        :param clock: As for KeyboardReader
+        :return:
+        """
+        KeyboardReader.__init__(self, handler, fd, keys, loop, clock)
+
+    def _decode(self, data):
+        return b"", data
+
+
+class InputEventKeyboardReader(KeyboardReader):
+    def __init__(self, handler, fd, keys=INPUT_EVENT_KEYS, loop=None, clock=time.perf_counter):
+        """
+        Constructor - read a Linux input event device (/dev/input/eventN), key presses and auto repeats are raw keys.
+        :param handler: As for KeyboardReader
+        :param fd: As for KeyboardReader
+        :param keys: A KeyMap.KeyMap (or dict) of input event key code -> logical movement key value
+        :param loop: As for KeyboardReader
+        :param clock: As for KeyboardReader
+        :return:
+        """
+        KeyboardReader.__init__(self, handler, fd, keys, loop, clock)
+
+    def _decode(self, data):
+        complete    =   len(data) - len(data) % INPUT_EVENT.size
+        raw_keys    =   []
+
+        for seconds, microseconds, type, code, value in INPUT_EVENT.iter_unpack(data[:complete]):
+            if type == EV_KEY and (value == KEY_PRESSED or value == KEY_REPEATED):
+                raw_keys.append(code)
+
+        return data[complete:], raw_keys
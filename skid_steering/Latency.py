@@ -0,0 +1,197 @@
+__author__ = 'Paul Pearce'
+
+import json
+import socket
+import time
+
+import skid_steering.InputHandler as IH
+from skid_steering.Statistics import LatencyHistogram
+
+################################################################
+# The branches of the steering logic a move is timed under, from the motor values before and after it
+#
+# spin      LEFT or RIGHT when stopped or spinning, FORWARD or BACK when spinning (which stops)
+# turn      LEFT or RIGHT when moving, FORWARD or BACK when turning (which straightens up)
+# straight  FORWARD or BACK when stopped or going straight
+# limit     Any key that left the motor values as they were (e.g. FORWARD at full speed)
+# stop      STOP
+SPIN        =   "spin"
+TURN        =   "turn"
+STRAIGHT    =   "straight"
+LIMIT       =   "limit"
+STOP        =   "stop"
+
+BRANCHES    =   (SPIN, TURN, STRAIGHT, LIMIT, STOP)
+
+KEY_NAMES   =   {IH.STOP: "stop", IH.LEFT: "left", IH.RIGHT: "right", IH.FORWARD: "forward", IH.BACK: "back"}
+
+
+def branch(input, left, right, next_left, next_right):
+    """
+
+    :param input: A logical movement key value
+    :param left: The left motor value before the move
+    :param right: The right motor value before the move
+    :param next_left: The left motor value after the move
+    :param next_right: The right motor value after the move
+    :return: One of BRANCHES
+    """
+    if input == IH.STOP:
+        return STOP
+
+    if left == next_left and right == next_right:
+        return LIMIT
+
+    if input == IH.LEFT or input == IH.RIGHT:
+        return SPIN if left + right == 0 else TURN
+
+    if left == right:
+        return STRAIGHT
+
+    return SPIN if left + right == 0 else TURN
+
+
+class MoveLatency(object):
+    def __init__(self, clock=time.perf_counter_ns):
+        """
+        Constructor - histograms of the time InputHandler.move() takes, per logical key and per branch of the steering
+        logic (see BRANCHES).
+        :param clock: Integer nanoseconds
+        :return:
+
+        Example latency = MoveLatency()
+                ih.set_move_latency(latency)
+                ...
+                print(latency.snapshot())
+
+        With no MoveLatency set a move costs one extra attribute test. Moves that raise are not timed.
+        """
+        self._clock = clock
+
+        self.keys       =   dict((key, LatencyHistogram()) for key in IH.KEYS)
+        self.branches   =   dict((name, LatencyHistogram()) for name in BRANCHES)
+
+    def move(self, handler, input):
+        """
+        Time a move, called by the handler's move()
+        :param handler: The InputHandler
+        :param input: A logical movement key value
+        :return: As for InputHandler.move()
+        """
+        left    =   handler._current_motor_left_value
+        right   =   handler._current_motor_right_value
+        clock   =   self._clock
+
+        handler._latency = None
+
+        try:
+            start   =   clock()
+            state   =   handler.move(input)
+            elapsed =   clock() - start
+        finally:
+            handler._latency = self
+
+        self.keys[input].record(elapsed)
+        self.branches[branch(input, left, right, state[0], state[1])].record(elapsed)
+
+        return state
+
+    def snapshot(self):
+        """
+
+        :return: {"keys": {key name: histogram}, "branches": {branch: histogram}}, each histogram a
+        Statistics.LatencyHistogram snapshot
+        """
+        return {
+            "keys":     dict((KEY_NAMES[key], histogram.snapshot()) for key, histogram in self.keys.items()),
+            "branches": dict((name, histogram.snapshot()) for name, histogram in self.branches.items()),
+        }
+
+    def reset(self):
+        """
+        Forget everything recorded
+        :return:
+        """
+        for histogram in list(self.keys.values()) + list(self.branches.values()):
+            histogram.reset()
+
+    def __str__(self):
+        lines = []
+
+        for key, histogram in self.keys.items():
+            lines.append("%-8s %s" % (KEY_NAMES[key], histogram))
+
+        for name, histogram in self.branches.items():
+            lines.append("%-8s %s" % (name, histogram))
+
+        return "\n".join(lines)
+
+
+class LatencyExporter(object):
+    def __init__(self, latency, path=None, address=None, reset=True, clock=time.time):
+        """
+        Constructor - write MoveLatency snapshots, one JSON object per line to a file, or one per datagram to a UDP
+        socket, for watching the latency on the vehicle.
+        :param latency: The MoveLatency
+        :param path: A file to append to
+        :param address: A (host, port) to send to
+        :param reset: Reset the histograms after each export, so each is of the moves since the last
+        :param clock: Seconds, the time exported with each snapshot
+        :return:
+
+        Example exporter = LatencyExporter(latency, address=("127.0.0.1", 9999))
+                TickScheduler(1.0).run(exporter.export)
+        """
+        if (path is None) == (address is None):
+            raise Exception("One of path or address must be given")
+
+        self._latency   =   latency
+        self._reset     =   reset
+        self._clock     =   clock
+
+        self._file      =   open(path, "a") if path is not None else None
+        self._socket    =   None
+        self._address   =   address
+
+        if address is not None:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        self.exports = 0
+
+    def export(self, now=None):
+        """
+        Export a snapshot
+        :param now: Unused, for Scheduler.TickScheduler
+        :return:
+        """
+        snapshot = self._latency.snapshot()
+
+        if self._reset:
+            self._latency.reset()
+
+        snapshot["time"] = self._clock()
+
+        line = json.dumps(snapshot, sort_keys=True)
+
+        if self._file is not None:
+            self._file.write(line + "\n")
+            self._file.flush()
+        else:
+            try:
+                self._socket.sendto(line.encode("utf-8"), self._address)
+            except OSError:
+                # Nobody listening, or the network is down - the vehicle carries on
+                pass
+
+        self.exports += 1
+
+    def close(self):
+        """
+        Close the file or socket
+        :return:
+        """
+        if self._file is not None:
+            self._file.close()
+
+        if self._socket is not None:
+            self._socket.close()
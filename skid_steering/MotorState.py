@@ -0,0 +1,54 @@
+__author__ = 'Paul Pearce'
+
+from collections import namedtuple
+
+################################################################
+# The most motor states kept by motor_state(), beyond this new
+# states are still returned but not kept
+INTERN_LIMIT = 1 << 16
+
+
+class MotorState(namedtuple("MotorState", ["left", "right"])):
+    """
+    An immutable pair of (logical) motor values, compares equal to the (left, right) tuple.
+    """
+    __slots__ = ()
+
+
+# left -> right -> MotorState, nested so a lookup does not need to build a (left, right) key
+_interned       =   {}
+_interned_count =   0
+
+
+def motor_state(left, right):
+    """
+    The MotorState of a pair of motor values, the same object is returned each time for the same int values (up to
+    INTERN_LIMIT different pairs), so moving between already seen states allocates nothing. Other values (e.g. floats,
+    which compare equal to ints) get a new MotorState each time, so it keeps their type.
+    :param left: The left motor value
+    :param right: The right motor value
+    :return: A MotorState
+    """
+    global _interned_count
+
+    if type(left) is not int or type(right) is not int:
+        return MotorState(left, right)
+
+    rights = _interned.get(left)
+
+    if rights is not None:
+        state = rights.get(right)
+
+        if state is not None:
+            return state
+
+    state = MotorState(left, right)
+
+    if _interned_count < INTERN_LIMIT:
+        if rights is None:
+            rights = _interned[left] = {}
+
+        rights[right] = state
+        _interned_count += 1
+
+    return state
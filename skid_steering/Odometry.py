@@ -0,0 +1,210 @@
+__author__ = 'Paul Pearce'
+
+import math
+import time
+from array import array
+from collections import namedtuple
+
+from skid_steering.OutputSink import OutputSink
+
+# Metres (or whatever unit the wheel base is given in), and radians anticlockwise from the x axis
+Pose = namedtuple("Pose", ["x", "y", "heading"])
+
+
+def _sinc(angle):
+    return math.sin(angle) / angle if angle else 1.0
+
+
+def _numpy_sinc(numpy):
+    # numpy.sinc(x) is sin(pi x) / (pi x)
+    return lambda angle: numpy.sinc(angle / numpy.pi)
+
+
+def arc(heading, speed, turn_rate, seconds, sin=math.sin, cos=math.cos, sinc=_sinc):
+    """
+    The movement of a differential drive vehicle at a constant speed and turn rate - an arc of a circle, or a straight
+    line when not turning. Written with the functions as parameters so that the same arithmetic works on floats and on
+    NumPy arrays.
+    :param heading: Radians at the start
+    :param speed: Forward speed, distance per second
+    :param turn_rate: Radians per second, anticlockwise
+    :param seconds: How long for
+    :param sin: math.sin or numpy.sin
+    :param cos: math.cos or numpy.cos
+    :param sinc: sin(a) / a, 1 at 0
+    :return: (change in x, change in y, change in heading)
+
+    The chord of the arc has length speed * seconds * sinc(half the turn) and points along the heading half way round
+    the turn, which has no division by the turn rate so needs no special case for going straight.
+    """
+    half_turn   =   turn_rate * seconds * 0.5
+    chord       =   speed * seconds * sinc(half_turn)
+    middle      =   heading + half_turn
+
+    return chord * cos(middle), chord * sin(middle), half_turn * 2.0
+
+
+def speeds(left, right, wheel_base, scale):
+    """
+
+    :return: (forward speed, turn rate) of the vehicle for a pair of motor values (or arrays of them)
+    """
+    left_speed  =   left * scale
+    right_speed =   right * scale
+
+    return (left_speed + right_speed) * 0.5, (right_speed - left_speed) / wheel_base
+
+
+class Odometry(OutputSink):
+    def __init__(self, wheel_base, scale, clock=time.monotonic, pose=Pose(0.0, 0.0, 0.0)):
+        """
+        Constructor - dead reckoning of the vehicle's pose from the motor values, as an output sink of an InputHandler
+        so it is told each time they change. The motor values are taken to hold until the next change.
+        :param wheel_base: The distance between the left and right tracks
+        :param scale: Track speed (wheel base units per second) per motor value unit
+        :param clock: Seconds
+        :param pose: The starting Pose
+        :return:
+
+        Example odometry = Odometry(0.2, 0.5 / 100)     # Tracks 20cm apart, 0.5m/s at motor value 100
+                ih.add_output_sink(odometry)
+                ...
+                x, y, heading = odometry.pose()
+        """
+        OutputSink.__init__(self, clock=clock)
+
+        if wheel_base <= 0:
+            raise Exception("wheel base must be > 0")
+
+        self.wheel_base =   wheel_base
+        self.scale      =   scale
+
+        self.reset(pose)
+
+    def reset(self, pose=Pose(0.0, 0.0, 0.0)):
+        """
+        Set the pose, e.g. from a position fix
+        :param pose: The Pose now
+        :return:
+        """
+        self._x, self._y, self._heading = pose
+
+        self._since     =   self._clock()
+        self._speed     =   0.0
+        self._turn_rate =   0.0
+
+    def write(self, left, right):
+        """
+        The motor values have changed
+        :param left: The left motor value
+        :param right: The right motor value
+        :return:
+        """
+        self._advance(self._clock())
+
+        self._speed, self._turn_rate = speeds(left, right, self.wheel_base, self.scale)
+
+    def pose(self, now=None):
+        """
+
+        :param now: The time, defaults to the clock
+        :return: The Pose at the time
+        """
+        self._advance(self._clock() if now is None else now)
+
+        return Pose(self._x, self._y, self._heading)
+
+    def _advance(self, now):
+        dx, dy, turned = arc(self._heading, self._speed, self._turn_rate, now - self._since)
+
+        self._x         +=  dx
+        self._y         +=  dy
+        self._heading   +=  turned
+        self._since     =   now
+
+
+def integrate(times, lefts, rights, wheel_base, scale, pose=Pose(0.0, 0.0, 0.0), use_numpy=None):
+    """
+    Dead reckoning over a recorded trajectory, e.g. the time, left and right fields of a SessionLog.SessionReader,
+    with the same arithmetic as Odometry.
+    :param times: Seconds, when each pair of motor values was set (ascending)
+    :param lefts: The left motor values
+    :param rights: The right motor values
+    :param wheel_base: As for Odometry
+    :param scale: As for Odometry
+    :param pose: The Pose at the first time
+    :param use_numpy: True to use NumPy, False not to, None to use it if it is installed
+    :return: (x, y, heading) - the pose at each time, before the motor values set then are applied. NumPy arrays when
+    NumPy is used, else arrays ('d' typecode)
+
+    NumPy works out every arc at once, so millions of samples take a fraction of a second. Without it each is worked
+    out in turn, as Odometry does.
+    """
+    numpy = None
+
+    if use_numpy is not False:
+        try:
+            import numpy
+        except ImportError:
+            if use_numpy:
+                raise
+
+    if numpy is not None:
+        return _integrate_numpy(numpy, times, lefts, rights, wheel_base, scale, pose)
+
+    xs          =   array('d', [0.0]) * len(times)
+    ys          =   array('d', [0.0]) * len(times)
+    headings    =   array('d', [0.0]) * len(times)
+
+    x, y, heading = pose
+
+    for index in range(len(times)):
+        xs[index]       =   x
+        ys[index]       =   y
+        headings[index] =   heading
+
+        if index + 1 < len(times):
+            speed, turn_rate    =   speeds(lefts[index], rights[index], wheel_base, scale)
+            dx, dy, turned      =   arc(heading, speed, turn_rate, times[index + 1] - times[index])
+
+            x       +=  dx
+            y       +=  dy
+            heading +=  turned
+
+    return xs, ys, headings
+
+
+def _integrate_numpy(numpy, times, lefts, rights, wheel_base, scale, pose):
+    times   =   numpy.asarray(times, dtype=numpy.float64)
+
+    if len(times) == 0:
+        return numpy.empty(0), numpy.empty(0), numpy.empty(0)
+
+    lefts   =   numpy.asarray(lefts, dtype=numpy.float64)[:-1]
+    rights  =   numpy.asarray(rights, dtype=numpy.float64)[:-1]
+
+    x, y, heading = pose
+
+    speed, turn_rate    =   speeds(lefts, rights, wheel_base, scale)
+    seconds             =   numpy.diff(times)
+
+    # The heading at the start of each arc is the sum of the turns before it
+    turned          =   turn_rate * seconds
+    headings        =   numpy.empty(len(times))
+    headings[0]     =   heading
+    numpy.cumsum(turned, out=headings[1:])
+    headings[1:]    +=  heading
+
+    dx, dy, turned = arc(headings[:-1], speed, turn_rate, seconds, numpy.sin, numpy.cos, _numpy_sinc(numpy))
+
+    xs      =   numpy.empty(len(times))
+    ys      =   numpy.empty(len(times))
+    xs[0]   =   x
+    ys[0]   =   y
+
+    numpy.cumsum(dx, out=xs[1:])
+    numpy.cumsum(dy, out=ys[1:])
+    xs[1:]  +=  x
+    ys[1:]  +=  y
+
+    return xs, ys, headings
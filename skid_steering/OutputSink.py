@@ -0,0 +1,186 @@
+__author__ = 'Paul Pearce'
+
+import abc
+import time
+
+
+class OutputSink(abc.ABC):
+    def __init__(self, max_rate=None, clock=time.monotonic):
+        """
+        Constructor - somewhere to write the pair of motor values to (e.g. a motor driver), attached to an InputHandler
+        with add_output_sink().
+        :param max_rate: The most writes per second, None for no limit
+        :param clock: Seconds, used for the rate limit
+        :return:
+
+        A pair of values the same as the last written is not written again. While rate limited, only the latest pair
+        is kept, and it is written by the next publish() or poll() once the rate allows - so that the last pair (e.g. a
+        STOP) is never left unwritten, either poll() from a tick loop (ControlLoop does) or start() the sink in an
+        asyncio event loop, which sets a timer for when the rate allows.
+
+        Sub-classes implement write(left, right).
+        """
+        self._min_interval      =   1.0 / max_rate if max_rate else 0.0
+        self._clock             =   clock
+
+        self._last              =   None
+        self._pending           =   None
+        self._written_at        =   None
+
+        self._loop              =   None
+        self._timer             =   None
+
+        self.writes                 =   0
+        self.suppressed_unchanged   =   0
+        self.suppressed_rate        =   0
+
+    def publish(self, left, right):
+        """
+        Offer a pair of motor values to be written
+        :param left: The left motor value
+        :param right: The right motor value
+        :return:
+        """
+        values = (left, right)
+
+        if values == self._last:
+            if self._pending is not None:
+                # Back to what was written, so what was pending need never be written
+                self._pending = None
+                self.suppressed_rate += 1
+            else:
+                self.suppressed_unchanged += 1
+
+            return
+
+        if self._min_interval:
+            now = self._clock()
+
+            if self._written_at is not None and now - self._written_at < self._min_interval:
+                if self._pending is not None and self._pending != values:
+                    self.suppressed_rate += 1
+
+                self._pending = values
+
+                if self._loop is not None and self._timer is None:
+                    self._schedule(now)
+
+                return
+
+            self._written_at = now
+
+        if self._pending is not None:
+            # Superseded by this pair
+            self._pending = None
+            self.suppressed_rate += 1
+
+        self._write(values)
+
+    def poll(self):
+        """
+        Write the pair of motor values held back by the rate limit, if the rate now allows
+        :return: True if a pair was written
+        """
+        if self._pending is None:
+            return False
+
+        now = self._clock()
+        if now - self._written_at < self._min_interval:
+            return False
+
+        values              =   self._pending
+        self._pending       =   None
+        self._written_at    =   now
+        self._write(values)
+
+        return True
+
+    def start(self, loop):
+        """
+        Write the pair held back by the rate limit from an asyncio event loop, as soon as the rate allows
+        :param loop: The event loop
+        :return:
+        """
+        self.close()
+
+        self._loop = loop
+
+        if self._pending is not None:
+            self._schedule(self._clock())
+
+    def close(self):
+        """
+        Stop writing from the event loop
+        :return:
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        self._loop = None
+
+    def _schedule(self, now):
+        self._timer = self._loop.call_later(max(0.0, self._written_at + self._min_interval - now), self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+
+        if not self.poll() and self._pending is not None and self._loop is not None:
+            # Woken early
+            self._schedule(self._clock())
+
+    def pending(self):
+        """
+
+        :return: The (left, right) pair held back by the rate limit, or None
+        """
+        return self._pending
+
+    @abc.abstractmethod
+    def write(self, left, right):
+        """
+        Write both motor values to the output
+        :param left: The left motor value
+        :param right: The right motor value
+        :return:
+        """
+
+    def _write(self, values):
+        self._last      =   values
+        self.writes     +=  1
+
+        self.write(values[0], values[1])
+
+
+class MemorySink(OutputSink):
+    def __init__(self, max_rate=None, clock=time.monotonic):
+        """
+        Constructor - a stand in motor driver that keeps every pair written, for testing.
+        :param max_rate: As for OutputSink
+        :param clock: As for OutputSink
+        :return:
+        """
+        OutputSink.__init__(self, max_rate, clock)
+
+        self.written = []
+
+    def write(self, left, right):
+        self.written.append((left, right))
+
+
+class FileSink(OutputSink):
+    def __init__(self, file, max_rate=None, clock=time.monotonic):
+        """
+        Constructor - a stand in motor driver that writes each pair as a line "left right" to a file.
+        :param file: A file object open for writing text (e.g. a named pipe or a device accepting lines)
+        :param max_rate: As for OutputSink
+        :param clock: As for OutputSink
+        :return:
+        """
+        OutputSink.__init__(self, max_rate, clock)
+
+        self._file = file
+
+    def write(self, left, right):
+        self._file.write(str(left) + " " + str(right) + "\n")
+        self._file.flush()
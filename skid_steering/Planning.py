@@ -0,0 +1,291 @@
+__author__ = 'Paul Pearce'
+
+from array import array
+from collections import OrderedDict, deque, namedtuple
+
+import skid_steering.InputHandler as IH
+import skid_steering.TransitionTable as TT
+
+################################################################
+# KeyPlanner memory bounds, unless given
+#
+# MAX_STATES    the most motor states a configuration may have, as its transition table is built in full - with the
+#               default, max_motor_value / step_value up to 511, so (0, 1000, 2) but not (0, 65535, 1)
+# INDEX_MEMORY  bytes of per target indexes to keep, the least recently used are dropped to make room
+MAX_STATES      =   1 << 20
+INDEX_MEMORY    =   64 << 20
+
+# A key sequence, the motor state it ends in, and whether that is the target asked for (else the nearest to it)
+Plan = namedtuple("Plan", ["keys", "state", "exact"])
+
+# In a per target index, the next key slot of a state already at the target, and of a state that cannot get there
+_ARRIVED        =   len(TT.KEYS)
+_UNREACHABLE    =   -1
+
+
+def evaluate(handler, candidates):
+    """
+    Try candidate key sequences, each from the handler's current state, without moving the handler.
+    :param handler: An InputHandler (or subclass) in the state to plan from
+    :param candidates: An iterable of key sequences
+    :return: A list with, for each candidate, the MotorState.MotorState after its keys, or None if it has an invalid
+    key or the steering logic raised
+
+    Example states = evaluate(ih, [[IH.FORWARD] * 3, [IH.LEFT, IH.FORWARD], [IH.BACK]])
+
+    The candidates are run on one fork() of the handler (without logging), restored to the starting snapshot for each,
+    so thousands cost no more than the moves themselves. A table driven handler's candidates are walked through its
+    transition table directly.
+    """
+    if isinstance(handler, TT.TableInputHandler):
+        return _evaluate_table(handler._table, handler._state, candidates)
+
+    fork    =   handler.fork(IH.INSTRUMENTATION_OFF)
+    start   =   fork.snapshot()
+    move    =   fork.move
+    results =   []
+
+    for candidate in candidates:
+        fork.restore(start)
+
+        try:
+            for key in candidate:
+                move(key)
+        except Exception:
+            results.append(None)
+            continue
+
+        results.append(fork.snapshot())
+
+    return results
+
+
+def _evaluate_table(table, start, candidates):
+    next    =   table.next
+    states  =   table.states
+    slots   =   TT.KEY_SLOTS
+    keys    =   len(TT.KEYS)
+    results =   []
+
+    for candidate in candidates:
+        state = start
+
+        try:
+            for key in candidate:
+                state = next[state * keys + slots[key]]
+
+                if state < 0:
+                    break
+        except (KeyError, TypeError):
+            state = -1
+
+        results.append(states[state] if state >= 0 else None)
+
+    return results
+
+
+def best(handler, candidates, cost):
+    """
+    The cheapest of a set of candidate key sequences, each tried from the handler's current state (see evaluate())
+    :param handler: An InputHandler (or subclass) in the state to plan from
+    :param candidates: An iterable of key sequences
+    :param cost: Called with (candidate, MotorState.MotorState after it), lower is better
+    :return: (candidate, state, cost) of the cheapest candidate (the first of equals), or None if every candidate
+    failed
+
+    Example candidate, state, cost = best(ih, candidates, lambda keys, state: abs(state.left - 50) + len(keys))
+    """
+    candidates = list(candidates)
+
+    chosen = None
+
+    for candidate, state in zip(candidates, evaluate(handler, candidates)):
+        if state is None:
+            continue
+
+        value = cost(candidate, state)
+
+        if chosen is None or value < chosen[2]:
+            chosen = (candidate, state, value)
+
+    return chosen
+
+
+class KeyPlanner(object):
+    def __init__(self, min_motor_value, max_motor_value, step_value, table=None, max_states=MAX_STATES,
+                 index_memory=INDEX_MEMORY):
+        """
+        Constructor - the shortest key sequences between motor states of a configuration.
+        :param min_motor_value: As for InputHandler
+        :param max_motor_value: As for InputHandler
+        :param step_value: As for InputHandler
+        :param table: The TransitionTable of the configuration, defaults to the shared one
+        :param max_states: The most states the configuration may have (its grid is checked before the table is built)
+        :param index_memory: Bytes of per target indexes to keep
+        :return:
+
+        Example planner = KeyPlanner(0, 100, 20)
+                keys, state, exact = planner.plan(ih.motor_state(), (40, 60))
+
+        The first plan for a target searches back from it through the transition table (breadth first, so the key
+        sequences are the shortest), recording for every state the first key of a shortest sequence. The index is
+        kept (1 byte per state), so later plans for the target just follow it, a few microseconds. A target that is
+        not a reachable motor state is planned to whichever of the reachable states nearest to it (by the sum of the
+        differences of the motor values) is the fewest keys away. Transitions the steering logic raises on are never
+        planned.
+
+        Large grids are not supported: a configuration with more than max_states states on its grid (e.g. 0, 65535, 1
+        for 16 bit PWM, around 17 billion) raises an exception, as its table cannot be built. For those, try candidate
+        key sequences with evaluate() or best() on an Analytic.AnalyticInputHandler instead.
+        """
+        span = (2 * max_motor_value) // step_value + 1 if step_value > 0 else 0
+
+        if span * span > max_states:
+            raise Exception("Too many motor states to plan for: " + "[" + str(span * span) + "] > [" +
+                            str(max_states) + "], use evaluate() or best() with an AnalyticInputHandler")
+
+        if table is None:
+            table = TT.shared_table(min_motor_value, max_motor_value, step_value)
+        elif (table.min_motor_value, table.max_motor_value, table.step_value) != \
+                (min_motor_value, max_motor_value, step_value):
+            raise Exception("Transition table was built for a different configuration")
+
+        self.table      =   table
+        self.targets    =   max(1, index_memory // max(1, len(table)))
+
+        self._indexes   =   OrderedDict()
+
+        self.hits       =   0
+        self.misses     =   0
+
+        self._build_reverse()
+
+    def _build_reverse(self):
+        """
+        The transitions into each state, as cells of the table (state * keys + key slot), grouped by state - a counting
+        sort of the table, so two arrays however many states there are.
+        """
+        next    =   self.table.next
+        states  =   len(self.table)
+
+        starts  =   array('i', [0]) * (states + 1)
+
+        for target in next:
+            if target >= 0:
+                starts[target + 1] += 1
+
+        for state in range(states):
+            starts[state + 1] += starts[state]
+
+        cells   =   array('i', [0]) * starts[states]
+        filled  =   array('i', starts[:states])
+
+        for cell, target in enumerate(next):
+            if target >= 0:
+                cells[filled[target]] = cell
+                filled[target] += 1
+
+        self._reverse_starts    =   starts
+        self._reverse_cells     =   cells
+
+    def plan(self, start, target):
+        """
+        The shortest key sequence from one motor state to another
+        :param start: The (left, right) motor values to start from, e.g. a handler's motor_state()
+        :param target: The (left, right) motor values wanted
+        :return: A Plan - the keys, the MotorState.MotorState they end in, and whether that is the target (else it is
+        the nearest reachable state to it)
+        """
+        table   =   self.table
+        state   =   table.state_of(start[0], start[1])
+
+        if state is None:
+            raise Exception("Motor state is not reachable: " + "L/R" + str(list(start)))
+
+        first, exact = self._index(target[0], target[1])
+
+        if first[state] == _UNREACHABLE:
+            raise Exception("No key sequence reaches the target from: " + "L/R" + str(list(start)))
+
+        next    =   table.next
+        width   =   len(TT.KEYS)
+        keys    =   []
+
+        slot = first[state]
+        while slot != _ARRIVED:
+            keys.append(TT.KEYS[slot])
+            state   =   next[state * width + slot]
+            slot    =   first[state]
+
+        return Plan(keys, table.states[state], exact)
+
+    def _index(self, left, right):
+        """
+
+        :return: (the first key slot of a shortest sequence from each state to the target, whether the target is
+        reachable) - the index of the target, searched for on first use
+        """
+        key     =   (left, right)
+        indexes =   self._indexes
+        entry   =   indexes.get(key)
+
+        if entry is not None:
+            self.hits += 1
+            indexes.move_to_end(key)
+
+            return entry
+
+        self.misses += 1
+
+        table   =   self.table
+        goal    =   table.state_of(left, right)
+
+        if goal is not None:
+            goals = [goal]
+        else:
+            distances   =   [abs(state_left - left) + abs(state_right - right)
+                             for state_left, state_right in zip(table.lefts, table.rights)]
+            nearest     =   min(distances)
+            goals       =   [state for state, distance in enumerate(distances) if distance == nearest]
+
+        entry = indexes[key] = (self._search(goals), goal is not None)
+
+        while len(indexes) > self.targets:
+            indexes.popitem(last=False)
+
+        return entry
+
+    def _search(self, goals):
+        """
+        Breadth first back from the goal states
+        :return: The first key slot of a shortest sequence from each state to any of the goals (a 'b' array)
+        """
+        width   =   len(TT.KEYS)
+        starts  =   self._reverse_starts
+        cells   =   self._reverse_cells
+
+        first   =   array('b', [_UNREACHABLE]) * len(self.table)
+        queue   =   deque(goals)
+
+        for goal in goals:
+            first[goal] = _ARRIVED
+
+        while queue:
+            state = queue.popleft()
+
+            for index in range(starts[state], starts[state + 1]):
+                cell = cells[index]
+                previous = cell // width
+
+                if first[previous] == _UNREACHABLE:
+                    first[previous] = cell - previous * width
+                    queue.append(previous)
+
+        return first
+
+    def __len__(self):
+        """
+
+        :return: The number of targets indexed
+        """
+        return len(self._indexes)
@@ -0,0 +1,92 @@
+__author__ = 'Paul Pearce'
+
+from skid_steering.OutputSink import OutputSink
+
+
+class MotorRamp(OutputSink):
+    def __init__(self, output, rate, period):
+        """
+        Constructor - an output sink that treats the motor values it is given as targets, and moves the values it
+        applies to the real output towards them a little each tick, rather than jumping a whole step at once.
+        :param output: The OutputSink the applied motor values are published to (e.g. the motor driver)
+        :param rate: Motor value units per second that an applied value may change by
+        :param period: Seconds between calls of tick(), as for the Scheduler.TickScheduler driving it
+        :return:
+
+        Example ramp = MotorRamp(driver, 200, 1.0 / 200)
+                ih.add_output_sink(ramp)
+                TickScheduler(1.0 / 200).run(ramp.tick)
+
+        The change per tick is rate * period, rounded to a whole number of units (at least 1). A tick only does
+        integer arithmetic on the four values, and publishes to the output only when the applied values change.
+
+        The first pair given is applied, and published to the output, at once - the ramp starts there. add_output_sink()
+        gives it the handler's motor values, so a ramp starts at the stopped state (min_motor_value, not always 0).
+        """
+        OutputSink.__init__(self)
+
+        if rate <= 0:
+            raise Exception("rate must be > 0")
+
+        self._output    =   output
+        self._delta     =   max(1, int(round(rate * period)))
+
+        self.target_left    =   None
+        self.target_right   =   None
+        self.applied_left   =   None
+        self.applied_right  =   None
+
+    def write(self, left, right):
+        """
+        Set new target motor values
+        :param left: The target left motor value
+        :param right: The target right motor value
+        :return:
+        """
+        self.target_left    =   left
+        self.target_right   =   right
+
+        if self.applied_left is None:
+            self.applied_left   =   left
+            self.applied_right  =   right
+
+            self._output.publish(left, right)
+
+    def tick(self, now=None):
+        """
+        Move the applied motor values one tick towards the targets
+        :param now: The time of the tick (unused, for Scheduler.TickScheduler)
+        :return:
+        """
+        if self.applied_left is None:
+            # Not given any motor values yet
+            return
+
+        left    =   self.applied_left
+        right   =   self.applied_right
+        delta   =   self._delta
+
+        target  =   self.target_left
+        if left < target:
+            left = left + delta if target - left > delta else target
+        elif left > target:
+            left = left - delta if left - target > delta else target
+
+        target  =   self.target_right
+        if right < target:
+            right = right + delta if target - right > delta else target
+        elif right > target:
+            right = right - delta if right - target > delta else target
+
+        if left != self.applied_left or right != self.applied_right:
+            self.applied_left   =   left
+            self.applied_right  =   right
+
+            self._output.publish(left, right)
+
+    def settled(self):
+        """
+
+        :return: True if the applied motor values have reached the targets
+        """
+        return self.applied_left == self.target_left and self.applied_right == self.target_right
@@ -0,0 +1,99 @@
+__author__ = 'Paul Pearce'
+
+import time
+
+
+class SimulatedClock(object):
+    def __init__(self, now=0.0):
+        """
+        Constructor - a clock that only moves when slept on (or advanced), for testing schedulers.
+        :param now: The starting time in seconds
+        :return:
+        """
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class TickScheduler(object):
+    def __init__(self, period, clock=time.monotonic, sleep=time.sleep):
+        """
+        Constructor - call a function at a fixed rate. The deadline of tick n is start + n * period, so the ticks do not
+        drift however long each one takes.
+        :param period: Seconds between ticks
+        :param clock: Seconds
+        :param sleep: Sleep for a number of seconds
+        :return:
+
+        Example TickScheduler(1.0 / 200).run(ramp.tick)
+
+        A tick that overruns the next deadline does not cause a burst of catch up ticks: the next tick is made at once,
+        late, if its deadline passed less than a period ago, and the deadlines that passed more than a period ago are
+        skipped (and counted), so the schedule carries on from the latest deadline passed.
+        """
+        if period <= 0:
+            raise Exception("period must be > 0")
+
+        self.period     =   period
+        self._clock     =   clock
+        self._sleep     =   sleep
+        self._running   =   False
+
+        self.ticks      =   0
+        self.skipped    =   0
+        self.deadline   =   None        # The clock time the current (or last) tick was due
+
+    def run(self, tick, ticks=None):
+        """
+        Call tick(now) every period, until stop() is called or (if given) a number of ticks have been made
+        :param tick: Called with the clock time at the start of the tick
+        :param ticks: The number of ticks to make, None to run until stopped
+        :return:
+        """
+        clock       =   self._clock
+        sleep       =   self._sleep
+        period      =   self.period
+
+        start       =   clock()
+        deadline    =   0           # Ticks since start
+        made        =   0
+
+        self._running = True
+
+        while self._running and (ticks is None or made < ticks):
+            self.deadline = start + deadline * period
+
+            wait = self.deadline - clock()
+            if wait > 0:
+                sleep(wait)
+
+            now = clock()
+            tick(now)
+
+            made        +=  1
+            self.ticks  +=  1
+
+            deadline    +=  1
+
+            # Skip the deadlines missed by more than a whole period, the latest passed is made late
+            late = int((clock() - start) / period) - deadline
+            if late > 0:
+                deadline        +=  late
+                self.skipped    +=  late
+
+        self._running = False
+
+    def stop(self):
+        """
+        Stop run() after the current tick
+        :return:
+        """
+        self._running = False
@@ -0,0 +1,270 @@
+__author__ = 'Paul Pearce'
+
+import mmap
+import os
+import struct
+import time
+from array import array
+
+import skid_steering.InputHandler as IH
+from skid_steering.Configuration import is_integral
+
+################################################################
+# File layout, all little endian
+#
+# Header    magic (8 bytes), min_motor_value, max_motor_value, step_value (int32), 4 bytes padding
+# Records   time (float64 seconds), key (int8), 3 bytes padding, left, right (int32)
+#
+# A record is appended after every move and the records are written to the file FLUSH_RECORDS at a time, so a crash
+# loses at most that many (the last written perhaps partly). Each session (SessionWriter) starts with a BOUNDARY record
+# of the motor values the handler had when recording started, so sessions appended by a restarted process replay from
+# where they started. Moves that raise are not recorded.
+MAGIC       =   b"SKIDLOG1"
+HEADER      =   struct.Struct("<8s3i4x")
+RECORD      =   struct.Struct("<db3xii")
+
+# Records buffered before they are written to the file, unless SessionWriter is told otherwise
+FLUSH_RECORDS   =   64
+
+# The key of a session boundary record, not a logical movement key
+BOUNDARY    =   0
+
+# Records replayed per slice of the mapped file
+REPLAY_CHUNK    =   4096
+
+TIME_OFFSET     =   0
+KEY_OFFSET      =   8
+LEFT_OFFSET     =   12
+RIGHT_OFFSET    =   16
+
+
+def record_dtype():
+    """
+
+    :return: The NumPy dtype of a record, fields time, key, left and right
+    """
+    import numpy
+
+    return numpy.dtype({
+        "names":    ["time", "key", "left", "right"],
+        "formats":  ["<f8", "i1", "<i4", "<i4"],
+        "offsets":  [TIME_OFFSET, KEY_OFFSET, LEFT_OFFSET, RIGHT_OFFSET],
+        "itemsize": RECORD.size,
+    })
+
+
+class SessionWriter(object):
+    def __init__(self, path, handler, clock=time.time, flush_records=FLUSH_RECORDS):
+        """
+        Constructor - record every key the handler moves for, with the time and the resulting motor values, by
+        appending to a session log file. A boundary record of the handler's motor values is written first.
+        :param path: The file to append to, it is created (with a header) if it does not exist
+        :param handler: The InputHandler to record
+        :param clock: Seconds, the time recorded with each key
+        :param flush_records: Records buffered before writing them to the file, the most a crash loses (1 writes
+        every record as it is made)
+        :return:
+
+        Example with SessionWriter("session.log", ih):
+                    ih.move(IH.FORWARD)
+
+        Only moves that succeed are recorded (the handler's move listeners are only called for those), so a key that
+        raises - an invalid key, or the steering logic failing its consistency check - is not in the log. The motor
+        values are stored as int32, so the handler's configuration must be all C ints (not e.g. floats).
+        """
+        if not is_integral(handler._min_motor_value, handler._max_motor_value, handler._step_value):
+            raise Exception("Session logs need int motor values (a C int): " + "[" +
+                            str((handler._min_motor_value, handler._max_motor_value, handler._step_value)) + "]")
+
+        if flush_records < 1:
+            raise Exception("flush_records must be >= 1")
+
+        self._handler       =   handler
+        self._clock         =   clock
+        self._pack          =   RECORD.pack
+        self._flush_records =   flush_records
+        self._unflushed     =   0
+
+        header = HEADER.pack(MAGIC, handler._min_motor_value, handler._max_motor_value, handler._step_value)
+
+        # Large enough that the file is only written by _flush_records records
+        self._file = open(path, "ab", buffering=(flush_records + 1) * RECORD.size)
+
+        if self._file.tell() == 0:
+            self._file.write(header)
+            self._file.flush()
+        else:
+            with open(path, "rb") as existing:
+                if existing.read(HEADER.size) != header:
+                    self._file.close()
+                    raise Exception("Session log [" + str(path) + "] is for a different configuration")
+
+            # Drop any partial record left by a crash, so the records stay aligned
+            partial = (self._file.tell() - HEADER.size) % RECORD.size
+            if partial:
+                self._file.truncate(self._file.tell() - partial)
+                self._file.seek(0, os.SEEK_END)
+
+        self._file.write(self._pack(clock(), BOUNDARY, handler._current_motor_left_value,
+                                    handler._current_motor_right_value))
+        self.flush()
+
+        handler.add_move_listener(self)
+
+    def __call__(self, input, left, right):
+        self._file.write(self._pack(self._clock(), input, left, right))
+
+        self._unflushed += 1
+        if self._unflushed >= self._flush_records:
+            self.flush()
+
+    def flush(self):
+        """
+        Write any buffered records to the file
+        :return:
+        """
+        self._file.flush()
+        self._unflushed = 0
+
+    def close(self):
+        """
+        Stop recording, and close the file
+        :return:
+        """
+        if not self._file.closed:
+            self._handler.remove_move_listener(self)
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+class SessionReader(object):
+    def __init__(self, path):
+        """
+        Constructor - memory map a session log file, nothing is read into Python objects until it is asked for.
+        :param path: The session log file
+        :return:
+        """
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+
+            if size < HEADER.size:
+                raise Exception("Session log [" + str(path) + "] has no header")
+
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.min_motor_value, self.max_motor_value, self.step_value = HEADER.unpack_from(self._mmap)
+
+        if magic != MAGIC:
+            self._mmap.close()
+            raise Exception("Session log [" + str(path) + "] is not a session log")
+
+        # Any partial last record is ignored
+        self._count     =   (size - HEADER.size) // RECORD.size
+        self._end       =   HEADER.size + self._count * RECORD.size
+
+    def __len__(self):
+        """
+
+        :return: The number of records
+        """
+        return self._count
+
+    def __getitem__(self, index):
+        """
+
+        :param index: The record number
+        :return: (time, key, left, right)
+        """
+        if index < 0:
+            index += self._count
+
+        if not 0 <= index < self._count:
+            raise IndexError("Record " + str(index) + " not in session log")
+
+        return RECORD.unpack_from(self._mmap, HEADER.size + index * RECORD.size)
+
+    def __iter__(self):
+        """
+
+        :return: A generator of (time, key, left, right)
+        """
+        return RECORD.iter_unpack(memoryview(self._mmap)[HEADER.size:self._end])
+
+    def keys(self):
+        """
+
+        :return: The key of every record (BOUNDARY for a session boundary), as an array ('b' typecode)
+        """
+        keys = array('b')
+        keys.frombytes(memoryview(self._mmap)[HEADER.size + KEY_OFFSET:self._end:RECORD.size].tobytes())
+
+        return keys
+
+    def replay(self, handler=None):
+        """
+        Move a handler through the recorded keys and compare its motor values with those recorded. At each session
+        boundary the handler is restored to the motor values recorded there.
+        :param handler: The handler to replay through, defaults to a new (not logging) InputHandler of the recorded
+        configuration
+        :return: The record number of the first difference (or of a key the handler raised on), or None if there were
+        none
+
+        The mapped file is unpacked a slice of REPLAY_CHUNK records at a time, so a log of any size replays in the same
+        memory.
+        """
+        if handler is None:
+            handler = IH.InputHandler(self.min_motor_value, self.max_motor_value, self.step_value,
+                                      IH.INSTRUMENTATION_OFF)
+
+        move    =   handler.move
+        index   =   0
+        chunk   =   REPLAY_CHUNK * RECORD.size
+
+        for start in range(HEADER.size, self._end, chunk):
+            with memoryview(self._mmap)[start:min(start + chunk, self._end)] as view:
+                for time, key, left, right in RECORD.iter_unpack(view):
+                    if key == BOUNDARY:
+                        try:
+                            handler.restore((left, right))
+                        except Exception:
+                            return index
+                    else:
+                        try:
+                            move(key)
+                        except Exception:
+                            return index
+
+                        if handler._current_motor_left_value != left or handler._current_motor_right_value != right:
+                            return index
+
+                    index += 1
+
+        return None
+
+    def as_numpy(self):
+        """
+        A NumPy structured array over the records (see record_dtype()), it is a view of the mapped file not a copy, so
+        it must be deleted before the reader is closed.
+        :return: A numpy.ndarray
+        """
+        import numpy
+
+        return numpy.frombuffer(self._mmap, dtype=record_dtype(), count=self._count, offset=HEADER.size)
+
+    def close(self):
+        """
+        Unmap the file
+        :return:
+        """
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
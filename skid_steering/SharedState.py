@@ -0,0 +1,167 @@
+__author__ = 'Paul Pearce'
+
+import mmap
+import os
+import struct
+import zlib
+from multiprocessing import shared_memory
+
+from skid_steering.OutputSink import OutputSink
+
+################################################################
+# Block layout - sequence number (uint64), left, right (int32), check (uint32), 4 bytes padding
+#
+# Sequence lock: the (single) writer makes the sequence number odd, writes the values and their check, then makes the
+# sequence number even again. A reader reads the sequence number, the values and check, then the sequence number
+# again, and only uses the values if both reads were the same even number and the check matches, otherwise it tries
+# again.
+#
+# Python cannot issue memory barriers, and on ARM (the Raspberry Pi) another core may see the writer's stores in a
+# different order, e.g. the even sequence number before the values. So a read is not trusted for the order of the
+# stores: the check is the CRC-32 of the sequence number and values written together, and a read is only used if the
+# check it read matches the sequence number and values it read - whatever order the stores arrived in, a mix of two
+# writes (or of a write in progress) fails the check (but for a 1 in 2**32 collision).
+LAYOUT          =   struct.Struct("<QiiI4x")
+SEQUENCE        =   struct.Struct("<Q")
+PAYLOAD         =   struct.Struct("<Qii")
+CHECKED         =   struct.Struct("<iiI")
+VALUES_OFFSET   =   SEQUENCE.size
+
+# Reads that found a write in progress before read() gives up, e.g. the writer died half way through a write
+MAX_RETRIES     =   100000
+
+# Where POSIX shared memory blocks are, on Linux
+SHM_DIRECTORY   =   "/dev/shm"
+
+
+def _check(sequence, left, right):
+    """
+
+    :return: The check written with a sequence number and values
+    """
+    return zlib.crc32(PAYLOAD.pack(sequence, left, right))
+
+
+def _attach(name, directory):
+    """
+    Attach to an existing block without this process's resource tracker unlinking it at exit (only its creator should)
+    :return: An object with a buf attribute and close()
+    """
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching always registers the block with the resource tracker, so map it directly
+        return _MappedBlock(name, directory)
+
+
+class _MappedBlock(object):
+    def __init__(self, name, directory):
+        with open(os.path.join(directory, name), "r+b") as file:
+            self._mmap = mmap.mmap(file.fileno(), LAYOUT.size)
+
+        self.buf = memoryview(self._mmap)
+
+    def close(self):
+        self.buf.release()
+        self._mmap.close()
+
+
+class SharedMotorState(object):
+    def __init__(self, name=None, create=True, directory=SHM_DIRECTORY):
+        """
+        Constructor - a pair of motor values in a multiprocessing.shared_memory block, written by one process and read
+        by any number of others without locks.
+        :param name: The name of the block, None for a new unique name (create only)
+        :param create: True to create the block (the writer), False to attach to an existing one (a reader)
+        :param directory: Where the shared memory blocks are, only used by a reader before Python 3.13 (which maps the
+        block's file itself, so that it is not unlinked when the reader exits)
+        :return:
+
+        Example writer  shared = SharedMotorState()
+                        ih.add_output_sink(SharedMemorySink(shared))
+                reader  SharedMotorState(shared.name, create=False).read()
+
+        A read does not rely on the order the writer's stores are seen in, which is not guaranteed on ARM, the values
+        carry a check (see the block layout).
+        """
+        if create:
+            self._block = shared_memory.SharedMemory(name, create=True, size=LAYOUT.size)
+            LAYOUT.pack_into(self._block.buf, 0, 0, 0, 0, _check(0, 0, 0))
+        else:
+            self._block = _attach(name, directory)
+
+        self._creator   =   create
+        self._buffer    =   self._block.buf
+
+        self.retries    =   0
+
+    @property
+    def name(self):
+        """
+
+        :return: The name other processes attach to
+        """
+        return self._block.name
+
+    def write(self, left, right):
+        """
+        Publish a pair of motor values (only one process may write)
+        :param left: The left motor value
+        :param right: The right motor value
+        :return:
+        """
+        buffer      =   self._buffer
+        sequence    =   SEQUENCE.unpack_from(buffer)[0]
+
+        SEQUENCE.pack_into(buffer, 0, sequence + 1)
+        CHECKED.pack_into(buffer, VALUES_OFFSET, left, right, _check(sequence + 2, left, right))
+        SEQUENCE.pack_into(buffer, 0, sequence + 2)
+
+    def read(self, max_retries=MAX_RETRIES):
+        """
+        A consistent pair of motor values
+        :param max_retries: The reads of a write in progress to try again after, before raising an exception
+        :return: (sequence, left, right) - the sequence number goes up by 2 with each write, 0 is never written
+        """
+        buffer = self._buffer
+
+        for count in range(max_retries + 1):
+            before              =   SEQUENCE.unpack_from(buffer)[0]
+            left, right, check  =   CHECKED.unpack_from(buffer, VALUES_OFFSET)
+            after               =   SEQUENCE.unpack_from(buffer)[0]
+
+            if before == after and not before & 1 and check == _check(before, left, right):
+                return before, left, right
+
+            self.retries += 1
+
+        raise Exception("No consistent motor values after " + "[" + str(max_retries) + "] retries, sequence " +
+                        "[" + str(after) + "]")
+
+    def close(self, unlink=None):
+        """
+        Detach from the block
+        :param unlink: Also destroy the block, defaults to True for the creator
+        :return:
+        """
+        self._buffer = None
+        self._block.close()
+
+        if unlink if unlink is not None else self._creator:
+            self._block.unlink()
+
+
+class SharedMemorySink(OutputSink):
+    def __init__(self, shared, max_rate=None):
+        """
+        Constructor - an output sink publishing the motor values to a SharedMotorState.
+        :param shared: The SharedMotorState (the writer)
+        :param max_rate: As for OutputSink
+        :return:
+        """
+        OutputSink.__init__(self, max_rate)
+
+        self._shared = shared
+
+    def write(self, left, right):
+        self._shared.write(left, right)
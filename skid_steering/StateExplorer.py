@@ -0,0 +1,279 @@
+__author__ = 'Paul Pearce'
+
+import sys
+from array import array
+from collections import namedtuple
+
+import skid_steering.InputHandler as IH
+import skid_steering.TransitionTable as TT
+
+################################################################
+# Kinds of finding
+VIOLATION   =   "violation"     # The steering logic raised an exception, e.g. the internal consistency check
+OFF_GRID    =   "off grid"      # A motor value is not min + n * step, or is more than a step beyond -max .. max
+DEAD_END    =   "dead end"      # Only STOP changes the motor values
+
+# keys is the shortest key sequence from the stopped state that shows the finding, key the last of them (or None)
+Finding = namedtuple("Finding", ["kind", "left", "right", "key", "message", "keys"])
+
+# Above this many states the visited states are kept in a set, below it a bitmap
+DENSE_LIMIT = 1 << 30
+
+
+class StateExplorer(object):
+    def __init__(self, min_motor_value, max_motor_value, step_value, dense_limit=DENSE_LIMIT,
+                 handler_class=IH.InputHandler):
+        """
+        Constructor - breadth first search of every (left, right) motor state reachable from the stopped state,
+        trying every key in every state with the reference InputHandler.
+        :param min_motor_value: As for InputHandler
+        :param max_motor_value: As for InputHandler
+        :param step_value: As for InputHandler
+        :param dense_limit: The most grid states to keep a visited bitmap for
+        :param handler_class: The InputHandler (sub-)class whose steering logic is explored
+        :return:
+
+        Example explorer = StateExplorer(0, 100, 20)
+                explorer.explore()
+                explorer.violations
+
+        A state is encoded as the single integer (left step index * grid size) + right step index. Visited states are
+        a bitmap (one bit per grid state), or a set of these integers for large grids. Each reachable state costs
+        13 bytes more - its code, the discovery number of the state it was reached from and the key used - which is
+        what the shortest key sequences are rebuilt from.
+        """
+
+        # Validates the configuration too
+        self._handler = handler_class(min_motor_value, max_motor_value, step_value,
+                                      instrumentation=IH.INSTRUMENTATION_OFF)
+
+        self.min_motor_value    =   min_motor_value
+        self.max_motor_value    =   max_motor_value
+        self.step_value         =   step_value
+
+        ###################################################################################
+        # The grid of step indices from min, covering -max .. max with a step of margin each way
+        lowest              =   min(min_motor_value, -max_motor_value) - step_value
+        highest             =   max(min_motor_value, max_motor_value) + step_value
+
+        self._first_index   =   -((min_motor_value - lowest) // step_value)
+        self._last_index    =   (highest - min_motor_value) // step_value
+        self._size          =   self._last_index - self._first_index + 1
+        self._dense         =   self._size * self._size <= dense_limit
+
+        self._codes     =   array('q')      # In discovery (breadth first) order
+        self._parents   =   array('i')      # Discovery number of the state each was reached from
+        self._slots     =   bytearray()     # Key slot (TransitionTable.KEYS) each was reached with
+        self._numbers   =   None            # Code -> discovery number, made by the first path_to()
+
+        self.transitions    =   0
+        self.violations     =   []
+        self.dead_ends      =   []
+        self.explored       =   False
+
+    def explore(self):
+        """
+        Search every reachable state
+        :return: self, for chaining
+        """
+        if self.explored:
+            return self
+
+        handler     =   self._handler
+        codes       =   self._codes
+        parents     =   self._parents
+        slots       =   self._slots
+
+        if self._dense:
+            visited = bytearray((self._size * self._size + 7) // 8)
+        else:
+            visited = set()
+
+        def visit(code):
+            """
+
+            :return: True if the state had not been visited before
+            """
+            if self._dense:
+                byte, bit = code >> 3, 1 << (code & 7)
+
+                if visited[byte] & bit:
+                    return False
+
+                visited[byte] |= bit
+                return True
+
+            if code in visited:
+                return False
+
+            visited.add(code)
+            return True
+
+        start = self._encode(handler._current_motor_left_value, handler._current_motor_right_value)
+
+        if start is None:
+            self.violations.append(Finding(OFF_GRID, handler._current_motor_left_value,
+                                           handler._current_motor_right_value, None, "Stopped state is off the grid",
+                                           []))
+            self.explored = True
+            return self
+
+        visit(start)
+        codes.append(start)
+        parents.append(-1)
+        slots.append(0)
+
+        ##########################################
+        # The discovery order is the search queue
+        state = 0
+        while state < len(codes):
+            left, right = self._decode(codes[state])
+
+            changed_other_than_stop = False
+
+            for slot, key in enumerate(TT.KEYS):
+                next_left, next_right, error = TT.reference_transition(handler, left, right, key)
+
+                self.transitions += 1
+
+                if error is not None:
+                    self.violations.append(
+                        Finding(VIOLATION, left, right, key, error, self._path(state) + [key]))
+                    continue
+
+                code = self._encode(next_left, next_right)
+
+                if code is None:
+                    self.violations.append(
+                        Finding(OFF_GRID, next_left, next_right, key,
+                                "Motor values are off the grid: " + "L/R" + str([next_left, next_right]),
+                                self._path(state) + [key]))
+                    continue
+
+                if key != IH.STOP and (next_left, next_right) != (left, right):
+                    changed_other_than_stop = True
+
+                if visit(code):
+                    codes.append(code)
+                    parents.append(state)
+                    slots.append(slot)
+
+            if not changed_other_than_stop:
+                keys = self._path(state)
+
+                self.dead_ends.append(Finding(DEAD_END, left, right, keys[-1] if keys else None,
+                                              "Only STOP changes the motor values", keys))
+
+            state += 1
+
+        self.explored = True
+
+        return self
+
+    def reachable(self):
+        """
+
+        :return: The number of reachable states
+        """
+        return len(self._codes)
+
+    def states(self):
+        """
+        The reachable states, in breadth first order (so by the length of the shortest key sequence to reach them)
+        :return: A generator of (left, right)
+        """
+        for code in self._codes:
+            yield self._decode(code)
+
+    def path_to(self, left, right):
+        """
+        The shortest key sequence from the stopped state to a motor state.
+        :param left: The left motor value
+        :param right: The right motor value
+        :return: A list of logical movement key values, or None if the state is not reachable
+        """
+        code = self._encode(left, right)
+
+        if code is None:
+            return None
+
+        if self._numbers is None or len(self._numbers) != len(self._codes):
+            self._numbers = dict((code, state) for state, code in enumerate(self._codes))
+
+        state = self._numbers.get(code)
+
+        if state is None:
+            return None
+
+        return self._path(state)
+
+    def summary(self):
+        """
+
+        :return: A multi-line human readable report
+        """
+        lines = [
+            "Configuration (min, max, step): " + str((self.min_motor_value, self.max_motor_value, self.step_value)),
+            "Reachable states: " + str(self.reachable()),
+            "Transitions tried: " + str(self.transitions),
+            "Violations: " + str(len(self.violations)),
+            "Dead ends: " + str(len(self.dead_ends)),
+        ]
+
+        for finding in self.violations + self.dead_ends:
+            lines.append("  " + finding.kind + " at L/R" + str([finding.left, finding.right]) + " " + finding.message +
+                         " keys " + str(finding.keys))
+
+        return "\n".join(lines)
+
+    def _path(self, state):
+        keys = []
+
+        while self._parents[state] >= 0:
+            keys.append(TT.KEYS[self._slots[state]])
+            state = self._parents[state]
+
+        keys.reverse()
+
+        return keys
+
+    def _encode(self, left, right):
+        """
+
+        :return: The integer code of the motor values, or None if they are off the grid
+        """
+        left_offset     =   left - self.min_motor_value
+        right_offset    =   right - self.min_motor_value
+
+        if left_offset % self.step_value or right_offset % self.step_value:
+            return None
+
+        left_index      =   left_offset // self.step_value - self._first_index
+        right_index     =   right_offset // self.step_value - self._first_index
+
+        if not (0 <= left_index < self._size and 0 <= right_index < self._size):
+            return None
+
+        return left_index * self._size + right_index
+
+    def _decode(self, code):
+        left_index, right_index = divmod(code, self._size)
+
+        return (self.min_motor_value + (left_index + self._first_index) * self.step_value,
+                self.min_motor_value + (right_index + self._first_index) * self.step_value)
+
+
+def main(argv):
+    if len(argv) != 4:
+        print("Usage: python -m skid_steering.StateExplorer min_motor_value max_motor_value step_value")
+        return 2
+
+    explorer = StateExplorer(int(argv[1]), int(argv[2]), int(argv[3])).explore()
+
+    print(explorer.summary())
+
+    return 1 if explorer.violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
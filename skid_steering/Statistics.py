@@ -0,0 +1,148 @@
+__author__ = 'Paul Pearce'
+
+from array import array
+
+
+class LatencyStatistics(object):
+    def __init__(self):
+        """
+        Constructor - running count, total, minimum and maximum of a series of latencies (in seconds).
+        :return:
+
+        Nothing is kept per sample, so recording costs the same however many samples there have been.
+        """
+        self.reset()
+
+    def record(self, latency):
+        """
+        Add a latency to the statistics
+        :param latency: The latency in seconds
+        :return:
+        """
+        self.count  +=  1
+        self.total  +=  latency
+
+        if latency < self.minimum:
+            self.minimum = latency
+
+        if latency > self.maximum:
+            self.maximum = latency
+
+    def mean(self):
+        """
+
+        :return: The mean latency in seconds, or 0.0 if nothing has been recorded
+        """
+        if self.count == 0:
+            return 0.0
+
+        return self.total / self.count
+
+    def reset(self):
+        """
+        Forget everything recorded
+        :return:
+        """
+        self.count      =   0
+        self.total      =   0.0
+        self.minimum    =   float("inf")
+        self.maximum    =   0.0
+
+    def snapshot(self):
+        """
+
+        :return: The statistics as a dict
+        """
+        return {
+            "count":    self.count,
+            "mean":     self.mean(),
+            "minimum":  self.minimum if self.count else 0.0,
+            "maximum":  self.maximum,
+        }
+
+    def __str__(self):
+        return "count=%d mean=%.6fs min=%.6fs max=%.6fs" % (
+            self.count, self.mean(), self.minimum if self.count else 0.0, self.maximum)
+
+
+class LatencyHistogram(object):
+    # Bucket n counts the latencies of n bits, i.e. from 2 ** (n - 1) up to 2 ** n nanoseconds, the last bucket all
+    # those longer (over 9 minutes)
+    BUCKETS = 40
+
+    def __init__(self):
+        """
+        Constructor - a fixed size histogram of latencies (in integer nanoseconds), in power of 2 buckets.
+        :return:
+
+        Recording is a bit_length() and an increment of an array element, nothing is allocated. There is one writer,
+        a snapshot copies the counts so can be taken from another thread while recording carries on (a sample may be
+        in the count but not yet the buckets).
+        """
+        self.reset()
+
+    def record(self, nanoseconds):
+        """
+        Add a latency to the histogram
+        :param nanoseconds: The latency in nanoseconds
+        :return:
+        """
+        bucket = nanoseconds.bit_length()
+
+        self.buckets[bucket if bucket < self.BUCKETS else self.BUCKETS - 1] += 1
+
+        self.count  +=  1
+        self.total  +=  nanoseconds
+
+        if nanoseconds > self.maximum:
+            self.maximum = nanoseconds
+
+    def percentile(self, fraction):
+        """
+
+        :param fraction: 0.0 .. 1.0
+        :return: The upper bound, in nanoseconds, of the bucket holding the latency at the fraction, or 0 if nothing
+        has been recorded
+        """
+        if self.count == 0:
+            return 0
+
+        rank    =   fraction * self.count
+        seen    =   0
+
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+
+            if seen >= rank and count:
+                return min(1 << bucket, self.maximum) if bucket < self.BUCKETS - 1 else self.maximum
+
+        return self.maximum
+
+    def reset(self):
+        """
+        Forget everything recorded
+        :return:
+        """
+        self.buckets    =   array('Q', [0]) * self.BUCKETS
+        self.count      =   0
+        self.total      =   0
+        self.maximum    =   0
+
+    def snapshot(self):
+        """
+
+        :return: The histogram as a dict, buckets as a list of counts
+        """
+        return {
+            "count":    self.count,
+            "total":    self.total,
+            "maximum":  self.maximum,
+            "p50":      self.percentile(0.5),
+            "p99":      self.percentile(0.99),
+            "buckets":  self.buckets.tolist(),
+        }
+
+    def __str__(self):
+        return "count=%d mean=%dns p50<=%dns p99<=%dns max=%dns" % (
+            self.count, self.total // self.count if self.count else 0, self.percentile(0.5), self.percentile(0.99),
+            self.maximum)
@@ -0,0 +1,237 @@
+__author__ = 'Paul Pearce'
+
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+import skid_steering.Configuration as C
+import skid_steering.InputHandler as IH
+import skid_steering.TransitionTable as TT
+from skid_steering.Configuration import get_configuration
+
+################################################################
+# File layout, little endian
+#
+# Header    magic (8 bytes), fingerprint of the steering logic (uint32), min_motor_value, max_motor_value, step_value
+#           (int32), number of states, bytes of error messages (uint32)
+# Arrays    lefts, rights (int32 per state), next (int32 per state per key)
+# Errors    "cell<TAB>message<NUL>" for each transition the reference raised on (utf-8)
+MAGIC       =   b"SKIDTBL1"
+HEADER      =   struct.Struct("<8sI3i2I")
+
+# The directory tables are cached in, unless given
+CACHE_ENVIRONMENT = "SKID_STEERING_CACHE"
+
+_fingerprint = None
+
+# Where the code a table is worked out by lives - the steering logic, the limits it tests against and the table builder
+# (with the reference transition it runs)
+_LOGIC = (IH.InputHandler, C.Configuration, C, TT.TransitionTable, TT)
+
+
+def default_directory():
+    """
+
+    :return: $SKID_STEERING_CACHE, else skid_steering in the user's cache directory
+    """
+    directory = os.environ.get(CACHE_ENVIRONMENT)
+
+    if not directory:
+        directory = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "skid_steering")
+
+    return directory
+
+
+def logic_fingerprint():
+    """
+    A checksum of the compiled code of the steering logic (InputHandler), the configuration limits it tests against
+    (Configuration), the table builder and the keys in table column order, so a table cached before any of them changed
+    is not used.
+    :return: An unsigned 32 bit integer
+    """
+    global _fingerprint
+
+    if _fingerprint is None:
+        def add(code, crc):
+            crc = zlib.crc32(code.co_code, crc)
+
+            for constant in code.co_consts:
+                if hasattr(constant, "co_code"):
+                    crc = add(constant, crc)
+                else:
+                    crc = zlib.crc32(repr(constant).encode("utf-8"), crc)
+
+            return crc
+
+        crc = zlib.crc32(repr(TT.KEYS).encode("utf-8"))
+        for namespace in _LOGIC:
+            module = getattr(namespace, "__module__", None) or namespace.__name__
+
+            for name, member in sorted(vars(namespace).items()):
+                # Only code defined there, not functions imported into a module
+                if hasattr(member, "__code__") and getattr(member, "__module__", module) == module:
+                    crc = add(member.__code__, zlib.crc32(name.encode("utf-8"), crc))
+
+        _fingerprint = crc
+
+    return _fingerprint
+
+
+def table_path(min_motor_value, max_motor_value, step_value, directory=None):
+    """
+
+    :return: The cache file of a configuration's table
+    """
+    return os.path.join(directory or default_directory(),
+                        "table_" + str(min_motor_value) + "_" + str(max_motor_value) + "_" + str(step_value) + ".bin")
+
+
+def load_table(min_motor_value, max_motor_value, step_value, directory=None):
+    """
+    The TransitionTable of a configuration, the one shared in this process (see TransitionTable.shared_table()) if
+    there is one, else read from the cache if it was built before (by any process), else built and written to the
+    cache.
+    :param min_motor_value: As for InputHandler
+    :param max_motor_value: As for InputHandler
+    :param step_value: As for InputHandler
+    :param directory: The cache directory, defaults to default_directory()
+    :return: A TransitionTable.TransitionTable
+
+    A cache file that cannot be read, is damaged or was written by a different version of the steering logic is
+    rebuilt. Failing to write the cache (e.g. a read only file system) is not an error.
+    """
+    config = get_configuration(min_motor_value, max_motor_value, step_value)
+
+    if config.table is not None:
+        return config.table
+
+    path = table_path(min_motor_value, max_motor_value, step_value, directory)
+
+    table = read_table(path, min_motor_value, max_motor_value, step_value)
+
+    if table is None:
+        table = TT.TransitionTable(min_motor_value, max_motor_value, step_value)
+
+        try:
+            write_table(path, table)
+        except OSError:
+            pass
+
+    config.table = table
+
+    return table
+
+
+def cached_handler(min_motor_value, max_motor_value, step_value, instrumentation=IH.INSTRUMENTATION_OFF,
+                   directory=None):
+    """
+    The fast start entry point - a TableInputHandler whose table comes from the cache.
+    :param min_motor_value: As for InputHandler
+    :param max_motor_value: As for InputHandler
+    :param step_value: As for InputHandler
+    :param instrumentation: As for InputHandler, logging is only imported when it is not off
+    :param directory: As for load_table()
+    :return: A TransitionTable.TableInputHandler
+
+    Example import skid_steering.TableCache as TC
+            ih = TC.cached_handler(0, 100, 20)
+    """
+    table = load_table(min_motor_value, max_motor_value, step_value, directory)
+
+    return TT.TableInputHandler(min_motor_value, max_motor_value, step_value, table, instrumentation)
+
+
+def read_table(path, min_motor_value, max_motor_value, step_value):
+    """
+
+    :return: The TransitionTable cached in a file, or None if it is missing, damaged (including a next state that is
+    not a state, or a failing transition without its message) or out of date
+    """
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except OSError:
+        return None
+
+    if len(data) < HEADER.size:
+        return None
+
+    magic, fingerprint, cached_min, cached_max, cached_step, states, errors_size = HEADER.unpack_from(data)
+
+    if magic != MAGIC or fingerprint != logic_fingerprint() or \
+            (cached_min, cached_max, cached_step) != (min_motor_value, max_motor_value, step_value):
+        return None
+
+    cells = states * len(TT.KEYS)
+
+    if states < 1 or len(data) != HEADER.size + (2 * states + cells) * 4 + errors_size:
+        return None
+
+    offset  =   HEADER.size
+    arrays  =   []
+
+    for count in (states, states, cells):
+        values = array('i')
+        values.frombytes(data[offset:offset + count * 4])
+
+        if sys.byteorder == "big":
+            values.byteswap()
+
+        arrays.append(values)
+        offset += count * 4
+
+    errors = {}
+
+    try:
+        for entry in data[offset:].decode("utf-8").split("\0")[:-1]:
+            cell, message   =   entry.split("\t", 1)
+            errors[int(cell)] = message
+    except ValueError:
+        return None
+
+    # A failing transition to state n is stored as -(n + 1)
+    transitions = arrays[2]
+
+    if min(transitions) < -states or max(transitions) >= states or \
+            len(errors) != sum(map((0).__gt__, transitions)) or \
+            not all(0 <= cell < cells and transitions[cell] < 0 for cell in errors):
+        return None
+
+    return TT.TransitionTable.from_arrays(min_motor_value, max_motor_value, step_value, arrays[0], arrays[1],
+                                          arrays[2], errors)
+
+
+def write_table(path, table):
+    """
+    Write a table to a cache file, atomically so a concurrent reader never sees part of it
+    :param path: The cache file
+    :param table: A TransitionTable.TransitionTable
+    :return:
+    """
+    errors = "".join(str(cell) + "\t" + message + "\0" for cell, message in sorted(table.errors.items()))
+    errors = errors.encode("utf-8")
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    temporary = path + "." + str(os.getpid()) + ".tmp"
+
+    try:
+        with open(temporary, "wb") as file:
+            file.write(HEADER.pack(MAGIC, logic_fingerprint(), table.min_motor_value, table.max_motor_value,
+                                   table.step_value, len(table), len(errors)))
+
+            for values in (table.lefts, table.rights, table.next):
+                if sys.byteorder == "big":
+                    values = array('i', values)
+                    values.byteswap()
+
+                file.write(values.tobytes())
+
+            file.write(errors)
+
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
@@ -0,0 +1,357 @@
+__author__ = 'Paul Pearce'
+
+from array import array
+
+import skid_steering.InputHandler as IH
+from skid_steering.Configuration import get_configuration, is_integral
+from skid_steering.MotorState import motor_state
+
+################################################################
+# The logical keys in table column order, and the column of each
+KEYS        =   IH.KEYS
+KEY_SLOTS   =   dict((key, slot) for slot, key in enumerate(KEYS))
+
+
+def reference_transition(handler, left, right, input):
+    """
+    Run one key through the reference (branch logic) implementation starting from an arbitrary motor state.
+    :param handler: A scratch InputHandler, its motor values are overwritten
+    :param left: The starting left motor value
+    :param right: The starting right motor value
+    :param input: A logical movement key value
+    :return: (left, right, error) - the motor values after the key, and the message of any exception raised
+    (else None). As with the reference, the motor values may have changed even if an exception was raised.
+    """
+    handler._current_motor_left_value   =   left
+    handler._current_motor_right_value  =   right
+
+    error = None
+
+    try:
+        handler.move(input)
+    except Exception as e:
+        error = str(e)
+
+    return handler._current_motor_left_value, handler._current_motor_right_value, error
+
+
+def shared_table(min_motor_value, max_motor_value, step_value):
+    """
+    The TransitionTable of a configuration, built once and kept with its cached Configuration.Configuration so every
+    handler with the configuration shares it.
+    :param min_motor_value: As for InputHandler
+    :param max_motor_value: As for InputHandler
+    :param step_value: As for InputHandler
+    :return: A TransitionTable
+    """
+    # Before the cache, which has (0, 100, 20) for (0.0, 100.0, 20.0) too
+    check_integral(min_motor_value, max_motor_value, step_value)
+
+    config = get_configuration(min_motor_value, max_motor_value, step_value)
+
+    if config.table is None:
+        config.table = TransitionTable(min_motor_value, max_motor_value, step_value)
+
+    return config.table
+
+
+def check_integral(min_motor_value, max_motor_value, step_value):
+    """
+    Raise an exception unless a configuration's motor values are all C ints (see Configuration.is_integral()), as
+    the tables store them
+    :param min_motor_value: As for InputHandler
+    :param max_motor_value: As for InputHandler
+    :param step_value: As for InputHandler
+    :return:
+    """
+    if not is_integral(min_motor_value, max_motor_value, step_value):
+        raise Exception("Transition tables need int motor values (a C int): " + "[" +
+                        str((min_motor_value, max_motor_value, step_value)) + "]")
+
+
+class TransitionTable(object):
+    def __init__(self, min_motor_value, max_motor_value, step_value):
+        """
+        Constructor - enumerate every motor state reachable from the stopped state and record where each key moves it.
+        :param min_motor_value: As for InputHandler
+        :param max_motor_value: As for InputHandler
+        :param step_value: As for InputHandler
+        :return:
+
+        States are numbered in the order they are discovered, state 0 is the stopped state. The table is a dense
+        array of (number of states * number of keys) next state numbers, a transition for which the reference
+        implementation raised an exception is stored as -(next state + 1) with its message kept in errors. The motor
+        values are kept in 'i' arrays, so a configuration that is not all ints (e.g. floats) raises an exception.
+        """
+        check_integral(min_motor_value, max_motor_value, step_value)
+
+        # Validates the configuration too
+        scratch = IH.InputHandler(min_motor_value, max_motor_value, step_value, IH.INSTRUMENTATION_OFF)
+
+        self.min_motor_value    =   min_motor_value
+        self.max_motor_value    =   max_motor_value
+        self.step_value         =   step_value
+
+        self.lefts      =   array('i')
+        self.rights     =   array('i')
+        self.next       =   array('i')
+        self.errors     =   {}
+
+        index   =   {}
+        start   =   (scratch._current_motor_left_value, scratch._current_motor_right_value)
+
+        index[start] = 0
+        self.lefts.append(start[0])
+        self.rights.append(start[1])
+
+        ###################################################
+        # Breadth first - the table rows are filled in order
+        state = 0
+        while state < len(self.lefts):
+            left    =   self.lefts[state]
+            right   =   self.rights[state]
+
+            for key in KEYS:
+                next_left, next_right, error = reference_transition(scratch, left, right, key)
+
+                target = index.get((next_left, next_right))
+                if target is None:
+                    target = len(self.lefts)
+                    index[(next_left, next_right)] = target
+                    self.lefts.append(next_left)
+                    self.rights.append(next_right)
+
+                if error is None:
+                    self.next.append(target)
+                else:
+                    self.errors[len(self.next)] = error
+                    self.next.append(-(target + 1))
+
+            state += 1
+
+        self._index = index
+
+        # So moving allocates nothing
+        self.states = [motor_state(left, right) for left, right in zip(self.lefts, self.rights)]
+
+    @classmethod
+    def from_arrays(cls, min_motor_value, max_motor_value, step_value, lefts, rights, next, errors):
+        """
+        A table from the arrays of one built before (e.g. loaded by TableCache), without running the reference.
+        :param min_motor_value: As for InputHandler
+        :param max_motor_value: As for InputHandler
+        :param step_value: As for InputHandler
+        :param lefts: As for the lefts attribute
+        :param rights: As for the rights attribute
+        :param next: As for the next attribute
+        :param errors: As for the errors attribute
+        :return: A TransitionTable
+        """
+        if len(lefts) != len(rights) or len(next) != len(lefts) * len(KEYS):
+            raise Exception("Transition table arrays are inconsistent")
+
+        table = cls.__new__(cls)
+
+        table.min_motor_value   =   min_motor_value
+        table.max_motor_value   =   max_motor_value
+        table.step_value        =   step_value
+
+        table.lefts     =   lefts
+        table.rights    =   rights
+        table.next      =   next
+        table.errors    =   errors
+
+        table._index    =   dict(zip(zip(lefts, rights), range(len(lefts))))
+        table.states    =   list(map(motor_state, lefts, rights))
+
+        return table
+
+    def __len__(self):
+        """
+
+        :return: The number of reachable motor states
+        """
+        return len(self.lefts)
+
+    def state_of(self, left, right):
+        """
+
+        :param left: A left motor value
+        :param right: A right motor value
+        :return: The state number of the motor values, or None if they are not reachable
+        """
+        return self._index.get((left, right))
+
+
+class TableInputHandler(IH.InputHandler):
+    __slots__ = ("_table", "_state")
+
+    def __init__(self, min_motor_value, max_motor_value, step_value, table=None,
+                 instrumentation=IH.INSTRUMENTATION_OFF):
+        """
+        Constructor - an InputHandler whose move() is a single lookup in a precompiled TransitionTable.
+        :param min_motor_value: As for InputHandler
+        :param max_motor_value: As for InputHandler
+        :param step_value: As for InputHandler
+        :param table: A TransitionTable for the same configuration, defaults to the shared one (see shared_table())
+        :param instrumentation: As for InputHandler, except trace - there are no steps of the steering logic to log
+        :return:
+
+        The motor values produced are identical to the (reference) InputHandler for every key sequence, including
+        the exceptions raised, but no logging is done when moving.
+        """
+        if instrumentation == IH.INSTRUMENTATION_TRACE:
+            raise Exception("TableInputHandler cannot trace the steering logic, use the reference InputHandler")
+
+        IH.InputHandler.__init__(self, min_motor_value, max_motor_value, step_value, instrumentation)
+
+        if table is None:
+            table = shared_table(min_motor_value, max_motor_value, step_value)
+        elif (table.min_motor_value, table.max_motor_value, table.step_value) != \
+                (min_motor_value, max_motor_value, step_value):
+            raise Exception("Transition table was built for a different configuration")
+
+        self._table     =   table
+        self._state     =   0
+
+    def move(self, input):
+        """
+        Given the logical input movement key, determine the new left and right (logical) motor values.
+        :param input: A logical movement key value
+        :return: The new motor values as a MotorState.MotorState
+        """
+        if self._latency is not None:
+            return self._latency.move(self, input)
+
+        try:
+            slot = KEY_SLOTS.get(input)
+        except TypeError:
+            slot = None
+
+        if slot is None:
+            raise IH.InvalidInputError("Invalid input: " + "[" + str(input) + "]")
+
+        table   =   self._table
+        cell    =   self._state * len(KEYS) + slot
+        state   =   table.next[cell]
+
+        if state < 0:
+            # The reference raised, but may still have changed the motor values first
+            state = -state - 1
+            self._state                         =   state
+            self._current_motor_left_value      =   table.lefts[state]
+            self._current_motor_right_value     =   table.rights[state]
+
+            raise Exception(table.errors[cell])
+
+        self._state                         =   state
+        self._current_motor_left_value      =   table.lefts[state]
+        self._current_motor_right_value     =   table.rights[state]
+
+        for sink in self._sinks:
+            sink.publish(self._current_motor_left_value, self._current_motor_right_value)
+
+        for listener in self._listeners:
+            listener(input, self._current_motor_left_value, self._current_motor_right_value)
+
+        return table.states[state]
+
+    def move_slot(self, slot):
+        """
+        As move(), for the table column (KEY_SLOTS) of a key looked up beforehand - e.g. by KeyMap.KeyMap, so a raw code
+        reaches the transition without going through its logical key.
+        :param slot: A table column, 0 .. len(KEYS) - 1
+        :return: As for move()
+        """
+        if self._latency is not None:
+            return self._latency.move(self, KEYS[slot])
+
+        table   =   self._table
+        cell    =   self._state * len(KEYS) + slot
+        state   =   table.next[cell]
+
+        if state < 0:
+            state = -state - 1
+            self._state                         =   state
+            self._current_motor_left_value      =   table.lefts[state]
+            self._current_motor_right_value     =   table.rights[state]
+
+            raise Exception(table.errors[cell])
+
+        self._state                         =   state
+        self._current_motor_left_value      =   table.lefts[state]
+        self._current_motor_right_value     =   table.rights[state]
+
+        for sink in self._sinks:
+            sink.publish(self._current_motor_left_value, self._current_motor_right_value)
+
+        for listener in self._listeners:
+            listener(KEYS[slot], self._current_motor_left_value, self._current_motor_right_value)
+
+        return table.states[state]
+
+    def restore(self, snapshot):
+        """
+        As InputHandler.restore()
+        """
+        left, right = snapshot
+
+        state = self._table.state_of(left, right)
+
+        if state is None:
+            raise Exception("Motor state is not reachable: " + "L/R" + str([left, right]))
+
+        self._state                         =   state
+        self._current_motor_left_value      =   left
+        self._current_motor_right_value     =   right
+
+    def move_many(self, keys):
+        """
+        Move through a sequence of logical input movement keys, as if move() was called for each in turn.
+        :param keys: An iterable (or NumPy array) of logical movement key values
+        :return: (left, right) - arrays ('i' typecode) of the motor values after each key
+
+        As InputHandler.move_many, but the whole sequence is run through the table in one loop.
+        """
+        if self._sinks or self._listeners or self._latency is not None:
+            # Each move must be published (or timed)
+            return IH.InputHandler.move_many(self, keys)
+
+        slots       =   [KEY_SLOTS[key] for key in IH.validate_keys(keys)]
+        states      =   array('i', [0]) * len(slots)
+
+        table       =   self._table
+        transitions =   table.next
+        width       =   len(KEYS)
+        state       =   self._state
+
+        for index, slot in enumerate(slots):
+            cell    =   state * width + slot
+            state   =   transitions[cell]
+
+            if state < 0:
+                self._state                         =   -state - 1
+                self._current_motor_left_value      =   table.lefts[self._state]
+                self._current_motor_right_value     =   table.rights[self._state]
+
+                # As InputHandler.move_many() raises from the exception move() raises
+                error = Exception(table.errors[cell])
+
+                raise IH._at_index(error, index) from error
+
+            states[index] = state
+
+        self._state                         =   state
+        self._current_motor_left_value      =   table.lefts[state]
+        self._current_motor_right_value     =   table.rights[state]
+
+        return array('i', map(table.lefts.__getitem__, states)), array('i', map(table.rights.__getitem__, states))
+
+    def _stop(self):
+        """
+        Set motor value to stop the vehicle motors
+        :return:
+        """
+        IH.InputHandler._stop(self)
+
+        self._state = 0
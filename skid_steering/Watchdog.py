@@ -0,0 +1,157 @@
+__author__ = 'Paul Pearce'
+
+import logging
+import time
+
+import skid_steering.InputHandler as IH
+from skid_steering.Statistics import LatencyStatistics
+
+
+class Watchdog(object):
+    def __init__(self, handler, timeout, clock=time.monotonic, inputs=()):
+        """
+        Constructor - a dead man's handle, stopping the vehicle if no input arrives for a while.
+        :param handler: The InputHandler to watch (and stop), every move() of it is input
+        :param timeout: Seconds without input before stopping
+        :param clock: Seconds
+        :param inputs: Where keys arrive before the handler, each key they are given is input whether or not it reaches
+        move() - Coalescer.Coalescer and KeyboardReader.KeyboardReader (anything with add_key_listener())
+        :return:
+
+        Example watchdog = Watchdog(ih, 0.5, inputs=[coalescer])
+
+        Watch the inputs when there are any - a Coalescer drops a key held at full speed, so without it the handler
+        sees no input while the operator is still holding the key. feed() is input too.
+
+        The stop is a move(STOP), so the output sinks are told - a Ramp.MotorRamp sink ramps the motors down rather than
+        stopping them dead. The watchdog is disarmed after stopping, until the next input.
+
+        Each input only moves the deadline on (an attribute assignment). Expiry is found by poll(), called from a tick
+        loop, or by start() in an asyncio event loop, which keeps a single timer: when it fires before the (moved)
+        deadline, it is set again for the new deadline, so keypresses never create or cancel timers.
+        """
+        if timeout <= 0:
+            raise Exception("timeout must be > 0")
+
+        self._logger    =   logging.getLogger("SkidSteering.Watchdog")
+
+        self._handler   =   handler
+        self._timeout   =   timeout
+        self._clock     =   clock
+
+        self._deadline  =   clock() + timeout
+        self._armed     =   True
+        self._stopping  =   False
+
+        self._loop      =   None
+        self._timer     =   None
+
+        self.triggered  =   0
+        self.latency    =   LatencyStatistics()     # From the deadline to stopping
+
+        self._inputs    =   tuple(inputs)
+
+        handler.add_move_listener(self._on_move)
+
+        for source in self._inputs:
+            source.add_key_listener(self.feed)
+
+    def _on_move(self, input, left, right):
+        self.feed(input)
+
+    def feed(self, key=None):
+        """
+        Input has arrived, move the deadline on
+        :param key: The logical movement key value (unused)
+        :return:
+        """
+        if self._stopping:
+            return
+
+        self._deadline  =   self._clock() + self._timeout
+        self._armed     =   True
+
+        if self._loop is not None and self._timer is None:
+            self._schedule()
+
+    def poll(self):
+        """
+        Stop the vehicle if the deadline has passed
+        :return: True if the vehicle was stopped
+        """
+        if not self._armed:
+            return False
+
+        now = self._clock()
+        if now < self._deadline:
+            return False
+
+        self._trigger(now)
+
+        return True
+
+    def remaining(self):
+        """
+
+        :return: Seconds until the deadline (negative if past), or None if disarmed
+        """
+        if not self._armed:
+            return None
+
+        return self._deadline - self._clock()
+
+    def start(self, loop):
+        """
+        Watch from an asyncio event loop
+        :param loop: The event loop
+        :return:
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        self._loop = loop
+
+        if self._armed:
+            self._schedule()
+
+    def close(self):
+        """
+        Stop watching
+        :return:
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        self._loop  =   None
+        self._armed =   False
+        self._handler.remove_move_listener(self._on_move)
+
+        for source in self._inputs:
+            source.remove_key_listener(self.feed)
+
+        self._inputs = ()
+
+    def _schedule(self):
+        self._timer = self._loop.call_later(max(0.0, self._deadline - self._clock()), self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+
+        if not self.poll() and self._armed:
+            # Input arrived since the timer was set
+            self._schedule()
+
+    def _trigger(self, now):
+        self._armed     =   False
+        self._stopping  =   True
+
+        try:
+            self._logger.warning("No input for " + str(self._timeout) + "s, stopping")
+            self._handler.move(IH.STOP)
+        finally:
+            self._stopping = False
+
+        self.triggered += 1
+        self.latency.record(now - self._deadline)
@@ -1 +1,25 @@
 __author__ = 'pjp'
+
+################################################################
+# Importing the package imports none of its modules, so a service only pays for those it uses. The modules are
+# imported on first use, either as usual (import skid_steering.Fleet) or as attributes (skid_steering.Fleet).
+#
+# For the fastest start, TableCache.cached_handler() imports only Configuration, InputHandler, MotorState and
+# TransitionTable, and loads the transition table cached by an earlier run.
+_MODULES = ("Analytic", "Coalescer", "Configuration", "ControlLoop", "Fleet", "Fuzzer", "InputHandler",
+            "KeyboardReader", "KeyMap", "Latency", "MotorState", "Odometry", "OutputSink", "Planning", "Ramp",
+            "Scheduler", "SessionLog", "SharedState", "StateExplorer", "Statistics", "TableCache", "TransitionTable",
+            "Watchdog")
+
+
+def __getattr__(name):
+    if name in _MODULES:
+        import importlib
+
+        return importlib.import_module("skid_steering." + name)
+
+    raise AttributeError("module 'skid_steering' has no attribute '" + name + "'")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_MODULES))
@@ -0,0 +1,54 @@
+"""
+Timing of a ControlLoop running an InputHandler in real time, with keys posted from another thread.
+
+python -m skid_steering.benchmarks.bench_control_loop [seconds] [rate] [cpu]
+
+Runs at rate ticks per second (200 unless given), pinned to the CPU core if one is given, and prints the jitter, tick
+durations and overruns. The handler traces, as the default InputHandler does, with the logger disabled.
+"""
+__author__ = 'pjp'
+
+import logging
+import random
+import sys
+import threading
+
+import skid_steering.ControlLoop as CL
+import skid_steering.InputHandler as IH
+
+
+def post_keys(loop, stopped, rate):
+    """
+    Post random keys, about rate a second, until stopped is set
+    """
+    rnd = random.Random(0)
+
+    while not stopped.wait(1.0 / rate):
+        loop.post(rnd.choice(IH.KEYS))
+
+
+def main(argv):
+    seconds =   float(argv[1]) if len(argv) > 1 else 5.0
+    rate    =   int(argv[2]) if len(argv) > 2 else 200
+    cpu     =   int(argv[3]) if len(argv) > 3 else None
+
+    logging.getLogger("SkidSteering.InputHandler").setLevel(logging.CRITICAL)
+
+    ih      =   IH.InputHandler(0, 100, 10)
+    loop    =   CL.ControlLoop(ih, 1.0 / rate, cpu=cpu)
+    stopped =   threading.Event()
+
+    poster  =   threading.Thread(target=post_keys, args=(loop, stopped, 50), daemon=True)
+    poster.start()
+
+    try:
+        loop.run(int(seconds * rate))
+    finally:
+        stopped.set()
+        poster.join()
+
+    print(loop)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
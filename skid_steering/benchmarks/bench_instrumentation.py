@@ -0,0 +1,74 @@
+"""
+Per keypress cost of InputHandler.move in each instrumentation mode.
+
+python -m skid_steering.benchmarks.bench_instrumentation [keypresses]
+
+Each mode is timed twice: with the logger disabled (as on the vehicle) and with it enabled at DEBUG writing to a
+handler that discards the records, so the cost of the string formatting and of the logging itself can be seen. The
+last line is with move latency histograms (Latency.MoveLatency) recording, and no logging.
+"""
+__author__ = 'pjp'
+
+import logging
+import sys
+import time
+
+import skid_steering.InputHandler as IH
+import skid_steering.Latency as L
+from skid_steering.benchmarks.common import DiscardHandler
+
+# A drive that spins, turns, runs straight and sits at the limits
+KEYS = [IH.FORWARD, IH.FORWARD, IH.FORWARD, IH.FORWARD, IH.LEFT, IH.LEFT, IH.RIGHT, IH.RIGHT, IH.RIGHT, IH.FORWARD,
+        IH.BACK, IH.BACK, IH.BACK, IH.BACK, IH.BACK, IH.LEFT, IH.BACK, IH.STOP, IH.LEFT, IH.LEFT, IH.RIGHT, IH.STOP]
+
+
+def time_moves(ih, keypresses):
+    """
+    Time moving the handler through the drive repeatedly.
+    :param ih: The handler to move
+    :param keypresses: The number of keys to press
+    :return: Nanoseconds per keypress
+    """
+    keys    =   (KEYS * (keypresses // len(KEYS) + 1))[:keypresses]
+    move    =   ih.move
+
+    start = time.perf_counter()
+    for key in keys:
+        move(key)
+    elapsed = time.perf_counter() - start
+
+    return elapsed * 1e9 / keypresses
+
+
+def main(argv):
+    keypresses  =   int(argv[1]) if len(argv) > 1 else 100000
+
+    logger      =   logging.getLogger("SkidSteering.InputHandler")
+    logger.propagate = False
+
+    handler     =   DiscardHandler()
+
+    print("%-10s %20s %20s" % ("mode", "logging disabled", "logging at DEBUG"))
+
+    # Verified skips the internal consistency check, except when tracing
+    runs = [(mode, mode, False) for mode in IH.INSTRUMENTATION_MODES] + [("verified", IH.INSTRUMENTATION_OFF, True)]
+
+    for name, mode, verified in runs:
+        logger.setLevel(logging.CRITICAL)
+        disabled = time_moves(IH.InputHandler(0, 35, 10, mode, verified), keypresses)
+
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(handler)
+        enabled = time_moves(IH.InputHandler(0, 35, 10, mode, verified), keypresses)
+        logger.removeHandler(handler)
+
+        print("%-10s %17.0f ns %17.0f ns" % (name, disabled, enabled))
+
+    ih = IH.InputHandler(0, 35, 10, IH.INSTRUMENTATION_OFF)
+    ih.set_move_latency(L.MoveLatency())
+
+    print("%-10s %17.0f ns" % ("latency", time_moves(ih, keypresses)))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,83 @@
+"""
+Memory and throughput of the slotted InputHandler against the same class with a per instance __dict__ (as it was), and
+of returning interned MotorState values against building tuples.
+
+python -m skid_steering.benchmarks.bench_motor_state [handlers] [keypresses]
+"""
+__author__ = 'pjp'
+
+import sys
+import time
+import tracemalloc
+
+import skid_steering.InputHandler as IH
+from skid_steering.MotorState import MotorState
+
+
+def unslotted(handler_class):
+    """
+
+    :return: A copy of the handler class that keeps its attributes in a per instance __dict__
+    """
+    slots       =   set(handler_class.__slots__)
+    namespace   =   dict((name, value) for name, value in handler_class.__dict__.items()
+                         if name not in slots and name not in ("__slots__", "__dict__", "__weakref__"))
+
+    return type("Unslotted" + handler_class.__name__, handler_class.__bases__, namespace)
+
+
+def memory_per_handler(handler_class, handlers):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    kept = [handler_class(0, 35, 10, IH.INSTRUMENTATION_OFF) for i in range(handlers)]
+
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return (after - before) / len(kept)
+
+
+def moves_per_second(handler_class, keypresses):
+    ih      =   handler_class(0, 35, 10, IH.INSTRUMENTATION_OFF, True)
+    move    =   ih.move
+    keys    =   ([IH.FORWARD] * 4 + [IH.LEFT] * 3 + [IH.BACK] * 8 + [IH.RIGHT] * 3 + [IH.STOP]) * (keypresses // 19 + 1)
+
+    start = time.perf_counter()
+    for key in keys:
+        move(key)
+
+    return len(keys) / (time.perf_counter() - start)
+
+
+def states_per_second(build, count):
+    values = [(left, right) for left in range(-30, 40, 10) for right in range(-30, 40, 10)]
+    values = values * (count // len(values) + 1)
+
+    start = time.perf_counter()
+    for left, right in values:
+        build(left, right)
+
+    return len(values) / (time.perf_counter() - start)
+
+
+def main(argv):
+    handlers    =   int(argv[1]) if len(argv) > 1 else 100000
+    keypresses  =   int(argv[2]) if len(argv) > 2 else 200000
+
+    classes = [("slotted", IH.InputHandler), ("__dict__", unslotted(IH.InputHandler))]
+
+    print("%-10s %20s %20s" % ("handler", "bytes per handler", "moves per second"))
+    for name, handler_class in classes:
+        print("%-10s %20.0f %20.0f" % (name, memory_per_handler(handler_class, handlers),
+                                       moves_per_second(handler_class, keypresses)))
+
+    print()
+    print("%-10s %20s" % ("state", "per second"))
+    print("%-10s %20.0f" % ("tuple", states_per_second(lambda left, right: (left, right), keypresses)))
+    print("%-10s %20.0f" % ("MotorState", states_per_second(MotorState, keypresses)))
+    print("%-10s %20.0f" % ("interned", states_per_second(IH.motor_state, keypresses)))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,224 @@
+"""
+InputHandler.move throughput and per call latency, by key type, configuration and logging level.
+
+python -m skid_steering.benchmarks.bench_move [--output results.json] [--compare previous.json]
+
+Each key type is one branch of the steering logic, measured from a fixed motor state so every call takes the same path
+    spin        LEFT when stopped
+    turn        LEFT when moving forward
+    straight    FORWARD when moving forward
+    limit       FORWARD at full speed forward (a no-op)
+
+Logging is
+    debug       the logger at DEBUG, the records formatted and discarded
+    info        the logger at INFO, the records formatted and discarded
+    disabled    the logger disabled (the strings are still built)
+    off         the handler in INSTRUMENTATION_OFF mode (the only one the table and analytic engines are measured in)
+
+The results are written as JSON so that runs on different commits can be compared with --compare.
+"""
+__author__ = 'pjp'
+
+import argparse
+import json
+import logging
+import platform
+import sys
+import time
+
+import skid_steering.InputHandler as IH
+from skid_steering.benchmarks.common import DiscardHandler, percentile, git_revision
+
+CONFIGS     =   [(0, 25, 10), (0, 35, 10), (0, 1000, 1)]
+LOGGING     =   ["debug", "info", "disabled", "off"]
+KEY_TYPES   =   ["spin", "turn", "straight", "limit"]
+ENGINES     =   ["reference", "table", "analytic"]
+
+LEVELS      =   {"debug": logging.DEBUG, "info": logging.INFO, "disabled": logging.CRITICAL, "off": logging.CRITICAL}
+
+
+def scenario(config, key_type):
+    """
+    The motor state to start from and the key to press, for a key type
+    :return: (left, right, key)
+    """
+    min_motor_value, max_motor_value, step_value = config
+
+    # The fastest forward speed reachable
+    top = min_motor_value
+    while top + step_value <= max_motor_value:
+        top += step_value
+
+    return {
+        "spin":     (min_motor_value, min_motor_value, IH.LEFT),
+        "turn":     (min_motor_value + step_value, min_motor_value + step_value, IH.LEFT),
+        "straight": (min_motor_value + step_value, min_motor_value + step_value, IH.FORWARD),
+        "limit":    (top, top, IH.FORWARD),
+    }[key_type]
+
+
+def make_handler(engine, config, instrumentation):
+    if engine == "table":
+        # Imported here so the reference runs do not pay for it
+        import skid_steering.TransitionTable as TT
+
+        return TT.TableInputHandler(*config, instrumentation=instrumentation)
+
+    if engine == "analytic":
+        import skid_steering.Analytic as A
+
+        return A.AnalyticInputHandler(*config, instrumentation=instrumentation)
+
+    return IH.InputHandler(*config, instrumentation=instrumentation)
+
+
+def measure(ih, left, right, key, calls):
+    """
+    Time moving from the same motor state repeatedly
+    :return: (total seconds, sorted per call nanoseconds)
+    """
+    move    =   ih.move
+    clock   =   time.perf_counter_ns
+
+    if hasattr(ih, "_table"):
+        state = ih._table.state_of(left, right)
+
+        def reset():
+            ih._state = state
+    elif hasattr(ih, "_transitions"):
+        left_index  =   ih._transitions.index_of(left)
+        right_index =   ih._transitions.index_of(right)
+
+        def reset():
+            ih._left_index      =   left_index
+            ih._right_index     =   right_index
+    else:
+        def reset():
+            ih._current_motor_left_value    =   left
+            ih._current_motor_right_value   =   right
+
+    samples = [0] * calls
+
+    total = 0
+    for call in range(calls):
+        reset()
+
+        start = clock()
+        move(key)
+        samples[call] = clock() - start
+
+        total += samples[call]
+
+    samples.sort()
+
+    return total / 1e9, samples
+
+
+def run(configs, engines, logging_modes, key_types, calls):
+    logger = logging.getLogger("SkidSteering.InputHandler")
+    level = logger.level
+    logger.propagate = False
+
+    handler = DiscardHandler()
+    logger.addHandler(handler)
+
+    results = []
+
+    try:
+        for config in configs:
+            for engine in engines:
+                for logging_mode in logging_modes:
+                    if engine != "reference" and logging_mode != "off":
+                        # Only the reference traces the steering logic
+                        continue
+
+                    logger.setLevel(LEVELS[logging_mode])
+
+                    instrumentation = IH.INSTRUMENTATION_OFF if logging_mode == "off" else IH.INSTRUMENTATION_TRACE
+                    ih = make_handler(engine, config, instrumentation)
+
+                    for key_type in key_types:
+                        left, right, key = scenario(config, key_type)
+
+                        total, samples = measure(ih, left, right, key, calls)
+
+                        results.append({
+                            "config":           list(config),
+                            "engine":           engine,
+                            "logging":          logging_mode,
+                            "key_type":         key_type,
+                            "calls":            calls,
+                            "per_second":       calls / total,
+                            "p50_ns":           percentile(samples, 0.50),
+                            "p90_ns":           percentile(samples, 0.90),
+                            "p99_ns":           percentile(samples, 0.99),
+                            "max_ns":           samples[-1],
+                        })
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(level)
+        logger.propagate = True
+
+    return results
+
+
+def result_key(result):
+    return tuple(result["config"]), result["engine"], result["logging"], result["key_type"]
+
+
+def report(results, previous=None):
+    baseline = {}
+    if previous is not None:
+        baseline = dict((result_key(result), result) for result in previous["results"])
+
+    print("%-14s %-9s %-8s %-8s %12s %9s %9s %9s" % (
+        "config", "engine", "logging", "key", "per second", "p50 ns", "p99 ns", "vs prev"))
+
+    for result in results:
+        before  =   baseline.get(result_key(result))
+        ratio   =   "%8.2fx" % (result["per_second"] / before["per_second"]) if before else ""
+
+        print("%-14s %-9s %-8s %-8s %12.0f %9d %9d %9s" % (
+            str(tuple(result["config"])), result["engine"], result["logging"], result["key_type"],
+            result["per_second"], result["p50_ns"], result["p99_ns"], ratio))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="bench_move", description="InputHandler.move throughput and latency")
+    parser.add_argument("--calls", type=int, default=20000, help="moves per measurement")
+    parser.add_argument("--engine", action="append", choices=ENGINES,
+                        help="engine to measure, may be repeated (default reference)")
+    parser.add_argument("--config", action="append", help="min,max,step - may be repeated (default the standard set)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    arguments = parser.parse_args(argv[1:])
+
+    configs = CONFIGS
+    if arguments.config:
+        configs = [tuple(int(value) for value in config.split(",")) for config in arguments.config]
+
+    results = run(configs, arguments.engine or ["reference"], LOGGING, KEY_TYPES, arguments.calls)
+
+    previous = None
+    if arguments.compare:
+        with open(arguments.compare) as file:
+            previous = json.load(file)
+
+    report(results, previous)
+
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump({
+                "benchmark":    "bench_move",
+                "revision":     git_revision(),
+                "time":         time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python":       platform.python_version(),
+                "platform":     platform.platform(),
+                "results":      results,
+            }, file, indent=1)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
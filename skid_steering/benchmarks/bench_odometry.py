@@ -0,0 +1,76 @@
+"""
+Dead reckoning a recorded trajectory with Odometry.integrate(), with and without NumPy, and the cost of the real time
+Odometry per change of the motor values.
+
+python -m skid_steering.benchmarks.bench_odometry [samples]
+
+The trajectory is a random drive sampled at 100 Hz. Without NumPy a tenth of the samples are integrated and the rate
+scaled up.
+"""
+__author__ = 'pjp'
+
+import random
+import sys
+import time
+
+import skid_steering.Odometry as O
+
+WHEEL_BASE  =   0.2
+SCALE       =   0.5 / 100
+
+
+def trajectory(samples, seed=0):
+    """
+
+    :return: (times, lefts, rights) of a random drive
+    """
+    rnd     =   random.Random(seed)
+    times   =   [index * 0.01 for index in range(samples)]
+    lefts   =   [rnd.randrange(-100, 101, 10) for index in range(samples)]
+    rights  =   [rnd.randrange(-100, 101, 10) for index in range(samples)]
+
+    return times, lefts, rights
+
+
+def main(argv):
+    samples = int(argv[1]) if len(argv) > 1 else 2000000
+
+    times, lefts, rights = trajectory(samples)
+
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+
+    print("%-10s %12s %16s" % ("path", "samples", "samples/second"))
+
+    if numpy is not None:
+        arrays = numpy.array(times), numpy.array(lefts), numpy.array(rights)
+
+        start = time.perf_counter()
+        O.integrate(arrays[0], arrays[1], arrays[2], WHEEL_BASE, SCALE, use_numpy=True)
+        elapsed = time.perf_counter() - start
+
+        print("%-10s %12d %16.0f" % ("numpy", samples, samples / elapsed))
+
+    count = max(samples // 10, 2)
+
+    start = time.perf_counter()
+    O.integrate(times[:count], lefts[:count], rights[:count], WHEEL_BASE, SCALE, use_numpy=False)
+    elapsed = time.perf_counter() - start
+
+    print("%-10s %12d %16.0f" % ("python", count, count / elapsed))
+
+    odometry = O.Odometry(WHEEL_BASE, SCALE)
+    write = odometry.write
+
+    start = time.perf_counter()
+    for index in range(count):
+        write(lefts[index], rights[index])
+    elapsed = time.perf_counter() - start
+
+    print("%-10s %12d %16.0f" % ("realtime", count, count / elapsed))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
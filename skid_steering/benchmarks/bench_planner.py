@@ -0,0 +1,49 @@
+"""
+Cost of Planning.KeyPlanner: building it, the first plan for a target (the search back from it) and the plans after
+(following its index).
+
+python -m skid_steering.benchmarks.bench_planner [plans]
+"""
+__author__ = 'pjp'
+
+import random
+import sys
+import time
+
+import skid_steering.Planning as P
+
+CONFIGS = [(0, 100, 20), (0, 1000, 10)]
+
+
+def main(argv):
+    plans = int(argv[1]) if len(argv) > 1 else 100000
+
+    print("%-14s %8s %10s %14s %10s %10s" % ("config", "states", "build ms", "first plan ms", "plan us", "keys"))
+
+    for config in CONFIGS:
+        rnd = random.Random(0)
+
+        start = time.perf_counter()
+        planner = P.KeyPlanner(*config)
+        built = time.perf_counter() - start
+
+        table   =   planner.table
+        target  =   table.states[len(table) // 2]
+
+        start = time.perf_counter()
+        planner.plan(table.states[0], target)
+        first = time.perf_counter() - start
+
+        starts = [table.states[rnd.randrange(len(table))] for count in range(plans)]
+        plan = planner.plan
+
+        start = time.perf_counter()
+        keys = sum(len(plan(state, target).keys) for state in starts)
+        elapsed = time.perf_counter() - start
+
+        print("%-14s %8d %10.1f %14.2f %10.2f %10.1f" % (str(config), len(table), built * 1000, first * 1000,
+                                                           elapsed * 1e6 / plans, keys / float(plans)))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,62 @@
+"""
+Cost of a MotorRamp tick, ramping and settled, and the memory allocated per tick.
+
+python -m skid_steering.benchmarks.bench_ramp [ticks]
+
+At 200 Hz a tick has a 5 ms budget.
+"""
+__author__ = 'pjp'
+
+import sys
+import time
+import tracemalloc
+
+import skid_steering.OutputSink as OS
+import skid_steering.Ramp as R
+
+
+class NullSink(OS.OutputSink):
+    def write(self, left, right):
+        pass
+
+
+def time_ticks(ramp, ticks, ramping):
+    tick = ramp.tick
+
+    start = time.perf_counter()
+    for count in range(ticks):
+        if ramping:
+            # Swap the targets so the ramp never settles
+            ramp.target_left    =   -ramp.target_left
+            ramp.target_right   =   -ramp.target_right
+        tick()
+
+    return (time.perf_counter() - start) * 1e9 / ticks
+
+
+def allocated_per_tick(ramp, ticks):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    for count in range(ticks):
+        ramp.tick()
+
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    return allocated / ticks
+
+
+def main(argv):
+    ticks = int(argv[1]) if len(argv) > 1 else 200000
+
+    ramp = R.MotorRamp(NullSink(), 2000, 1.0 / 200)
+    ramp.publish(100, 100)
+
+    print("ramping  %8.0f ns per tick" % time_ticks(ramp, ticks, True))
+    print("settled  %8.0f ns per tick" % time_ticks(ramp, ticks, False))
+    print("settled  %8.1f bytes retained per tick" % allocated_per_tick(ramp, ticks))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
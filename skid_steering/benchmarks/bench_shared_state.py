@@ -0,0 +1,111 @@
+"""
+Latency of motor values from a writer process to a reader process, through a SharedMotorState block compared with a
+multiprocessing Pipe (pickling each pair).
+
+python -m skid_steering.benchmarks.bench_shared_state [writes]
+
+The writer sends a pair every 100 us, the left value is a write number and the right the time it was written
+(perf_counter microseconds, a system wide clock on Linux). The shared memory reader spins on read(), so its latency is
+from the write to the first read that sees it. Run it on a machine with at least two CPUs, on one the spinning reader
+and the writer take turns and most writes are never seen.
+"""
+__author__ = 'pjp'
+
+import multiprocessing
+import sys
+import time
+
+import skid_steering.SharedState as SS
+from skid_steering.benchmarks.common import percentile
+
+INTERVAL = 100e-6
+
+
+def _microseconds():
+    return int(time.perf_counter() * 1e6) & 0x7fffffff
+
+
+def _wait_until(deadline):
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _shared_writer(name, writes):
+    shared = SS.SharedMotorState(name, create=False)
+
+    deadline = time.perf_counter()
+    for count in range(1, writes + 1):
+        deadline += INTERVAL
+        _wait_until(deadline)
+        shared.write(count, _microseconds())
+
+    shared.close()
+
+
+def _pipe_writer(connection, writes):
+    deadline = time.perf_counter()
+    for count in range(1, writes + 1):
+        deadline += INTERVAL
+        _wait_until(deadline)
+        connection.send((count, _microseconds()))
+
+    connection.close()
+
+
+def shared_latencies(writes):
+    shared  =   SS.SharedMotorState()
+    writer  =   multiprocessing.Process(target=_shared_writer, args=(shared.name, writes))
+
+    latencies   =   []
+    last        =   0
+    read        =   shared.read
+
+    writer.start()
+    while last < writes:
+        sequence, count, written = read()
+        if count != last:
+            latencies.append(_microseconds() - written)
+            last = count
+    writer.join()
+
+    retries = shared.retries
+    shared.close()
+
+    return latencies, retries
+
+
+def pipe_latencies(writes):
+    reader, sender  =   multiprocessing.Pipe(duplex=False)
+    writer          =   multiprocessing.Process(target=_pipe_writer, args=(sender, writes))
+
+    latencies = []
+
+    writer.start()
+    sender.close()
+    for count in range(writes):
+        count, written = reader.recv()
+        latencies.append(_microseconds() - written)
+    writer.join()
+
+    reader.close()
+
+    return latencies
+
+
+def report(name, latencies, note=""):
+    latencies.sort()
+
+    print("%-8s %6d reads  p50 %6.1f us  p99 %6.1f us  max %6.1f us  %s" %
+          (name, len(latencies), percentile(latencies, 0.5), percentile(latencies, 0.99), latencies[-1], note))
+
+
+def main(argv):
+    writes = int(argv[1]) if len(argv) > 1 else 20000
+
+    latencies, retries = shared_latencies(writes)
+    report("shared", latencies, str(retries) + " retries")
+    report("pipe", pipe_latencies(writes))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
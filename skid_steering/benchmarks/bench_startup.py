@@ -0,0 +1,90 @@
+"""
+Cold start: the time for a new Python process to import the package, make a handler and make its first move().
+
+python -m skid_steering.benchmarks.bench_startup [runs]
+
+Each way of starting is run in new processes (the median of the runs is shown). cached-cold starts with an empty table
+cache, cached-warm with the table cached by an earlier run.
+"""
+__author__ = 'pjp'
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+CONFIGS = [(0, 100, 20), (0, 1000, 10)]
+
+# Run in the new process, with the configuration and the cache directory as arguments. Prints the seconds from the
+# start of the script to the imports being done, the handler being made and the first move being made.
+SCRIPT = """
+import sys, time
+start = time.perf_counter()
+min_motor_value, max_motor_value, step_value = map(int, sys.argv[2:5])
+if sys.argv[1] == "reference":
+    import skid_steering.InputHandler as IH
+    imported = time.perf_counter()
+    ih = IH.InputHandler(min_motor_value, max_motor_value, step_value, IH.INSTRUMENTATION_OFF)
+elif sys.argv[1] == "reference-trace":
+    import skid_steering.InputHandler as IH
+    imported = time.perf_counter()
+    ih = IH.InputHandler(min_motor_value, max_motor_value, step_value)
+elif sys.argv[1] == "table":
+    import skid_steering.InputHandler as IH
+    import skid_steering.TransitionTable as TT
+    imported = time.perf_counter()
+    ih = TT.TableInputHandler(min_motor_value, max_motor_value, step_value, instrumentation=IH.INSTRUMENTATION_OFF)
+else:
+    import skid_steering.TableCache as TC
+    imported = time.perf_counter()
+    ih = TC.cached_handler(min_motor_value, max_motor_value, step_value, directory=sys.argv[5])
+made = time.perf_counter()
+ih.move(8)
+moved = time.perf_counter()
+print(imported - start, made - start, moved - start)
+"""
+
+WAYS = ["reference", "reference-trace", "table", "cached-cold", "cached-warm"]
+
+
+def start(way, config, directory):
+    """
+    Start a process
+    :return: (process seconds, import seconds, handler made seconds, first move seconds)
+    """
+    if way == "cached-cold":
+        shutil.rmtree(directory, ignore_errors=True)
+
+    command = [sys.executable, "-c", SCRIPT, way] + [str(value) for value in config] + [directory]
+
+    begin   =   time.perf_counter()
+    output  =   subprocess.run(command, check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+    elapsed =   time.perf_counter() - begin
+
+    return (elapsed,) + tuple(float(value) for value in output.split())
+
+
+def main(argv):
+    runs        =   int(argv[1]) if len(argv) > 1 else 20
+    directory   =   os.path.join(tempfile.mkdtemp(), "cache")
+
+    print("%-14s %-16s %10s %10s %10s %10s" % ("config", "start", "process ms", "import ms", "made ms", "moved ms"))
+
+    try:
+        for config in CONFIGS:
+            for way in WAYS:
+                if way == "cached-warm":
+                    start("cached-cold", config, directory)
+
+                times = [start(way, config, directory) for run in range(runs)]
+                times = [sorted(column)[len(column) // 2] * 1000 for column in zip(*times)]
+
+                print("%-14s %-16s %10.1f %10.1f %10.1f %10.1f" % tuple([str(config), way] + times))
+    finally:
+        shutil.rmtree(os.path.dirname(directory), ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,34 @@
+__author__ = 'pjp'
+
+import logging
+import subprocess
+
+
+class DiscardHandler(logging.Handler):
+    def emit(self, record):
+        # Format it, as a real handler would
+        self.format(record)
+
+
+def percentile(ordered, fraction):
+    """
+
+    :param ordered: Sorted samples
+    :param fraction: 0.0 .. 1.0
+    :return: The sample at the fraction (nearest rank)
+    """
+    if not ordered:
+        return 0
+
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def git_revision():
+    """
+
+    :return: The commit being benchmarked, or None if not known
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
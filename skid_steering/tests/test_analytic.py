@@ -0,0 +1,106 @@
+__author__ = 'pjp'
+
+import random
+import unittest as ut
+
+import skid_steering.Analytic as A
+import skid_steering.InputHandler as IH
+
+CONFIGS = [(0, 25, 10), (0, 35, 10), (0, 29, 10), (0, 100, 20), (0, 30, 7), (5, 30, 10), (-20, 30, 7), (0, 1, 1),
+           (-7, 3, 2), (10, 100, 3)]
+
+
+class TestAnalytic(ut.TestCase):
+
+    def test_every_grid_state_matches_reference(self):
+        for config in CONFIGS:
+            A.verify_transitions(A.StepTransitions(*config))
+
+    def test_large_grid_matches_reference(self):
+        # Too large to check every state, the states near each threshold and a random sample are checked
+        self.assertTrue(A.verify_transitions(A.StepTransitions(0, 65535, 1), samples=5000) > 5000)
+
+    def test_differs_from_reference(self):
+        transitions = A.StepTransitions(0, 29, 10)
+        transitions.spin_limit += 1
+
+        self.assertRaises(Exception, A.verify_transitions, transitions)
+
+    def test_thresholds(self):
+        transitions = A.StepTransitions(0, 100, 20)
+
+        self.assertEqual(0, transitions.zero)
+        self.assertEqual(0, transitions.spin_sum)
+        self.assertEqual(5, transitions.forward_limit)
+        self.assertEqual(-5, transitions.reverse_limit)
+
+        # 0 is not on the grid
+        transitions = A.StepTransitions(5, 30, 10)
+
+        self.assertEqual(None, transitions.zero)
+        self.assertEqual(-1, transitions.spin_sum)
+
+    def test_matches_reference(self):
+        rnd = random.Random(1234)
+
+        for config in CONFIGS:
+            reference   =   IH.InputHandler(*config, instrumentation=IH.INSTRUMENTATION_OFF)
+            ih          =   A.AnalyticInputHandler(*config)
+
+            for i in range(2000):
+                key = rnd.choice(IH.KEYS)
+
+                try:
+                    expected = reference.move(key)
+                except Exception as e:
+                    self.assertRaisesRegex(Exception, str(e)[:40], ih.move, key)
+                else:
+                    self.assertEqual(expected, ih.move(key))
+
+                self.assertEqual(
+                    (reference.left_motor_value(), reference.right_motor_value()),
+                    (ih.left_motor_value(), ih.right_motor_value()),
+                    "Config " + str(config) + " diverged at key " + str(i))
+
+    def test_large_grid(self):
+        ih  =   A.AnalyticInputHandler(0, 65535, 1)
+
+        self.assertEqual((1, 1), ih.move(IH.FORWARD))
+        self.assertEqual((1, 2), ih.move(IH.LEFT))
+
+        # At full speed
+        transitions =   ih._transitions
+        top         =   transitions.index_of(65535)
+
+        self.assertEqual((top, top), transitions.forward(top, top))
+        self.assertEqual((top, top - 1), transitions.right(top, top))
+        self.assertEqual((top, top), transitions.forward(top, top - 1))
+        self.assertEqual((0, 0), transitions.stop(top, top))
+
+    def test_instrumentation(self):
+        self.assertEqual(None, A.AnalyticInputHandler(0, 25, 10)._logger)
+        self.assertRaises(Exception, A.AnalyticInputHandler, 0, 25, 10, instrumentation=IH.INSTRUMENTATION_TRACE)
+
+    def test_bad_input(self):
+        ih = A.AnalyticInputHandler(0, 100, 20)
+
+        self.assertRaises(Exception, ih.move, 999)
+        self.assertRaises(Exception, ih.move, None)
+        self.assertRaises(Exception, ih.move, [IH.FORWARD])
+
+    def test_shared_transitions(self):
+        transitions = A.StepTransitions(0, 25, 10)
+
+        ih1 = A.AnalyticInputHandler(0, 25, 10, transitions)
+        ih2 = A.AnalyticInputHandler(0, 25, 10, transitions)
+
+        ih1.move(IH.FORWARD)
+        self.assertEqual(10, ih1.left_motor_value())
+        self.assertEqual(0, ih2.left_motor_value())
+
+        self.assertRaises(Exception, A.AnalyticInputHandler, 0, 35, 10, transitions)
+        self.assertRaises(Exception, A.StepTransitions, 1, 0, 0)
+
+
+if __name__ == '__main__':
+    ut.main()
@@ -0,0 +1,34 @@
+__author__ = 'pjp'
+
+import unittest as ut
+
+import skid_steering.InputHandler as IH
+import skid_steering.benchmarks.bench_move as BM
+
+
+class TestBenchMove(ut.TestCase):
+
+    def test_scenarios(self):
+        for key_type in BM.KEY_TYPES:
+            left, right, key = BM.scenario((0, 25, 10), key_type)
+
+            ih = IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_OFF)
+            ih._current_motor_left_value    =   left
+            ih._current_motor_right_value   =   right
+
+            before = ih.motor_state()
+            after = ih.move(key)
+
+            if key_type == "limit":
+                self.assertEqual(before, after)
+            else:
+                self.assertNotEqual(before, after)
+
+    def test_run(self):
+        results = BM.run([(0, 25, 10)], BM.ENGINES, ["disabled", "off"], BM.KEY_TYPES, 10)
+
+        # Only the reference logs, the other engines are only run with logging off
+        self.assertEqual((len(BM.ENGINES) + 1) * len(BM.KEY_TYPES), len(results))
+        self.assertEqual({"off"}, set(result["logging"] for result in results if result["engine"] != "reference"))
+        self.assertTrue(all(result["per_second"] > 0 for result in results))
+        self.assertTrue(all(result["p50_ns"] <= result["p99_ns"] <= result["max_ns"] for result in results))
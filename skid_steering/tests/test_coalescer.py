@@ -0,0 +1,80 @@
+__author__ = 'pjp'
+
+import random
+import unittest as ut
+
+import skid_steering.InputHandler as IH
+import skid_steering.TransitionTable as TT
+import skid_steering.Coalescer as C
+
+
+class TestCoalescer(ut.TestCase):
+
+    def test_held_forward(self):
+        ih = IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_OFF)
+        coalescer = C.Coalescer(ih)
+
+        self.assertEqual((20, 20), coalescer.coalesce([IH.FORWARD] * 30))
+
+        # Two steps to the limit, one to find it is the limit
+        self.assertEqual(3, coalescer.accepted)
+        self.assertEqual(27, coalescer.dropped)
+
+    def test_stop_when_stopped(self):
+        ih = IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_OFF)
+        coalescer = C.Coalescer(ih)
+
+        coalescer.coalesce([IH.STOP, IH.STOP, IH.FORWARD, IH.STOP, IH.STOP])
+
+        self.assertEqual(2, coalescer.accepted)
+        self.assertEqual(3, coalescer.dropped)
+
+    def test_table_driven(self):
+        ih = TT.TableInputHandler(0, 25, 10)
+        coalescer = C.Coalescer(ih)
+
+        coalescer.coalesce([IH.FORWARD] * 30)
+
+        # The table knows the limit without trying it
+        self.assertEqual(2, coalescer.accepted)
+        self.assertEqual(28, coalescer.dropped)
+
+    def test_moved_elsewhere(self):
+        ih = IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_OFF)
+        coalescer = C.Coalescer(ih)
+
+        coalescer.coalesce([IH.FORWARD] * 3)
+        ih.move(IH.STOP)
+
+        self.assertEqual((10, 10), coalescer.coalesce([IH.FORWARD]))
+
+    def test_one_update_per_batch(self):
+        updates = []
+
+        ih = IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_OFF)
+        coalescer = C.Coalescer(ih, lambda left, right: updates.append((left, right)))
+
+        coalescer.push(IH.FORWARD)
+        coalescer.push(IH.FORWARD)
+        coalescer.push(IH.LEFT)
+        coalescer.drain()
+
+        coalescer.coalesce([IH.FORWARD, IH.BACK])
+        coalescer.coalesce([IH.FORWARD] * 5)
+
+        self.assertEqual([(10, 20), (10, 10), (20, 20)], updates)
+
+    def test_matches_input_handler(self):
+        rnd = random.Random(7)
+
+        for handler_class in [IH.InputHandler, TT.TableInputHandler]:
+            reference   =   IH.InputHandler(0, 35, 10, IH.INSTRUMENTATION_OFF)
+            coalescer   =   C.Coalescer(handler_class(0, 35, 10))
+
+            for burst in range(300):
+                keys = [rnd.choice(IH.KEYS)] * rnd.randint(1, 8)
+
+                for key in keys:
+                    reference.move(key)
+
+                self.assertEqual((reference.left_motor_value(), reference.right_motor_value()), coalescer.coalesce(keys))
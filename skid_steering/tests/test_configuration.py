@@ -0,0 +1,98 @@
+__author__ = 'pjp'
+
+import unittest as ut
+
+import skid_steering.Analytic as A
+import skid_steering.Configuration as C
+import skid_steering.InputHandler as IH
+import skid_steering.TransitionTable as TT
+
+
+class TestConfigurationCache(ut.TestCase):
+
+    def test_hits_and_misses(self):
+        cache = C.ConfigurationCache(4)
+
+        config = cache.get(0, 25, 10)
+
+        self.assertTrue(config is cache.get(0, 25, 10))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+        self.assertEqual(1, len(cache))
+        self.assertTrue((0, 25, 10) in cache)
+
+        self.assertEqual(-25, config.reverse_limit)
+        self.assertEqual(15, config.forward_limit)
+        self.assertEqual(-15, config.back_limit)
+
+    def test_lru_eviction(self):
+        cache = C.ConfigurationCache(2)
+
+        cache.get(0, 25, 10)
+        cache.get(0, 35, 10)
+
+        # Used, so (0, 35, 10) is the least recently used
+        cache.get(0, 25, 10)
+        cache.get(0, 45, 10)
+
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.evictions)
+        self.assertTrue((0, 25, 10) in cache)
+        self.assertFalse((0, 35, 10) in cache)
+
+        cache.resize(1)
+        self.assertEqual([(0, 45, 10)], list(cache._entries))
+        self.assertEqual({"size": 1, "entries": 1, "hits": 1, "misses": 3, "evictions": 2}, cache.snapshot())
+
+        cache.clear()
+        self.assertEqual(0, len(cache))
+        self.assertEqual(0, cache.misses)
+
+        self.assertRaises(Exception, C.ConfigurationCache, 0)
+        self.assertRaises(Exception, cache.resize, 0)
+
+    def test_invalid_not_cached(self):
+        cache = C.ConfigurationCache()
+
+        for configuration in [(25, 0, 10), (0, 0, 10), (0, 25, 0), (0, 25, 30)]:
+            self.assertRaises(Exception, cache.get, *configuration)
+
+        self.assertEqual(0, len(cache))
+
+
+class TestSharedConfiguration(ut.TestCase):
+
+    def test_handlers_share(self):
+        first   =   IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_OFF)
+        hits    =   C.CACHE.hits
+        second  =   IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_OFF)
+
+        self.assertTrue(first._config is second._config)
+        self.assertEqual(hits + 1, C.CACHE.hits)
+
+    def test_compiled_data_shared(self):
+        self.assertTrue(TT.TableInputHandler(0, 45, 10)._table is TT.TableInputHandler(0, 45, 10)._table)
+        self.assertTrue(TT.shared_table(0, 45, 10) is C.get_configuration(0, 45, 10).table)
+
+        self.assertTrue(A.AnalyticInputHandler(0, 45, 10)._transitions is
+                        A.AnalyticInputHandler(0, 45, 10)._transitions)
+        self.assertTrue(A.shared_transitions(0, 45, 10) is C.get_configuration(0, 45, 10).transitions)
+
+    def test_evicted(self):
+        size = C.CACHE.size
+
+        try:
+            ih = IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_OFF)
+
+            # Evicted handlers keep their configuration, and move as before
+            C.CACHE.resize(1)
+            C.get_configuration(0, 35, 10)
+
+            self.assertFalse((0, 25, 10) in C.CACHE)
+            self.assertEqual((10, 10), ih.move(IH.FORWARD))
+        finally:
+            C.CACHE.resize(size)
+
+
+if __name__ == '__main__':
+    ut.main()
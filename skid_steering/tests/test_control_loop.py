@@ -0,0 +1,212 @@
+__author__ = 'pjp'
+
+import os
+import unittest as ut
+
+import skid_steering.ControlLoop as CL
+import skid_steering.InputHandler as IH
+import skid_steering.OutputSink as OS
+import skid_steering.Scheduler as S
+import skid_steering.TransitionTable as TT
+
+
+class FailingHandler(IH.InputHandler):
+    """
+    Fails its consistency check turning left, as a steering logic bug would
+    """
+    def move(self, input):
+        if input == IH.LEFT:
+            raise Exception("Internal consistency check failed")
+
+        return IH.InputHandler.move(self, input)
+
+
+class StuckTableHandler(TT.TableInputHandler):
+    """
+    Fails turning left, and cannot stop through move() either
+    """
+    def move(self, input):
+        if input in (IH.LEFT, IH.STOP):
+            raise Exception("Table engine failed")
+
+        return TT.TableInputHandler.move(self, input)
+
+
+class TestControlLoop(ut.TestCase):
+
+    def setUp(self):
+        self.clock  =   S.SimulatedClock()
+        self.ih     =   IH.InputHandler(0, 100, 10, IH.INSTRUMENTATION_OFF)
+
+    def test_drains_once_per_tick(self):
+        moves = []
+
+        def on_tick(now):
+            moves.append(self.ih.motor_state())
+
+        loop = CL.ControlLoop(self.ih, 0.01, on_tick, clock=self.clock, sleep=self.clock.sleep)
+
+        for key in [IH.FORWARD, IH.FORWARD, IH.LEFT]:
+            loop.post(key)
+
+        loop.run(2)
+
+        self.assertEqual([(20, 30), (20, 30)], moves)
+        self.assertEqual(3, loop.moves)
+        self.assertEqual(2, loop.duration.count)
+
+    def test_rejected(self):
+        loop = CL.ControlLoop(self.ih, 0.01, clock=self.clock, sleep=self.clock.sleep)
+
+        for key in [IH.FORWARD, 999, IH.FORWARD]:
+            loop.post(key)
+
+        loop.run(1)
+
+        self.assertEqual((20, 20), self.ih.motor_state())
+        self.assertEqual(2, loop.moves)
+        self.assertEqual(1, loop.rejected)
+
+    def test_failure(self):
+        ih      =   FailingHandler(0, 100, 10, IH.INSTRUMENTATION_OFF)
+        sink    =   OS.MemorySink()
+
+        ih.add_output_sink(sink)
+
+        loop = CL.ControlLoop(ih, 0.01, clock=self.clock, sleep=self.clock.sleep)
+
+        for key in [IH.FORWARD, IH.FORWARD, IH.LEFT]:
+            loop.post(key)
+
+        loop.run(1)
+
+        # Stopped, and still ticking
+        self.assertEqual(1, loop.failures)
+        self.assertEqual("Internal consistency check failed", str(loop.last_failure))
+        self.assertEqual((0, 0), sink.written[-1])
+
+        loop.post(IH.FORWARD)
+        loop.run(1)
+
+        self.assertEqual((10, 10), ih.motor_state())
+        self.assertEqual(3, loop.moves)
+        self.assertEqual(1, loop.snapshot()["failures"])
+
+    def test_failure_stops_engine(self):
+        ih      =   StuckTableHandler(0, 100, 10, instrumentation=IH.INSTRUMENTATION_OFF)
+        sink    =   OS.MemorySink()
+
+        ih.add_output_sink(sink)
+
+        loop = CL.ControlLoop(ih, 0.01, clock=self.clock, sleep=self.clock.sleep)
+
+        for key in [IH.FORWARD, IH.FORWARD, IH.LEFT]:
+            loop.post(key)
+
+        loop.run(1)
+
+        self.assertEqual(1, loop.failures)
+        self.assertEqual((0, 0), ih.motor_state())
+        self.assertEqual((0, 0), sink.written[-1])
+
+        # Carries on from the stopped state, not the table state before the failure
+        loop.post(IH.FORWARD)
+        loop.run(1)
+
+        self.assertEqual((10, 10), ih.motor_state())
+
+    def test_polls_sinks(self):
+        sink = OS.MemorySink(max_rate=10, clock=self.clock)
+        self.ih.add_output_sink(sink)
+
+        loop = CL.ControlLoop(self.ih, 0.01, clock=self.clock, sleep=self.clock.sleep)
+
+        self.clock.advance(1.0)
+        loop.post(IH.FORWARD)
+        loop.run(1)
+
+        # Held back by the rate limit, the last key is a STOP
+        loop.post(IH.STOP)
+        loop.run(1)
+        self.assertEqual([(0, 0), (10, 10)], sink.written)
+
+        # Written by the first tick once the rate allows, 0.1s on
+        loop.run(5)
+        self.assertEqual([(0, 0), (10, 10)], sink.written)
+
+        loop.run(10)
+        self.assertEqual([(0, 0), (10, 10), (0, 0)], sink.written)
+
+    def test_no_drift(self):
+        times = []
+
+        def on_tick(now):
+            times.append(now)
+            self.clock.advance(0.004)
+
+        loop = CL.ControlLoop(self.ih, 0.01, on_tick, clock=self.clock, sleep=self.clock.sleep)
+        loop.run(100)
+
+        self.assertAlmostEqual(0.99, times[-1])
+        self.assertEqual(0, loop.overruns)
+        self.assertAlmostEqual(0.004, loop.duration.maximum)
+        self.assertAlmostEqual(0.0, loop.jitter.maximum)
+
+    def test_jitter(self):
+        # Every sleep is 1ms late
+        def sleep(seconds):
+            self.clock.sleep(seconds + 0.001)
+
+        loop = CL.ControlLoop(self.ih, 0.01, clock=self.clock, sleep=sleep)
+        loop.run(10)
+
+        # The first tick is not slept for
+        self.assertEqual(10, loop.jitter.count)
+        self.assertAlmostEqual(0.0, loop.jitter.minimum)
+        self.assertAlmostEqual(0.001, loop.jitter.maximum)
+        self.assertAlmostEqual(0.0009, loop.jitter.mean())
+        self.assertEqual(0, loop.overruns)
+
+    def test_overruns(self):
+        ticks = []
+
+        def on_tick(now):
+            ticks.append(now)
+            if len(ticks) == 2:
+                self.clock.advance(0.025)
+
+        loop = CL.ControlLoop(self.ih, 0.01, on_tick, clock=self.clock, sleep=self.clock.sleep)
+        loop.run(4)
+
+        self.assertEqual(1, loop.overruns)
+        self.assertEqual(1, loop.scheduler.skipped)
+        self.assertAlmostEqual(0.025, loop.duration.maximum)
+        self.assertAlmostEqual(0.035, ticks[2])
+
+        snapshot = loop.snapshot()
+        self.assertEqual(4, snapshot["ticks"])
+        self.assertEqual(1, snapshot["overruns"])
+        self.assertAlmostEqual(0.025, snapshot["duration"]["maximum"])
+
+        loop.reset()
+        self.assertEqual(0, loop.overruns)
+        self.assertEqual(0, loop.duration.count)
+
+    def test_stop(self):
+        loop = CL.ControlLoop(self.ih, 0.01, lambda now: loop.stop(), clock=self.clock, sleep=self.clock.sleep)
+        loop.run()
+
+        self.assertEqual(1, loop.scheduler.ticks)
+
+    @ut.skipIf(not hasattr(os, "sched_setaffinity"), "CPU pinning is not supported")
+    def test_pinned(self):
+        before  =   os.sched_getaffinity(0)
+        cpu     =   min(before)
+        pinned  =   []
+
+        loop = CL.ControlLoop(self.ih, 0.01, lambda now: pinned.append(os.sched_getaffinity(0)), cpu=cpu,
+                              clock=self.clock, sleep=self.clock.sleep)
+        loop.run(1)
+
+        self.assertEqual([{cpu}], pinned)
+        self.assertEqual(before, os.sched_getaffinity(0))
@@ -0,0 +1,96 @@
+__author__ = 'pjp'
+
+import random
+import unittest as ut
+
+import skid_steering.InputHandler as IH
+import skid_steering.Fleet as F
+
+CONFIGS = [(0, 25, 10), (0, 35, 10), (0, 100, 20), (0, 30, 7), (-20, 30, 7)]
+
+
+class TestFleet(ut.TestCase):
+
+    def test_empty(self):
+        fleet = F.Fleet()
+
+        self.assertEqual(0, len(fleet))
+        fleet.step([])
+        self.assertEqual(0, len(fleet.left_motor_values()))
+
+    def test_add(self):
+        fleet = F.Fleet([(0, 25, 10)])
+
+        self.assertEqual(1, fleet.add(0, 100, 20))
+        self.assertEqual(2, fleet.add(0, 25, 10))
+        self.assertEqual((0, 100, 20), fleet.configuration(1))
+        self.assertEqual(3, len(fleet))
+
+        self.assertRaises(Exception, fleet.add, 0, 1, 2)
+        self.assertEqual(3, len(fleet))
+
+        # The state arrays are of C ints
+        try:
+            fleet.add(0.0, 100.0, 20.0)
+        except TypeError:
+            self.fail("Should have been refused up front")
+        except Exception as e:
+            self.assertTrue("int motor values" in str(e))
+        else:
+            self.fail("Should have thrown an exception")
+
+        self.assertEqual(3, len(fleet))
+        fleet.step([IH.FORWARD] * 3)
+        self.assertEqual([10, 20, 10], list(fleet.left_motor_values()))
+
+    def test_step(self):
+        fleet = F.Fleet([(0, 25, 10), (0, 100, 20)])
+
+        left    =   fleet.left_motor_values()
+        right   =   fleet.right_motor_values()
+
+        fleet.step([IH.FORWARD, IH.LEFT])
+        self.assertEqual([10, -20], left.tolist())
+        self.assertEqual([10, 20], right.tolist())
+
+        fleet.step([IH.LEFT, IH.FORWARD])
+        self.assertEqual(10, fleet.left_motor_value(0))
+        self.assertEqual(20, fleet.right_motor_value(0))
+        self.assertEqual([0, 0], [fleet.left_motor_value(1), fleet.right_motor_value(1)])
+
+        left.release()
+        right.release()
+
+        fleet.stop()
+        self.assertEqual([0, 0], fleet.left_motor_values().tolist())
+
+    def test_bad_keys(self):
+        fleet = F.Fleet([(0, 25, 10)] * 3)
+
+        self.assertRaises(Exception, fleet.step, [IH.FORWARD, IH.FORWARD])
+
+        try:
+            fleet.step([IH.FORWARD, 999, IH.FORWARD])
+        except Exception as e:
+            self.assertTrue(str(e).endswith("at index 1"))
+        else:
+            self.fail("Should have thrown an exception")
+
+        self.assertEqual([0, 0, 0], fleet.left_motor_values().tolist())
+
+    def test_matches_input_handler(self):
+        rnd = random.Random(99)
+
+        configs     =   [rnd.choice(CONFIGS) for i in range(200)]
+        fleet       =   F.Fleet(configs)
+        handlers    =   [IH.InputHandler(*config, instrumentation=IH.INSTRUMENTATION_OFF) for config in configs]
+
+        for tick in range(200):
+            keys = [rnd.choice(IH.KEYS) for handler in handlers]
+
+            fleet.step(keys)
+            for handler, key in zip(handlers, keys):
+                handler.move(key)
+
+            self.assertEqual([handler.left_motor_value() for handler in handlers], fleet.left_motor_values().tolist())
+            self.assertEqual([handler.right_motor_value() for handler in handlers], fleet.right_motor_values().tolist())
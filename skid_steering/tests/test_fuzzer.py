@@ -0,0 +1,83 @@
+__author__ = 'pjp'
+
+import contextlib
+import io
+import unittest as ut
+
+import skid_steering.Analytic as A
+import skid_steering.Fuzzer as F
+import skid_steering.InputHandler as IH
+import skid_steering.TransitionTable as TT
+
+
+class BuggyInputHandler(IH.InputHandler):
+    __slots__ = ()
+
+    def _turn_right(self):
+        # Cannot turn right when moving forward
+        if not (self._is_moving_forward() and self._is_moving() and not self._is_spinning()):
+            IH.InputHandler._turn_right(self)
+
+
+class TestFuzzer(ut.TestCase):
+
+    def setUp(self):
+        F.ENGINES["buggy"] = (BuggyInputHandler, F._moves)
+
+    def tearDown(self):
+        del F.ENGINES["buggy"]
+
+    def test_no_failures(self):
+        fuzzer = F.Fuzzer(["reference-batch", "table", "table-batch", "analytic"], seed=1)
+
+        self.assertEqual([], fuzzer.run(sequences=2000, sequences_per_configuration=100))
+        self.assertEqual(2000, fuzzer.sequences)
+        self.assertTrue(fuzzer.keys >= 2000)
+
+    def test_divergence_is_shrunk(self):
+        failures = F.Fuzzer(["table", "buggy"], seed=2, max_keys=64).run(sequences=10000)
+
+        self.assertEqual(1, len(failures))
+
+        failure = failures[0]
+        self.assertEqual(F.DIVERGENCE, failure.kind)
+        self.assertEqual("buggy", failure.engine)
+        self.assertEqual([IH.FORWARD, IH.RIGHT], failure.keys)
+        self.assertEqual(0, failure.configuration[0])
+        self.assertNotEqual(failure.expected.states[-1], failure.actual.states[-1])
+
+        self.assertTrue("Keys: FORWARD, RIGHT" in F.describe(failure))
+
+    def test_check(self):
+        fuzzer = F.Fuzzer(["buggy"])
+
+        self.assertEqual(None, fuzzer.check((0, 100, 20), [IH.FORWARD, IH.LEFT]))
+        self.assertEqual(F.DIVERGENCE, fuzzer.check((0, 100, 20), [IH.FORWARD, IH.RIGHT]).kind)
+
+    def test_handlers_bounded(self):
+        fuzzer = F.Fuzzer(["table", "analytic"], seed=3)
+        fuzzer.run(sequences=200, sequences_per_configuration=2)
+
+        self.assertEqual(F.MAX_HANDLERS, len(fuzzer._handlers))
+
+        # The tables and transitions are the ones shared by the configuration
+        configuration, handlers = list(fuzzer._handlers.items())[-1]
+
+        self.assertTrue(handlers[1][1]._table is TT.shared_table(*configuration))
+        self.assertTrue(handlers[2][1]._transitions is A.shared_transitions(*configuration))
+
+    def test_bad_engine(self):
+        self.assertRaises(Exception, F.Fuzzer, ["compiled"])
+        self.assertRaises(Exception, F.Fuzzer().run)
+
+    def test_main(self):
+        output = io.StringIO()
+
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(0, F.main(["Fuzzer", "--seconds", "0.2", "--seed", "3", "--jobs", "1", "--engine", "table"]))
+
+        self.assertTrue("sequences per minute" in output.getvalue())
+
+
+if __name__ == '__main__':
+    ut.main()
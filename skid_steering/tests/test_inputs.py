@@ -4,6 +4,7 @@ import unittest as ut
 import logging
 import logging.config
 import os
+import random
 
 import skid_steering.InputHandler as IH
 
@@ -86,6 +87,13 @@ class TestInputs(ut.TestCase):
         else:
             self.fail("Should have thrown an exception")
 
+    def test_bad_input_error_type(self):
+        ih = IH.InputHandler(0, 100, 20)
+
+        self.assertRaises(IH.InvalidInputError, ih.move, 999)
+        self.assertRaises(IH.InvalidInputError, ih.move, None)
+        self.assertRaises(IH.InvalidInputError, IH.validate_keys, [IH.FORWARD, 7])
+
     def test_initial_state(self):
         ih = IH.InputHandler(0, 100, 20)
 
@@ -137,32 +145,6 @@ class TestInputs(ut.TestCase):
         self.assertTrue(ih._is_moving())
         self.assertFalse(ih._is_turning())
 
-    def test_move_forward_boundary_check(self):
-        ih = IH.InputHandler(0, 30, 10)
-
-        ih.move(IH.FORWARD)
-        self.assertEqual(10, ih.left_motor_value())
-        self.assertEqual(10, ih.right_motor_value())
-        self.assertTrue(ih._is_moving())
-        self.assertFalse(ih._is_turning())
-
-        ih.move(IH.FORWARD)
-        self.assertEqual(20, ih.left_motor_value())
-        self.assertEqual(20, ih.right_motor_value())
-        self.assertTrue(ih._is_moving())
-
-        ih.move(IH.FORWARD)
-        self.assertEqual(30, ih.left_motor_value())
-        self.assertEqual(30, ih.right_motor_value())
-        self.assertTrue(ih._is_moving())
-        self.assertFalse(ih._is_turning())
-
-        ih.move(IH.FORWARD)
-        self.assertEqual(30, ih.left_motor_value())
-        self.assertEqual(30, ih.right_motor_value())
-        self.assertTrue(ih._is_moving())
-        self.assertFalse(ih._is_turning())
-
     def test_move_back_boundary_check(self):
         ih = IH.InputHandler(0, 30, 10)
 
@@ -1140,3 +1122,193 @@ class TestInputs(ut.TestCase):
         ih.move(IH.FORWARD)
         self.assertEqual(-10, ih.left_motor_value())
         self.assertEqual(-10, ih.right_motor_value())
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        logging.Handler.__init__(self, logging.DEBUG)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.levelname + " " + record.funcName + " " + record.getMessage())
+
+
+class TestInstrumentation(ut.TestCase):
+
+    def setUp(self):
+        self.recorder   =   RecordingHandler()
+        self.logger     =   logging.getLogger("SkidSteering.InputHandler")
+        self.logger.addHandler(self.recorder)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.recorder)
+
+    def test_bad_instrumentation_mode(self):
+        try:
+            IH.InputHandler(0, 100, 20, "verbose")
+        except Exception:
+            pass
+        else:
+            self.fail("Should have thrown an exception")
+
+    def test_trace(self):
+        ih = IH.InputHandler(0, 25, 10)
+        ih.move(IH.FORWARD)
+
+        self.assertEqual([
+            "INFO _stop Entering",
+            "INFO move Initial motor values: L/R[0, 0]",
+            "INFO move Input: [8]",
+            "INFO _move_forward Entering",
+            "DEBUG _is_stopped True",
+            "DEBUG _is_moving False",
+            "DEBUG _is_spinning False",
+            "DEBUG _is_stopped True",
+            "DEBUG _is_moving False",
+            "DEBUG _is_turning False",
+            "INFO move Current motor values: L/R[10, 10]",
+        ], self.recorder.messages)
+
+    def test_summary(self):
+        ih = IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_SUMMARY)
+        ih.move(IH.FORWARD)
+        ih.move(IH.LEFT)
+        ih.left_motor_value()
+
+        self.assertEqual([
+            "INFO move Input: [8] L/R[0, 0] -> L/R[10, 10]",
+            "INFO move Input: [4] L/R[10, 10] -> L/R[10, 20]",
+        ], self.recorder.messages)
+
+    def test_off(self):
+        ih = IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_OFF)
+
+        for key in [IH.FORWARD, IH.LEFT, IH.RIGHT, IH.BACK, IH.BACK, IH.LEFT, IH.STOP]:
+            ih.move(key)
+
+        self.assertEqual(0, ih.left_motor_value())
+        self.assertEqual(0, ih.right_motor_value())
+        self.assertEqual([], self.recorder.messages)
+
+    def test_modes_agree(self):
+        keys = [IH.FORWARD, IH.FORWARD, IH.LEFT, IH.LEFT, IH.RIGHT, IH.BACK, IH.BACK, IH.BACK, IH.RIGHT, IH.FORWARD]
+
+        values = []
+        for mode in IH.INSTRUMENTATION_MODES:
+            ih = IH.InputHandler(0, 35, 10, mode)
+
+            trajectory = []
+            for key in keys:
+                ih.move(key)
+                trajectory.append((ih.left_motor_value(), ih.right_motor_value()))
+
+            values.append(trajectory)
+
+        self.assertEqual(values[0], values[1])
+        self.assertEqual(values[0], values[2])
+
+
+class TestMoveMany(ut.TestCase):
+
+    def test_move_many(self):
+        keys = [IH.FORWARD, IH.FORWARD, IH.LEFT, IH.LEFT, IH.RIGHT, IH.BACK, IH.BACK, IH.BACK, IH.RIGHT, IH.STOP]
+
+        reference = IH.InputHandler(0, 35, 10)
+
+        expected_left   =   []
+        expected_right  =   []
+        for key in keys:
+            reference.move(key)
+            expected_left.append(reference.left_motor_value())
+            expected_right.append(reference.right_motor_value())
+
+        ih = IH.InputHandler(0, 35, 10)
+        left, right = ih.move_many(iter(keys))
+
+        self.assertEqual('i', left.typecode)
+        self.assertEqual(expected_left, left.tolist())
+        self.assertEqual(expected_right, right.tolist())
+
+    def test_move_many_final_state(self):
+        ih = IH.InputHandler(0, 25, 10)
+        ih.move_many([IH.FORWARD, IH.FORWARD, IH.LEFT])
+
+        self.assertEqual(10, ih.left_motor_value())
+        self.assertEqual(20, ih.right_motor_value())
+
+    def test_move_many_empty(self):
+        ih = IH.InputHandler(0, 25, 10)
+        left, right = ih.move_many([])
+
+        self.assertEqual(0, len(left))
+        self.assertEqual(0, len(right))
+
+    def test_move_many_bad_input(self):
+        ih = IH.InputHandler(0, 25, 10)
+        ih.move(IH.FORWARD)
+
+        try:
+            ih.move_many([IH.FORWARD, IH.LEFT, 999, IH.FORWARD, 7])
+        except Exception as e:
+            self.assertTrue(str(e).endswith("[999] at index 2"))
+        else:
+            self.fail("Should have thrown an exception")
+
+        # No keys were used
+        self.assertEqual(10, ih.left_motor_value())
+        self.assertEqual(10, ih.right_motor_value())
+
+        self.assertRaises(Exception, ih.move_many, [IH.FORWARD, [IH.LEFT]])
+
+    def test_move_many_floats(self):
+        ih = IH.InputHandler(0.0, 100.0, 20.0, IH.INSTRUMENTATION_OFF)
+        left, right = ih.move_many([IH.FORWARD, IH.FORWARD, IH.LEFT])
+
+        self.assertEqual('d', left.typecode)
+        self.assertEqual([20.0, 40.0, 40.0], left.tolist())
+        self.assertEqual([20.0, 40.0, 60.0], right.tolist())
+
+        # Too big for a C int
+        self.assertEqual('d', IH.InputHandler(0, 1 << 40, 1 << 30, IH.INSTRUMENTATION_OFF).move_many([8])[0].typecode)
+
+    def test_move_many_reused_transitions(self):
+        rnd     =   random.Random(5)
+        keys    =   [rnd.choice(IH.KEYS) for i in range(5000)]
+
+        # Each move seen by a listener, and not
+        observed    =   IH.InputHandler(0, 100, 20, IH.INSTRUMENTATION_OFF)
+        moves       =   []
+        observed.add_move_listener(lambda key, left, right: moves.append((left, right)))
+
+        quiet = IH.InputHandler(0, 100, 20, IH.INSTRUMENTATION_OFF)
+
+        self.assertEqual(observed.move_many(keys), quiet.move_many(keys))
+        self.assertEqual(5000, len(moves))
+        self.assertEqual(observed.motor_state(), quiet.motor_state())
+
+    def test_move_many_raised_state(self):
+        class SteeringError(Exception):
+            pass
+
+        class FailingHandler(IH.InputHandler):
+            def _turn_left(self):
+                IH.InputHandler._turn_left(self)
+
+                if self._current_motor_left_value < 0:
+                    raise SteeringError("Failed")
+
+        for listen in [False, True]:
+            ih = FailingHandler(0, 100, 20, IH.INSTRUMENTATION_OFF)
+
+            if listen:
+                ih.add_move_listener(lambda key, left, right: None)
+
+            try:
+                ih.move_many([IH.FORWARD, IH.STOP, IH.FORWARD, IH.STOP, IH.LEFT, IH.FORWARD])
+            except SteeringError as e:
+                self.assertEqual("Failed at index 4", str(e))
+                self.assertEqual("Failed", str(e.__cause__))
+            else:
+                self.fail("Should have thrown an exception")
+
+            # As left by the move that raised
+            self.assertEqual((-20, 20), ih.motor_state())
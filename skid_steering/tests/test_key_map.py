@@ -0,0 +1,141 @@
+__author__ = 'pjp'
+
+import io
+import random
+import unittest as ut
+
+import skid_steering.InputHandler as IH
+import skid_steering.KeyMap as KM
+import skid_steering.TransitionTable as TT
+
+PROFILES = """
+[wasd]
+forward = 'w', 'W'
+left    = 'a'
+back    = 's'
+right   = 'd'
+stop    = ' '
+
+[gamepad]
+forward = 0x220
+back    = 0x221
+left    = 0x222
+right   = 0x223
+stop    = 304
+"""
+
+
+class TestKeyMap(ut.TestCase):
+
+    def setUp(self):
+        self.profiles = KM.load_profiles(io.StringIO(PROFILES))
+
+    def test_load_profiles(self):
+        self.assertEqual(["wasd", "gamepad"], list(self.profiles))
+
+        wasd = self.profiles["wasd"]
+        self.assertEqual(6, len(wasd))
+        self.assertEqual(IH.FORWARD, wasd.lookup(ord('w')))
+        self.assertEqual(IH.FORWARD, wasd.lookup(ord('W')))
+        self.assertEqual(IH.STOP, wasd.lookup(ord(' ')))
+
+        gamepad = self.profiles["gamepad"]
+        self.assertEqual(IH.LEFT, gamepad.lookup(0x222))
+        self.assertEqual(IH.STOP, gamepad.lookup(304))
+
+    def test_unknown_key(self):
+        wasd = self.profiles["wasd"]
+
+        for code in [ord('x'), 0x222, -1, None, "w"]:
+            self.assertEqual(None, wasd.get(code))
+
+            try:
+                wasd.lookup(code)
+            except KM.UnknownKeyError as e:
+                self.assertEqual(code, e.code)
+                self.assertEqual("wasd", e.profile)
+                self.assertTrue(str(e).startswith("Unknown key: [" + str(code) + "]"))
+            else:
+                self.fail("Should have thrown an exception")
+
+        # Also an invalid input, as for InputHandler.move()
+        self.assertRaises(IH.InvalidInputError, wasd.lookup, ord('x'))
+
+    def test_move(self):
+        ih      =   IH.InputHandler(0, 100, 20, IH.INSTRUMENTATION_OFF)
+        wasd    =   self.profiles["wasd"]
+
+        self.assertEqual((20, 20), wasd.move(ih, ord('w')))
+        self.assertRaises(KM.UnknownKeyError, wasd.move, ih, ord('q'))
+        self.assertEqual((20, 20), ih.motor_state())
+
+    def test_keys_array(self):
+        gamepad = self.profiles["gamepad"]
+
+        self.assertEqual(0x223 + 1, len(gamepad.keys))
+        self.assertEqual(IH.BACK, gamepad.keys[0x221])
+        self.assertEqual(None, gamepad.keys[0x100])
+
+        ih = TT.TableInputHandler(0, 100, 20)
+
+        self.assertEqual((-20, -20), gamepad.move(ih, 0x221))
+        self.assertRaises(KM.UnknownKeyError, gamepad.move, ih, 0x100)
+        self.assertRaises(KM.UnknownKeyError, gamepad.move, ih, 0x10000)
+        self.assertRaises(KM.UnknownKeyError, gamepad.move, ih, "w")
+
+    def test_bind(self):
+        gamepad = self.profiles["gamepad"]
+
+        self.assertEqual(TT.KEY_SLOTS[IH.BACK], gamepad.slots[0x221])
+        self.assertEqual(None, gamepad.slots[0x100])
+
+        class Doubling(TT.TableInputHandler):
+            def move(self, input):
+                TT.TableInputHandler.move(self, input)
+
+                return TT.TableInputHandler.move(self, input)
+
+        for handler_class in [IH.InputHandler, TT.TableInputHandler, Doubling]:
+            moves   =   []
+            ih      =   handler_class(0, 100, 20, instrumentation=IH.INSTRUMENTATION_OFF)
+            move    =   gamepad.bind(ih)
+
+            ih.add_move_listener(lambda key, left, right: moves.append(key))
+
+            expected = (-40, -40) if handler_class is Doubling else (-20, -20)
+
+            self.assertEqual(expected, move(0x221))
+            self.assertEqual((0, 0), move(304))
+            self.assertEqual(IH.BACK, moves[0])
+            self.assertEqual(IH.STOP, moves[-1])
+
+            for code in [0x100, 0x10000, -1, "w"]:
+                self.assertRaises(KM.UnknownKeyError, move, code)
+
+            self.assertEqual((0, 0), ih.motor_state())
+
+        # The same moves as the reference, for every transition
+        rnd         =   random.Random(5)
+        codes       =   [rnd.choice([0x220, 0x221, 0x222, 0x223, 304]) for i in range(2000)]
+        reference   =   IH.InputHandler(0, 100, 20, IH.INSTRUMENTATION_OFF)
+        move        =   gamepad.bind(TT.TableInputHandler(0, 100, 20))
+
+        self.assertEqual([gamepad.move(reference, code) for code in codes], [move(code) for code in codes])
+
+    def test_bad_profiles(self):
+        bad = [
+            "[p]\njump = 1\n",
+            "[p]\nforward = x\n",
+            "[p]\nforward = 1\nback = 1\n",
+            "[p]\nforward = 0x10000\n",
+        ]
+
+        for text in bad:
+            self.assertRaises(Exception, KM.load_profiles, io.StringIO(text))
+
+        self.assertRaises(IH.InvalidInputError, KM.KeyMap, "p", {1: 7})
+        self.assertRaises(Exception, KM.load_profiles, "/no/such/keymap.ini")
+
+
+if __name__ == '__main__':
+    ut.main()
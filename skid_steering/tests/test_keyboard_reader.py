@@ -0,0 +1,122 @@
+__author__ = 'pjp'
+
+import asyncio
+import os
+import tty
+import unittest as ut
+
+import skid_steering.InputHandler as IH
+import skid_steering.KeyboardReader as KR
+import skid_steering.KeyMap as KM
+
+
+def input_event(type, code, value):
+    return KR.INPUT_EVENT.pack(0, 0, type, code, value)
+
+
+class TestKeyboardReader(ut.TestCase):
+
+    def setUp(self):
+        self.handler = IH.InputHandler(0, 35, 10, IH.INSTRUMENTATION_OFF)
+
+    def read_pipe(self, reader_class, chunks):
+        read_fd, write_fd = os.pipe()
+
+        async def feed():
+            reader = reader_class(self.handler, read_fd)
+            task = asyncio.ensure_future(reader.run())
+
+            for chunk in chunks:
+                os.write(write_fd, chunk)
+                await asyncio.sleep(0.01)
+
+            os.close(write_fd)
+            await task
+
+            return reader
+
+        try:
+            return asyncio.run(feed())
+        finally:
+            os.close(read_fd)
+
+    def test_characters(self):
+        reader = self.read_pipe(KR.CharacterKeyboardReader, [b"88", b"4\n"])
+
+        self.assertEqual(20, self.handler.left_motor_value())
+        self.assertEqual(30, self.handler.right_motor_value())
+
+        self.assertEqual(3, reader.latency.count)
+        self.assertTrue(reader.latency.maximum >= reader.latency.minimum >= 0.0)
+        self.assertEqual(1, reader.ignored)
+        self.assertEqual(0, reader.errors)
+
+    def test_input_events(self):
+        events = input_event(KR.EV_KEY, KR.KEY_KP2, KR.KEY_PRESSED) + \
+                 input_event(KR.EV_KEY, KR.KEY_KP2, 0) + \
+                 input_event(0, 0, 0) + \
+                 input_event(KR.EV_KEY, KR.KEY_KP2, KR.KEY_REPEATED) + \
+                 input_event(KR.EV_KEY, KR.KEY_KP6, KR.KEY_PRESSED)
+
+        # Split part way through an event
+        reader = self.read_pipe(KR.InputEventKeyboardReader, [events[:30], events[30:]])
+
+        self.assertEqual(-30, self.handler.left_motor_value())
+        self.assertEqual(-20, self.handler.right_motor_value())
+        self.assertEqual(3, reader.latency.count)
+        self.assertEqual(0, reader.ignored)
+
+    def test_abstract(self):
+        # Sub-classes decode the data read
+        self.assertRaises(TypeError, KR.KeyboardReader, self.handler, 0, KR.CHARACTER_KEYS)
+
+    def test_unmapped_input_event(self):
+        reader = self.read_pipe(KR.InputEventKeyboardReader, [input_event(KR.EV_KEY, 30, KR.KEY_PRESSED)])
+
+        self.assertEqual(1, reader.ignored)
+        self.assertEqual(0, reader.latency.count)
+
+    def test_key_map(self):
+        wasd = KM.KeyMap("wasd", {ord('w'): IH.FORWARD, ord('a'): IH.LEFT, ord(' '): IH.STOP})
+
+        reader = self.read_pipe(lambda handler, fd: KR.CharacterKeyboardReader(handler, fd, wasd), [b"wwa8"])
+
+        self.assertEqual(20, self.handler.left_motor_value())
+        self.assertEqual(30, self.handler.right_motor_value())
+        self.assertEqual(1, reader.ignored)
+
+    def test_key_listener(self):
+        keys = []
+
+        def reader_class(handler, fd):
+            reader = KR.CharacterKeyboardReader(handler, fd)
+            reader.add_key_listener(keys.append)
+            return reader
+
+        self.read_pipe(reader_class, [b"8x5"])
+
+        self.assertEqual([IH.FORWARD, IH.STOP], keys)
+
+    def test_pty(self):
+        master, slave = os.openpty()
+        tty.setraw(slave)
+
+        async def type_keys():
+            reader = KR.CharacterKeyboardReader(self.handler, slave)
+            reader.start()
+
+            os.write(master, b"8")
+            for i in range(100):
+                await asyncio.sleep(0.01)
+                if reader.latency.count:
+                    break
+
+            reader.stop()
+
+        try:
+            asyncio.run(type_keys())
+        finally:
+            os.close(master)
+            os.close(slave)
+
+        self.assertEqual(10, self.handler.left_motor_value())
@@ -0,0 +1,115 @@
+__author__ = 'pjp'
+
+import json
+import os
+import socket
+import tempfile
+import unittest as ut
+
+import skid_steering.Analytic as A
+import skid_steering.InputHandler as IH
+import skid_steering.Latency as L
+import skid_steering.TransitionTable as TT
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        # Each move takes 50ns
+        self.now += 50
+        return self.now
+
+
+class TestLatency(ut.TestCase):
+
+    def test_branch(self):
+        self.assertEqual(L.STOP, L.branch(IH.STOP, 10, 10, 0, 0))
+        self.assertEqual(L.SPIN, L.branch(IH.LEFT, 0, 0, -10, 10))
+        self.assertEqual(L.SPIN, L.branch(IH.FORWARD, -10, 10, 0, 0))
+        self.assertEqual(L.TURN, L.branch(IH.LEFT, 10, 10, 10, 20))
+        self.assertEqual(L.TURN, L.branch(IH.FORWARD, 10, 20, 20, 20))
+        self.assertEqual(L.STRAIGHT, L.branch(IH.BACK, 0, 0, -10, -10))
+        self.assertEqual(L.LIMIT, L.branch(IH.FORWARD, 30, 30, 30, 30))
+
+    def test_move(self):
+        for handler_class in [IH.InputHandler, TT.TableInputHandler, A.AnalyticInputHandler]:
+            ih      =   handler_class(0, 30, 10, instrumentation=IH.INSTRUMENTATION_OFF)
+            latency =   L.MoveLatency(FakeClock())
+
+            ih.set_move_latency(latency)
+
+            keys = [IH.FORWARD, IH.FORWARD, IH.FORWARD, IH.FORWARD, IH.LEFT, IH.STOP, IH.RIGHT]
+            self.assertEqual(IH.InputHandler(0, 30, 10, IH.INSTRUMENTATION_OFF).move_many(keys), ih.move_many(keys))
+
+            self.assertEqual(4, latency.keys[IH.FORWARD].count)
+            self.assertEqual(200, latency.keys[IH.FORWARD].total)
+            self.assertEqual(3, latency.branches[L.STRAIGHT].count)
+            self.assertEqual(1, latency.branches[L.LIMIT].count)
+            self.assertEqual(1, latency.branches[L.TURN].count)
+            self.assertEqual(1, latency.branches[L.SPIN].count)
+
+            snapshot = latency.snapshot()
+            self.assertEqual(1, snapshot["keys"]["stop"]["count"])
+            self.assertEqual(1, snapshot["branches"]["stop"]["count"])
+
+            # Moves that raise are not timed
+            self.assertRaises(IH.InvalidInputError, ih.move, 999)
+
+            latency.reset()
+            self.assertEqual(0, latency.keys[IH.FORWARD].count)
+
+            ih.set_move_latency(None)
+            ih.move(IH.FORWARD)
+            self.assertEqual(0, latency.keys[IH.FORWARD].count)
+
+    def test_export_file(self):
+        latency = L.MoveLatency()
+
+        ih = IH.InputHandler(0, 30, 10, IH.INSTRUMENTATION_OFF)
+        ih.set_move_latency(latency)
+        ih.move(IH.FORWARD)
+
+        path = os.path.join(tempfile.mkdtemp(), "latency.jsonl")
+
+        exporter = L.LatencyExporter(latency, path=path, clock=lambda: 12.5)
+        exporter.export()
+        exporter.export()
+        exporter.close()
+
+        with open(path) as file:
+            lines = [json.loads(line) for line in file]
+
+        os.remove(path)
+
+        self.assertEqual(2, len(lines))
+        self.assertEqual(12.5, lines[0]["time"])
+        self.assertEqual(1, lines[0]["keys"]["forward"]["count"])
+
+        # Reset after each export
+        self.assertEqual(0, lines[1]["keys"]["forward"]["count"])
+
+    def test_export_socket(self):
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        receiver.bind(("127.0.0.1", 0))
+        receiver.settimeout(5)
+
+        try:
+            exporter = L.LatencyExporter(L.MoveLatency(), address=receiver.getsockname(), reset=False)
+            exporter.export()
+            exporter.close()
+
+            snapshot = json.loads(receiver.recv(65536).decode("utf-8"))
+        finally:
+            receiver.close()
+
+        self.assertEqual(0, snapshot["branches"]["spin"]["count"])
+
+    def test_bad_destination(self):
+        self.assertRaises(Exception, L.LatencyExporter, L.MoveLatency())
+        self.assertRaises(Exception, L.LatencyExporter, L.MoveLatency(), "a.jsonl", ("127.0.0.1", 9999))
+
+
+if __name__ == '__main__':
+    ut.main()
@@ -0,0 +1,65 @@
+__author__ = 'pjp'
+
+import unittest as ut
+
+import skid_steering.InputHandler as IH
+import skid_steering.TransitionTable as TT
+import skid_steering.MotorState as MS
+
+
+class TestMotorState(ut.TestCase):
+
+    def test_value(self):
+        state = MS.MotorState(10, 20)
+
+        self.assertEqual(10, state.left)
+        self.assertEqual(20, state.right)
+        self.assertEqual((10, 20), state)
+        self.assertRaises(AttributeError, setattr, state, "left", 0)
+        self.assertFalse(hasattr(state, "__dict__"))
+
+    def test_interned(self):
+        self.assertTrue(MS.motor_state(10, -20) is MS.motor_state(10, -20))
+        self.assertEqual(MS.MotorState(10, -20), MS.motor_state(10, -20))
+
+    def test_types_kept(self):
+        self.assertEqual((20, 20), IH.InputHandler(0, 100, 20, IH.INSTRUMENTATION_OFF).move(IH.FORWARD))
+
+        ih      =   IH.InputHandler(0.0, 100.0, 20.0, IH.INSTRUMENTATION_OFF)
+        state   =   ih.move(IH.FORWARD)
+
+        self.assertEqual((20.0, 20.0), state)
+        self.assertTrue(type(state.left) is float and type(state.right) is float)
+        self.assertTrue(type(ih.motor_state().left) is float)
+
+        # The int state is still interned
+        self.assertTrue(type(MS.motor_state(20, 20).left) is int)
+        self.assertTrue(MS.motor_state(20, 20) is MS.motor_state(20, 20))
+
+    def test_intern_limit(self):
+        limit = MS.INTERN_LIMIT
+        MS.INTERN_LIMIT = 0
+
+        try:
+            self.assertEqual((123457, 1), MS.motor_state(123457, 1))
+            self.assertFalse(MS.motor_state(123457, 1) is MS.motor_state(123457, 1))
+        finally:
+            MS.INTERN_LIMIT = limit
+
+    def test_move(self):
+        for handler_class in [IH.InputHandler, TT.TableInputHandler]:
+            ih = handler_class(0, 25, 10)
+
+            self.assertEqual(MS.MotorState(0, 0), ih.motor_state())
+            self.assertEqual(MS.MotorState(10, 10), ih.move(IH.FORWARD))
+
+            state = ih.move(IH.LEFT)
+            self.assertEqual((10, 20), state)
+            self.assertTrue(state is ih.motor_state())
+
+    def test_slots(self):
+        for handler_class in [IH.InputHandler, TT.TableInputHandler]:
+            ih = handler_class(0, 25, 10)
+
+            self.assertFalse(hasattr(ih, "__dict__"))
+            self.assertRaises(AttributeError, setattr, ih, "_current_motor_middle_value", 0)
@@ -0,0 +1,136 @@
+__author__ = 'pjp'
+
+import math
+import unittest as ut
+
+import skid_steering.InputHandler as IH
+import skid_steering.Odometry as O
+from skid_steering.Scheduler import SimulatedClock
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Tracks 1m apart, 1m/s per motor value unit
+WHEEL_BASE  =   1.0
+SCALE       =   1.0
+
+
+class TestOdometry(ut.TestCase):
+
+    def assertPose(self, expected, actual):
+        for expected_value, actual_value in zip(expected, actual):
+            self.assertAlmostEqual(expected_value, actual_value, places=9)
+
+    def test_arc(self):
+        # Straight along the heading
+        self.assertPose((0.0, 2.0, 0.0), O.arc(math.pi / 2, 1.0, 0.0, 2.0))
+
+        # Spinning on the spot
+        self.assertPose((0.0, 0.0, math.pi), O.arc(0.0, 0.0, math.pi, 1.0))
+
+        # A quarter circle of radius 1, anticlockwise from heading along x
+        self.assertPose((1.0, 1.0, math.pi / 2), O.arc(0.0, math.pi / 2, math.pi / 2, 1.0))
+
+    def test_speeds(self):
+        self.assertEqual((10.0, 0.0), O.speeds(10, 10, 2.0, 1.0))
+        self.assertEqual((0.0, 10.0), O.speeds(-10, 10, 2.0, 1.0))
+        self.assertPose((1.5, 0.5), O.speeds(10, 20, 2.0, 0.1))
+
+    def test_bad_wheel_base(self):
+        self.assertRaises(Exception, O.Odometry, 0, SCALE)
+        self.assertRaises(Exception, O.Odometry, -1, SCALE)
+
+    def test_odometry(self):
+        clock       =   SimulatedClock()
+        odometry    =   O.Odometry(WHEEL_BASE, SCALE, clock)
+
+        odometry.write(2, 2)
+        clock.advance(1.5)
+        self.assertPose((3.0, 0.0, 0.0), odometry.pose())
+
+        # Spin a quarter turn anticlockwise
+        odometry.write(-math.pi / 4, math.pi / 4)
+        clock.advance(1.0)
+        self.assertPose((3.0, 0.0, math.pi / 2), odometry.pose())
+
+        odometry.write(1, 1)
+        self.assertPose((3.0, 0.5, math.pi / 2), odometry.pose(clock() + 0.5))
+
+        odometry.reset(O.Pose(1.0, 2.0, 0.0))
+        clock.advance(1.0)
+        self.assertPose((1.0, 2.0, 0.0), odometry.pose())
+
+    def test_full_circle(self):
+        clock       =   SimulatedClock()
+        odometry    =   O.Odometry(WHEEL_BASE, SCALE, clock)
+
+        odometry.write(1, 2)
+
+        # A circle takes 2 pi seconds at 1 radian per second, in steps of any size
+        for step in range(100):
+            clock.advance(2 * math.pi / 100)
+            odometry.pose()
+
+        x, y, heading = odometry.pose()
+        self.assertAlmostEqual(0.0, x, places=9)
+        self.assertAlmostEqual(0.0, y, places=9)
+        self.assertAlmostEqual(2 * math.pi, heading, places=9)
+
+    def test_output_sink(self):
+        clock       =   SimulatedClock()
+        odometry    =   O.Odometry(0.5, 0.01, clock)
+        ih          =   IH.InputHandler(0, 100, 10, IH.INSTRUMENTATION_OFF)
+
+        ih.add_output_sink(odometry)
+
+        times, lefts, rights = [], [], []
+
+        for key in [IH.FORWARD, IH.FORWARD, IH.LEFT, IH.LEFT, IH.RIGHT, IH.BACK, IH.STOP, IH.RIGHT]:
+            clock.advance(0.25)
+            left, right = ih.move(key)
+
+            times.append(clock())
+            lefts.append(left)
+            rights.append(right)
+
+        clock.advance(0.25)
+        times.append(clock())
+        lefts.append(0)
+        rights.append(0)
+
+        xs, ys, headings = O.integrate(times, lefts, rights, 0.5, 0.01, use_numpy=False)
+
+        self.assertPose((xs[-1], ys[-1], headings[-1]), odometry.pose())
+
+    def test_integrate(self):
+        xs, ys, headings = O.integrate([0.0, 1.0, 2.0, 3.0], [1, -1, 1, 0], [1, 1, 1, 0], WHEEL_BASE, SCALE,
+                                       O.Pose(1.0, 1.0, 0.0), use_numpy=False)
+
+        self.assertEqual(4, len(xs))
+        self.assertPose((1.0, 2.0, 2.0, 2.0 + math.cos(2.0)), xs)
+        self.assertPose((1.0, 1.0, 1.0, 1.0 + math.sin(2.0)), ys)
+        self.assertPose((0.0, 0.0, 2.0, 2.0), headings)
+
+        self.assertEqual(0, len(O.integrate([], [], [], WHEEL_BASE, SCALE, use_numpy=False)[0]))
+
+    @ut.skipIf(numpy is None, "NumPy is not installed")
+    def test_integrate_numpy(self):
+        samples = 10000
+
+        rnd     =   numpy.random.RandomState(0)
+        times   =   numpy.cumsum(rnd.uniform(0.001, 0.1, samples))
+        lefts   =   rnd.randint(-100, 101, samples)
+        rights  =   rnd.randint(-100, 101, samples)
+
+        # Straight runs, so the sinc at 0 is covered
+        rights[::3] = lefts[::3]
+
+        expected    =   O.integrate(list(times), list(lefts), list(rights), 0.2, 0.005, use_numpy=False)
+        actual      =   O.integrate(times, lefts, rights, 0.2, 0.005, use_numpy=True)
+
+        for expected_values, actual_values in zip(expected, actual):
+            self.assertTrue(numpy.allclose(numpy.array(expected_values), actual_values, rtol=0, atol=1e-6))
+
+        self.assertEqual(0, len(O.integrate([], [], [], 0.2, 0.005, use_numpy=True)[0]))
@@ -0,0 +1,200 @@
+__author__ = 'pjp'
+
+import io
+import unittest as ut
+
+import skid_steering.InputHandler as IH
+import skid_steering.TransitionTable as TT
+import skid_steering.OutputSink as OS
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Loop(object):
+    """
+    Enough of an asyncio event loop for timers, run by hand
+    """
+    def __init__(self, clock):
+        self.clock      =   clock
+        self.timers     =   []
+
+    def call_later(self, delay, callback):
+        timer = Timer(self.clock() + delay, callback)
+        self.timers.append(timer)
+        return timer
+
+    def run_until(self, now):
+        for timer in sorted(self.timers, key=lambda timer: timer.when):
+            if timer.when <= now and not timer.cancelled:
+                self.clock.now = timer.when
+                self.timers.remove(timer)
+                timer.callback()
+
+        self.clock.now = now
+
+
+class Timer(object):
+    def __init__(self, when, callback):
+        self.when       =   when
+        self.callback   =   callback
+        self.cancelled  =   False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TestOutputSink(ut.TestCase):
+
+    def test_change_only(self):
+        ih = IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_OFF)
+        sink = OS.MemorySink()
+        ih.add_output_sink(sink)
+
+        for key in [IH.FORWARD, IH.FORWARD, IH.FORWARD, IH.FORWARD, IH.STOP, IH.STOP]:
+            ih.move(key)
+
+        self.assertEqual([(0, 0), (10, 10), (20, 20), (0, 0)], sink.written)
+        self.assertEqual(4, sink.writes)
+        self.assertEqual(3, sink.suppressed_unchanged)
+        self.assertEqual(0, sink.suppressed_rate)
+
+    def test_remove(self):
+        ih = IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_OFF)
+        sink = OS.MemorySink()
+
+        ih.add_output_sink(sink)
+        ih.remove_output_sink(sink)
+        ih.move(IH.FORWARD)
+
+        self.assertEqual([(0, 0)], sink.written)
+
+    def test_abstract(self):
+        # Sub-classes write the motor values
+        self.assertRaises(TypeError, OS.OutputSink)
+
+    def test_rate_limit_latest_wins(self):
+        clock = Clock()
+        sink = OS.MemorySink(max_rate=10, clock=clock)
+
+        sink.publish(0, 0)
+        clock.now = 0.01
+        sink.publish(10, 10)
+        sink.publish(20, 20)
+
+        self.assertEqual([(0, 0)], sink.written)
+        self.assertEqual((20, 20), sink.pending())
+        self.assertFalse(sink.poll())
+
+        clock.now = 0.1
+        self.assertTrue(sink.poll())
+        self.assertFalse(sink.poll())
+
+        self.assertEqual([(0, 0), (20, 20)], sink.written)
+        self.assertEqual(1, sink.suppressed_rate)
+
+    def test_rate_limit_back_to_written(self):
+        clock = Clock()
+        sink = OS.MemorySink(max_rate=10, clock=clock)
+
+        sink.publish(0, 0)
+        sink.publish(10, 10)
+        sink.publish(0, 0)
+
+        clock.now = 1.0
+        self.assertFalse(sink.poll())
+
+        # Counted once, as the pending pair held back by the rate limit
+        self.assertEqual([(0, 0)], sink.written)
+        self.assertEqual(1, sink.suppressed_rate)
+        self.assertEqual(0, sink.suppressed_unchanged)
+
+        sink.publish(0, 0)
+        self.assertEqual(1, sink.suppressed_rate)
+        self.assertEqual(1, sink.suppressed_unchanged)
+
+    def test_rate_limit_superseded(self):
+        clock = Clock()
+        sink = OS.MemorySink(max_rate=10, clock=clock)
+
+        sink.publish(0, 0)
+        sink.publish(10, 10)
+
+        clock.now = 1.0
+        sink.publish(20, 20)
+
+        self.assertEqual([(0, 0), (20, 20)], sink.written)
+        self.assertEqual(None, sink.pending())
+        self.assertEqual(1, sink.suppressed_rate)
+
+    def test_rate_limit_same_pending(self):
+        clock = Clock()
+        sink = OS.MemorySink(max_rate=10, clock=clock)
+
+        sink.publish(0, 0)
+        sink.publish(10, 10)
+        sink.publish(10, 10)
+
+        self.assertEqual(0, sink.suppressed_rate)
+
+    def test_last_stop_written_by_timer(self):
+        clock   =   Clock()
+        loop    =   Loop(clock)
+        ih      =   IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_OFF)
+        sink    =   OS.MemorySink(max_rate=10, clock=clock)
+
+        ih.add_output_sink(sink)
+        sink.start(loop)
+
+        clock.now = 0.2
+        ih.move(IH.FORWARD)
+
+        # Inside the rate window, and nothing is published after it
+        clock.now = 0.25
+        ih.move(IH.FORWARD)
+        ih.move(IH.STOP)
+        self.assertEqual([(0, 0), (10, 10)], sink.written)
+
+        loop.run_until(0.29)
+        self.assertEqual([(0, 0), (10, 10)], sink.written)
+
+        loop.run_until(0.31)
+        self.assertEqual([(0, 0), (10, 10), (0, 0)], sink.written)
+        self.assertEqual(None, sink.pending())
+
+        # Started twice, one timer
+        clock.now = 0.32
+        sink.publish(20, 20)
+        sink.start(loop)
+        self.assertEqual(1, len([timer for timer in loop.timers if not timer.cancelled]))
+
+        sink.close()
+        loop.run_until(1.0)
+        self.assertEqual((20, 20), sink.pending())
+
+    def test_file(self):
+        file = io.StringIO()
+
+        ih = TT.TableInputHandler(0, 25, 10)
+        ih.add_output_sink(OS.FileSink(file))
+        ih.move(IH.BACK)
+        ih.move(IH.RIGHT)
+
+        self.assertEqual("0 0\n-10 -10\n-20 -10\n", file.getvalue())
+
+    def test_move_many(self):
+        keys = [IH.FORWARD, IH.FORWARD, IH.LEFT, IH.STOP]
+
+        for handler_class in [IH.InputHandler, TT.TableInputHandler]:
+            ih = handler_class(0, 25, 10)
+            sink = OS.MemorySink()
+            ih.add_output_sink(sink)
+
+            ih.move_many(keys)
+
+            self.assertEqual([(0, 0), (10, 10), (20, 20), (10, 20), (0, 0)], sink.written)
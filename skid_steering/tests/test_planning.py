@@ -0,0 +1,262 @@
+__author__ = 'pjp'
+
+import itertools
+import unittest as ut
+
+import skid_steering.Analytic as A
+import skid_steering.InputHandler as IH
+import skid_steering.OutputSink as OS
+import skid_steering.Planning as P
+import skid_steering.TransitionTable as TT
+
+HANDLER_CLASSES = [IH.InputHandler, TT.TableInputHandler, A.AnalyticInputHandler]
+
+
+class RecordingSink(OS.OutputSink):
+    def __init__(self):
+        OS.OutputSink.__init__(self)
+        self.written = []
+
+    def write(self, left, right):
+        self.written.append((left, right))
+
+
+class TestFork(ut.TestCase):
+
+    def test_snapshot_restore(self):
+        for handler_class in HANDLER_CLASSES:
+            ih = handler_class(0, 100, 20, instrumentation=IH.INSTRUMENTATION_OFF)
+            ih.move_many([IH.FORWARD, IH.FORWARD, IH.LEFT])
+
+            snapshot = ih.snapshot()
+            self.assertEqual((40, 60), snapshot)
+
+            ih.move_many([IH.BACK, IH.BACK, IH.RIGHT])
+            ih.restore(snapshot)
+
+            self.assertEqual(snapshot, ih.motor_state())
+
+            # Carries on as if never moved
+            self.assertEqual(IH.InputHandler(0, 100, 20, IH.INSTRUMENTATION_OFF).move_many(
+                [IH.FORWARD, IH.FORWARD, IH.LEFT, IH.FORWARD, IH.RIGHT])[0][-1], ih.move_many(
+                [IH.FORWARD, IH.RIGHT])[0][-1])
+
+    def test_restore_unreachable(self):
+        self.assertRaises(Exception, TT.TableInputHandler(0, 100, 20).restore, (20, 0))
+        self.assertRaises(Exception, A.AnalyticInputHandler(0, 100, 20).restore, (25, 25))
+
+        # Off the grid, or beyond full speed
+        for handler_class in HANDLER_CLASSES:
+            ih = handler_class(5, 35, 10, instrumentation=IH.INSTRUMENTATION_OFF)
+
+            for snapshot in [(7, 1234), (1234, 1234), (45, 5), (5, -45), (10, 10)]:
+                self.assertRaises(Exception, ih.restore, snapshot)
+
+            self.assertEqual((5, 5), ih.motor_state())
+
+            ih.restore((-35, -15))
+            self.assertEqual((-35, -15), ih.motor_state())
+
+    def test_restore_verified(self):
+        ih = IH.InputHandler(0, 100, 20, IH.INSTRUMENTATION_OFF, verified=True)
+
+        # Reachable, still proven
+        ih.restore((40, 60))
+        self.assertFalse(ih._check_invariant)
+
+        for snapshot, key in [((0, 20), IH.LEFT), ((20, 0), IH.RIGHT)]:
+            fork = ih.fork()
+            fork.restore(snapshot)
+
+            self.assertTrue(fork._check_invariant)
+            self.assertRaises(Exception, fork.move, key)
+
+    def test_fork(self):
+        for handler_class in HANDLER_CLASSES:
+            ih      =   handler_class(0, 100, 20, instrumentation=IH.INSTRUMENTATION_OFF)
+            sink    =   RecordingSink()
+
+            ih.add_output_sink(sink)
+            ih.move(IH.FORWARD)
+
+            fork = ih.fork()
+
+            self.assertTrue(type(fork) is handler_class)
+            self.assertTrue(fork._config is ih._config)
+            self.assertEqual(ih.motor_state(), fork.motor_state())
+
+            fork.move(IH.FORWARD)
+            fork.move(IH.LEFT)
+
+            # The original, and its sink, did not move
+            self.assertEqual((20, 20), ih.motor_state())
+            self.assertEqual([(0, 0), (20, 20)], sink.written)
+
+            self.assertEqual((40, 40), ih.move(IH.FORWARD))
+
+    def test_fork_instrumentation(self):
+        ih = IH.InputHandler(0, 100, 20, verified=True)
+
+        fork = ih.fork(IH.INSTRUMENTATION_OFF)
+        self.assertEqual(None, fork._logger)
+        self.assertFalse(fork._trace)
+        self.assertTrue(fork._check_invariant)
+
+        self.assertTrue(ih.fork()._trace)
+        self.assertRaises(Exception, ih.fork, "loud")
+
+
+class TestPlanning(ut.TestCase):
+
+    def test_evaluate(self):
+        candidates = [[IH.FORWARD] * 3, [IH.LEFT, IH.FORWARD], [], [IH.FORWARD, 99], [IH.BACK, [IH.LEFT]]]
+
+        for handler_class in HANDLER_CLASSES:
+            ih = handler_class(0, 100, 20, instrumentation=IH.INSTRUMENTATION_OFF)
+            ih.move(IH.FORWARD)
+
+            self.assertEqual([(80, 80), (40, 40), (20, 20), None, None], P.evaluate(ih, candidates))
+
+            # Not moved
+            self.assertEqual((20, 20), ih.motor_state())
+
+    def test_evaluate_matches_moves(self):
+        candidates = list(itertools.product(IH.KEYS, repeat=4))
+
+        for handler_class in HANDLER_CLASSES:
+            ih = handler_class(0, 45, 10, instrumentation=IH.INSTRUMENTATION_OFF)
+            ih.move_many([IH.FORWARD, IH.RIGHT])
+
+            expected = []
+            for candidate in candidates:
+                fork = ih.fork()
+                fork.move_many(candidate)
+                expected.append(fork.motor_state())
+
+            self.assertEqual(expected, P.evaluate(ih, candidates))
+
+    def test_best(self):
+        candidates = list(itertools.product(IH.KEYS, repeat=3))
+
+        for handler_class in HANDLER_CLASSES:
+            ih = handler_class(0, 100, 20, instrumentation=IH.INSTRUMENTATION_OFF)
+
+            # Turning left, as few keys as possible
+            candidate, state, cost = P.best(ih, candidates, lambda keys, state: abs(state.left - 20) + abs(
+                state.right - 40) + sum(key != IH.STOP for key in keys))
+
+            self.assertEqual((20, 40), state)
+            self.assertEqual(2, cost)
+            self.assertEqual(2, sum(key != IH.STOP for key in candidate))
+
+        self.assertEqual(None, P.best(ih, [[99]], lambda keys, state: 0))
+
+
+def forward_distances(table, start):
+    """
+    Independently of KeyPlanner - the fewest keys from a state to every state, by searching forward without the
+    transitions that raise
+    """
+    distances   =   {start: 0}
+    frontier    =   [start]
+
+    while frontier:
+        following = []
+
+        for state in frontier:
+            for slot in range(len(TT.KEYS)):
+                target = table.next[state * len(TT.KEYS) + slot]
+
+                if target >= 0 and target not in distances:
+                    distances[target] = distances[state] + 1
+                    following.append(target)
+
+        frontier = following
+
+    return distances
+
+
+class TestKeyPlanner(ut.TestCase):
+
+    def test_shortest_between_every_pair(self):
+        planner = P.KeyPlanner(0, 35, 10)
+        table   =   planner.table
+        ih      =   TT.TableInputHandler(0, 35, 10)
+
+        for start in range(len(table)):
+            distances = forward_distances(table, start)
+
+            for target in range(len(table)):
+                keys, state, exact = planner.plan(table.states[start], table.states[target])
+
+                self.assertTrue(exact)
+                self.assertEqual(table.states[target], state)
+                self.assertEqual(distances[target], len(keys))
+
+                ih.restore(table.states[start])
+                ih.move_many(keys)
+                self.assertEqual(state, ih.motor_state())
+
+    def test_reference_follows_plan(self):
+        planner = P.KeyPlanner(0, 100, 20)
+        ih      =   IH.InputHandler(0, 100, 20, IH.INSTRUMENTATION_OFF)
+
+        keys, state, exact = planner.plan(ih.motor_state(), (-40, -100))
+
+        self.assertTrue(exact)
+        ih.move_many(keys)
+        self.assertEqual((-40, -100), ih.motor_state())
+
+        self.assertEqual([], planner.plan(state, state).keys)
+
+    def test_nearest(self):
+        planner = P.KeyPlanner(0, 100, 20)
+
+        # Off the grid, and beyond full speed
+        for target, nearest in [((41, 59), (40, 60)), ((500, 500), (100, 100))]:
+            keys, state, exact = planner.plan((0, 0), target)
+
+            self.assertFalse(exact)
+            self.assertEqual(nearest, state)
+
+        # Between (0, 0) and (20, 20), ending at whichever is the fewest keys away
+        self.assertEqual([], planner.plan((0, 0), (10, 10)).keys)
+
+        keys, state, exact = planner.plan((40, 40), (10, 10))
+
+        self.assertFalse(exact)
+        self.assertEqual(1, len(keys))
+        self.assertEqual(20, abs(state.left - 10) + abs(state.right - 10))
+
+    def test_index_cache(self):
+        planner = P.KeyPlanner(0, 100, 20)
+
+        planner.plan((0, 0), (40, 60))
+        planner.plan((20, 20), (40, 60))
+
+        self.assertEqual(1, planner.hits)
+        self.assertEqual(1, planner.misses)
+
+        # Room for the indexes of two targets
+        planner = P.KeyPlanner(0, 100, 20, index_memory=len(planner.table) * 2)
+
+        for target in [(20, 20), (40, 40), (20, 20), (60, 60)]:
+            planner.plan((0, 0), target)
+
+        self.assertEqual(2, len(planner))
+        self.assertEqual([(20, 20), (60, 60)], list(planner._indexes))
+
+    def test_bounds(self):
+        # 11 motor values from -100 to 100, 121 states on the grid
+        self.assertEqual(5, len(P.KeyPlanner(0, 100, 20, max_states=121).plan((0, 0), (100, 100)).keys))
+
+        for configuration in [(0, 100, 20, None, 120), (0, 512, 1), (0, 65535, 1)]:
+            try:
+                P.KeyPlanner(*configuration)
+            except Exception as e:
+                self.assertTrue("AnalyticInputHandler" in str(e))
+            else:
+                self.fail("Should have thrown an exception")
+
+        self.assertRaises(Exception, P.KeyPlanner, 0, 100, 20, TT.TransitionTable(0, 100, 10))
+        self.assertRaises(Exception, P.KeyPlanner(0, 100, 20).plan, (20, 0), (0, 0))
@@ -0,0 +1,164 @@
+__author__ = 'pjp'
+
+import unittest as ut
+
+import skid_steering.InputHandler as IH
+import skid_steering.OutputSink as OS
+import skid_steering.Ramp as R
+import skid_steering.Scheduler as S
+
+
+class TestTickScheduler(ut.TestCase):
+
+    def test_fixed_rate(self):
+        clock = S.SimulatedClock(100.0)
+        scheduler = S.TickScheduler(0.01, clock, clock.sleep)
+
+        times = []
+        scheduler.run(times.append, 5)
+
+        self.assertEqual(5, scheduler.ticks)
+        for tick, now in enumerate(times):
+            self.assertAlmostEqual(100.0 + tick * 0.01, now)
+
+    def test_no_drift(self):
+        clock = S.SimulatedClock()
+        scheduler = S.TickScheduler(0.01, clock, clock.sleep)
+
+        times = []
+
+        def tick(now):
+            times.append(now)
+            clock.advance(0.004)
+
+        scheduler.run(tick, 100)
+
+        self.assertAlmostEqual(0.99, times[-1])
+        self.assertEqual(0, scheduler.skipped)
+
+    def test_overrun_skips(self):
+        clock = S.SimulatedClock()
+        scheduler = S.TickScheduler(0.01, clock, clock.sleep)
+
+        times = []
+
+        def tick(now):
+            times.append(now)
+            if len(times) == 2:
+                clock.advance(0.025)
+
+        scheduler.run(tick, 4)
+
+        # Ended at 0.035, more than a period after the 0.02 deadline, less than one after 0.03
+        self.assertEqual(1, scheduler.skipped)
+        self.assertAlmostEqual(0.035, times[2])
+        self.assertAlmostEqual(0.04, times[3])
+
+    def test_small_overrun_not_skipped(self):
+        clock = S.SimulatedClock()
+        scheduler = S.TickScheduler(0.01, clock, clock.sleep)
+
+        times = []
+
+        def tick(now):
+            times.append(now)
+            if len(times) == 2:
+                clock.advance(0.0101)
+
+        scheduler.run(tick, 4)
+
+        # The 0.02 deadline is made late, and the schedule is kept
+        self.assertEqual(0, scheduler.skipped)
+        self.assertAlmostEqual(0.0201, times[2])
+        self.assertAlmostEqual(0.03, times[3])
+
+    def test_stop(self):
+        clock = S.SimulatedClock()
+        scheduler = S.TickScheduler(0.01, clock, clock.sleep)
+
+        def tick(now):
+            if scheduler.ticks == 2:
+                scheduler.stop()
+
+        scheduler.run(tick)
+
+        self.assertEqual(3, scheduler.ticks)
+
+    def test_bad_period(self):
+        self.assertRaises(Exception, S.TickScheduler, 0)
+
+
+class TestMotorRamp(ut.TestCase):
+
+    def setUp(self):
+        self.driver = OS.MemorySink()
+
+        # 5 units per tick
+        self.ramp = R.MotorRamp(self.driver, 500, 0.01)
+
+        self.ih = IH.InputHandler(0, 35, 10, IH.INSTRUMENTATION_OFF)
+        self.ih.add_output_sink(self.ramp)
+
+    def test_ramp_up_and_down(self):
+        self.ih.move(IH.FORWARD)
+        self.ih.move(IH.FORWARD)
+        self.assertEqual((20, 20), (self.ramp.target_left, self.ramp.target_right))
+        self.assertEqual([(0, 0)], self.driver.written)
+
+        for tick in range(6):
+            self.ramp.tick()
+
+        self.assertEqual([(0, 0), (5, 5), (10, 10), (15, 15), (20, 20)], self.driver.written)
+        self.assertTrue(self.ramp.settled())
+
+        self.ih.move(IH.LEFT)
+        self.ih.move(IH.STOP)
+
+        for tick in range(4):
+            self.ramp.tick()
+
+        self.assertEqual([(15, 15), (10, 10), (5, 5), (0, 0)], self.driver.written[5:])
+
+    def test_starts_stopped(self):
+        driver  =   OS.MemorySink()
+        ramp    =   R.MotorRamp(driver, 500, 0.01)
+
+        # Nothing to ramp to or from yet
+        ramp.tick()
+        self.assertEqual([], driver.written)
+
+        # Stopped is not 0
+        ih = IH.InputHandler(5, 35, 10, IH.INSTRUMENTATION_OFF)
+        ih.add_output_sink(ramp)
+
+        self.assertEqual((5, 5), (ramp.applied_left, ramp.applied_right))
+        self.assertEqual([(5, 5)], driver.written)
+
+        ih.move(IH.FORWARD)
+        ramp.tick()
+        ramp.tick()
+
+        self.assertEqual([(5, 5), (10, 10), (15, 15)], driver.written)
+
+    def test_partial_step(self):
+        driver  =   OS.MemorySink()
+        ramp    =   R.MotorRamp(driver, 700, 0.01)
+
+        ramp.publish(0, 0)
+        ramp.publish(-10, 10)
+
+        ramp.tick()
+        ramp.tick()
+
+        self.assertEqual([(0, 0), (-7, 7), (-10, 10)], driver.written)
+
+    def test_scheduled(self):
+        clock = S.SimulatedClock()
+
+        self.ih.move(IH.BACK)
+        S.TickScheduler(0.01, clock, clock.sleep).run(self.ramp.tick, 10)
+
+        self.assertEqual([(0, 0), (-5, -5), (-10, -10)], self.driver.written)
+
+    def test_bad_rate(self):
+        self.assertRaises(Exception, R.MotorRamp, self.driver, 0, 0.01)
@@ -0,0 +1,178 @@
+__author__ = 'pjp'
+
+import os
+import random
+import shutil
+import tempfile
+import unittest as ut
+
+import skid_steering.InputHandler as IH
+import skid_steering.TransitionTable as TT
+import skid_steering.SessionLog as SL
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        self.now += 0.5
+        return self.now
+
+
+class TestSessionLog(ut.TestCase):
+
+    def setUp(self):
+        self.directory  =   tempfile.mkdtemp()
+        self.path       =   os.path.join(self.directory, "session.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self, keys, handler=None):
+        if handler is None:
+            handler = IH.InputHandler(0, 35, 10, IH.INSTRUMENTATION_OFF)
+
+        with SL.SessionWriter(self.path, handler, clock=Clock()):
+            for key in keys:
+                handler.move(key)
+
+        return handler
+
+    def test_round_trip(self):
+        ih = self.record([IH.FORWARD, IH.FORWARD, IH.LEFT])
+
+        self.assertEqual(SL.HEADER.size + 4 * SL.RECORD.size, os.path.getsize(self.path))
+
+        with SL.SessionReader(self.path) as reader:
+            self.assertEqual((0, 35, 10), (reader.min_motor_value, reader.max_motor_value, reader.step_value))
+            self.assertEqual(4, len(reader))
+            self.assertEqual([(1000.5, SL.BOUNDARY, 0, 0), (1001.0, 8, 10, 10), (1001.5, 8, 20, 20),
+                              (1002.0, 4, 20, 30)], list(reader))
+            self.assertEqual((1002.0, 4, 20, 30), reader[-1])
+            self.assertEqual([SL.BOUNDARY, 8, 8, 4], reader.keys().tolist())
+            self.assertRaises(IndexError, reader.__getitem__, 4)
+
+        # No longer recording
+        ih.move(IH.STOP)
+        self.assertEqual(SL.HEADER.size + 4 * SL.RECORD.size, os.path.getsize(self.path))
+
+    def test_append(self):
+        self.record([IH.FORWARD])
+        self.record([IH.BACK])
+
+        with SL.SessionReader(self.path) as reader:
+            self.assertEqual([SL.BOUNDARY, 8, SL.BOUNDARY, 2], reader.keys().tolist())
+
+        self.assertRaises(Exception, SL.SessionWriter, self.path, IH.InputHandler(0, 25, 10))
+
+    def test_flush_records(self):
+        ih = IH.InputHandler(0, 35, 10, IH.INSTRUMENTATION_OFF)
+
+        with SL.SessionWriter(self.path, ih, clock=Clock(), flush_records=3):
+            # The boundary record is written at once
+            self.assertEqual(SL.HEADER.size + SL.RECORD.size, os.path.getsize(self.path))
+
+            ih.move(IH.FORWARD)
+            ih.move(IH.FORWARD)
+            self.assertEqual(SL.HEADER.size + SL.RECORD.size, os.path.getsize(self.path))
+
+            ih.move(IH.LEFT)
+            self.assertEqual(SL.HEADER.size + 4 * SL.RECORD.size, os.path.getsize(self.path))
+
+            ih.move(IH.STOP)
+            self.assertEqual(SL.HEADER.size + 4 * SL.RECORD.size, os.path.getsize(self.path))
+
+        self.assertEqual(SL.HEADER.size + 5 * SL.RECORD.size, os.path.getsize(self.path))
+
+    def test_float_configuration(self):
+        ih = IH.InputHandler(0.0, 35.0, 10.0, IH.INSTRUMENTATION_OFF)
+
+        self.assertRaises(Exception, SL.SessionWriter, self.path, ih)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual((), ih._listeners)
+
+    def test_partial_record(self):
+        self.record([IH.FORWARD, IH.FORWARD])
+
+        with open(self.path, "ab") as file:
+            file.write(b"\x01\x02\x03")
+
+        with SL.SessionReader(self.path) as reader:
+            self.assertEqual(3, len(reader))
+
+        # Appending drops the partial record
+        self.record([IH.LEFT])
+
+        with SL.SessionReader(self.path) as reader:
+            self.assertEqual([SL.BOUNDARY, 8, 8, SL.BOUNDARY, 4], reader.keys().tolist())
+
+    def test_not_a_session_log(self):
+        with open(self.path, "wb") as file:
+            file.write(b"x" * 100)
+
+        self.assertRaises(Exception, SL.SessionReader, self.path)
+
+    def test_replay(self):
+        rnd = random.Random(12)
+        self.record([rnd.choice(IH.KEYS) for i in range(5000)], TT.TableInputHandler(0, 35, 10))
+
+        with SL.SessionReader(self.path) as reader:
+            self.assertEqual(None, reader.replay())
+
+    def test_replay_sessions(self):
+        # The same handler carried on, then a restarted process
+        ih = self.record([IH.FORWARD, IH.LEFT])
+        self.record([IH.FORWARD], ih)
+        self.record([IH.BACK])
+
+        with SL.SessionReader(self.path) as reader:
+            self.assertEqual((SL.BOUNDARY, 10, 20), reader[3][1:])
+            self.assertEqual((SL.BOUNDARY, 0, 0), reader[5][1:])
+            self.assertEqual((-10, -10), reader[6][2:])
+            self.assertEqual(None, reader.replay())
+
+    def test_replay_chunks(self):
+        rnd = random.Random(3)
+        self.record([rnd.choice(IH.KEYS) for i in range(50)])
+        self.record([rnd.choice(IH.KEYS) for i in range(50)])
+
+        with SL.SessionReader(self.path) as reader:
+            difference = reader.replay(IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_OFF))
+
+        self.assertNotEqual(None, difference)
+
+        chunk = SL.REPLAY_CHUNK
+        try:
+            SL.REPLAY_CHUNK = 7
+
+            with SL.SessionReader(self.path) as reader:
+                self.assertEqual(None, reader.replay())
+                self.assertEqual(difference, reader.replay(IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_OFF)))
+        finally:
+            SL.REPLAY_CHUNK = chunk
+
+    def test_replay_difference(self):
+        self.record([IH.FORWARD, IH.FORWARD, IH.LEFT])
+
+        with SL.SessionReader(self.path) as reader:
+            # Tuned differently
+            self.assertEqual(3, reader.replay(IH.InputHandler(0, 25, 10)))
+
+    @ut.skipIf(numpy is None, "NumPy is not installed")
+    def test_numpy(self):
+        self.record([IH.FORWARD, IH.FORWARD, IH.LEFT])
+
+        reader = SL.SessionReader(self.path)
+        records = reader.as_numpy()
+
+        self.assertEqual([0, 10, 20, 20], records["left"].tolist())
+        self.assertEqual([4], records["key"][3:].tolist())
+
+        del records
+        reader.close()
@@ -0,0 +1,101 @@
+__author__ = 'pjp'
+
+import multiprocessing
+import unittest as ut
+
+import skid_steering.InputHandler as IH
+import skid_steering.SharedState as SS
+
+
+def read_until(name, sequence, results):
+    reader = SS.SharedMotorState(name, create=False)
+
+    try:
+        while True:
+            values = reader.read()
+
+            # Every write has left == -right, a torn read would not
+            if values[1] != -values[2]:
+                results.put(("torn", values))
+                return
+
+            if values[0] >= sequence:
+                results.put(("done", values))
+                return
+    finally:
+        reader.close()
+
+
+class TestSharedState(ut.TestCase):
+
+    def test_write_read(self):
+        shared = SS.SharedMotorState()
+
+        try:
+            reader = SS.SharedMotorState(shared.name, create=False)
+
+            self.assertEqual((0, 0, 0), reader.read())
+
+            shared.write(10, -20)
+            self.assertEqual((2, 10, -20), reader.read())
+            self.assertEqual(0, reader.retries)
+
+            reader.close()
+        finally:
+            shared.close()
+
+    def test_write_in_progress(self):
+        shared = SS.SharedMotorState()
+
+        try:
+            shared.write(10, -20)
+
+            # The writer died half way through a write
+            SS.SEQUENCE.pack_into(shared._buffer, 0, 3)
+            self.assertRaises(Exception, shared.read, 10)
+            self.assertEqual(11, shared.retries)
+
+            # The new sequence number is seen before the new values
+            SS.SEQUENCE.pack_into(shared._buffer, 0, 4)
+            self.assertRaises(Exception, shared.read, 10)
+
+            shared.write(30, -40)
+            self.assertEqual((6, 30, -40), shared.read())
+        finally:
+            shared.close()
+
+    def test_sink(self):
+        shared = SS.SharedMotorState()
+
+        try:
+            ih = IH.InputHandler(0, 35, 10, IH.INSTRUMENTATION_OFF)
+            ih.add_output_sink(SS.SharedMemorySink(shared))
+
+            ih.move(IH.BACK)
+            ih.move(IH.LEFT)
+            ih.move(IH.LEFT)
+
+            self.assertEqual((-10, -30), shared.read()[1:])
+        finally:
+            shared.close()
+
+    def test_other_process(self):
+        shared = SS.SharedMotorState()
+
+        try:
+            results = multiprocessing.Queue()
+            writes = 20000
+
+            reader = multiprocessing.Process(target=read_until, args=(shared.name, writes * 2, results))
+            reader.start()
+
+            for value in range(1, writes + 1):
+                shared.write(value, -value)
+
+            outcome, values = results.get(timeout=30)
+            reader.join(30)
+
+            self.assertEqual("done", outcome)
+            self.assertEqual((writes * 2, writes, -writes), values)
+        finally:
+            shared.close()
@@ -0,0 +1,135 @@
+__author__ = 'pjp'
+
+import contextlib
+import io
+import unittest as ut
+
+import skid_steering.Configuration as C
+import skid_steering.InputHandler as IH
+import skid_steering.StateExplorer as SE
+import skid_steering.TransitionTable as TT
+
+
+class SpinsOneTrack(IH.InputHandler):
+    """
+    Broken steering logic - spinning right from stopped only moves the left track
+    """
+    def _turn_right(self):
+        if self._is_stopped():
+            self._current_motor_left_value = self._current_motor_left_value + self._step_value
+        else:
+            IH.InputHandler._turn_right(self)
+
+
+class TestStateExplorer(ut.TestCase):
+
+    def test_explore(self):
+        explorer = SE.StateExplorer(0, 25, 10).explore()
+
+        self.assertEqual(13, explorer.reachable())
+        self.assertEqual(13 * len(IH.KEYS), explorer.transitions)
+        self.assertEqual([], explorer.violations)
+        self.assertEqual([], explorer.dead_ends)
+        self.assertEqual((0, 0), next(explorer.states()))
+
+    def test_matches_transition_table(self):
+        for config in [(0, 35, 10), (5, 30, 10), (-20, 30, 7), (0, 100, 20)]:
+            explorer    =   SE.StateExplorer(*config).explore()
+            table       =   TT.TransitionTable(*config)
+
+            self.assertEqual(sorted(zip(table.lefts, table.rights)), sorted(explorer.states()))
+
+    def test_sparse(self):
+        dense   =   SE.StateExplorer(0, 35, 10).explore()
+        sparse  =   SE.StateExplorer(0, 35, 10, dense_limit=0).explore()
+
+        self.assertEqual(list(dense.states()), list(sparse.states()))
+
+    def test_path_to(self):
+        explorer = SE.StateExplorer(0, 25, 10).explore()
+
+        self.assertEqual([], explorer.path_to(0, 0))
+        self.assertEqual([IH.FORWARD, IH.LEFT], explorer.path_to(10, 20))
+        self.assertEqual(None, explorer.path_to(0, 10))
+        self.assertEqual(None, explorer.path_to(5, 5))
+
+        for left, right in explorer.states():
+            ih = IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_OFF)
+
+            for key in explorer.path_to(left, right):
+                ih.move(key)
+
+            self.assertEqual((left, right), (ih.left_motor_value(), ih.right_motor_value()))
+
+    def test_violation(self):
+        explorer = SE.StateExplorer(0, 25, 10, handler_class=SpinsOneTrack).explore()
+
+        self.assertEqual(1, len(explorer.violations))
+
+        violation = explorer.violations[0]
+        self.assertEqual(SE.VIOLATION, violation.kind)
+        self.assertEqual([IH.RIGHT], violation.keys)
+        self.assertTrue(violation.message.startswith("Internal consistancy check failure"))
+
+    def test_dead_end(self):
+        explorer = SE.StateExplorer(-15, 1, 3).explore()
+
+        self.assertEqual([], explorer.violations)
+        self.assertEqual(1, len(explorer.dead_ends))
+        self.assertEqual((0, 0), explorer.dead_ends[0][1:3])
+        self.assertEqual([IH.FORWARD] * 5, explorer.dead_ends[0].keys)
+
+    def test_main(self):
+        output = io.StringIO()
+
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(2, SE.main(["StateExplorer"]))
+
+        self.assertTrue(output.getvalue().startswith("Usage:"))
+
+
+class TestVerified(ut.TestCase):
+
+    def test_verified(self):
+        ih = IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_OFF, verified=True)
+
+        self.assertTrue(IH.InputHandler in C.get_configuration(0, 25, 10).verified)
+
+        ih.move(IH.FORWARD)
+        ih.move(IH.LEFT)
+        self.assertEqual(10, ih.left_motor_value())
+        self.assertEqual(20, ih.right_motor_value())
+
+    def test_check_skipped(self):
+        ih = IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_OFF, verified=True)
+
+        # Force an unreachable state that the check would catch
+        ih._current_motor_left_value    =   0
+        ih._current_motor_right_value   =   10
+        ih.move(IH.LEFT)
+
+        self.assertEqual(20, ih.right_motor_value())
+
+    def test_check_made_when_tracing(self):
+        for ih in [IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_TRACE, verified=True),
+                   IH.InputHandler(0, 25, 10, IH.INSTRUMENTATION_OFF)]:
+            ih._current_motor_left_value    =   0
+            ih._current_motor_right_value   =   10
+
+            self.assertRaises(Exception, ih.move, IH.LEFT)
+
+    def test_verification_failure(self):
+        try:
+            SpinsOneTrack(0, 25, 10, verified=True)
+        except Exception as e:
+            self.assertTrue(str(e).startswith("Configuration failed verification"))
+        else:
+            self.fail("Should have thrown an exception")
+
+        self.assertFalse(SpinsOneTrack in C.get_configuration(0, 25, 10).verified)
+
+    def test_verify_configuration(self):
+        IH.verify_configuration(0, 35, 10)
+
+        self.assertTrue(IH.InputHandler in C.get_configuration(0, 35, 10).verified)
+        self.assertRaises(Exception, IH.verify_configuration, 0, 25, 10, SpinsOneTrack)
@@ -0,0 +1,58 @@
+__author__ = 'pjp'
+
+import unittest as ut
+
+from skid_steering.Statistics import LatencyHistogram, LatencyStatistics
+
+
+class TestLatencyStatistics(ut.TestCase):
+
+    def test_empty(self):
+        statistics = LatencyStatistics()
+
+        self.assertEqual({"count": 0, "mean": 0.0, "minimum": 0.0, "maximum": 0.0}, statistics.snapshot())
+
+    def test_record(self):
+        statistics = LatencyStatistics()
+
+        for latency in [0.003, 0.001, 0.002]:
+            statistics.record(latency)
+
+        self.assertEqual(3, statistics.count)
+        self.assertAlmostEqual(0.002, statistics.mean())
+        self.assertEqual(0.001, statistics.minimum)
+        self.assertEqual(0.003, statistics.maximum)
+
+        statistics.reset()
+        self.assertEqual(0, statistics.count)
+
+
+class TestLatencyHistogram(ut.TestCase):
+
+    def test_empty(self):
+        histogram = LatencyHistogram()
+
+        self.assertEqual(0, histogram.percentile(0.99))
+        self.assertEqual([0] * LatencyHistogram.BUCKETS, histogram.snapshot()["buckets"])
+
+    def test_record(self):
+        histogram = LatencyHistogram()
+
+        for nanoseconds in [0, 1, 700, 900, 1000, 1 << 60]:
+            histogram.record(nanoseconds)
+
+        buckets = histogram.snapshot()["buckets"]
+
+        self.assertEqual(1, buckets[0])
+        self.assertEqual(1, buckets[1])
+        self.assertEqual(3, buckets[10])        # 512 .. 1023
+        self.assertEqual(1, buckets[-1])
+        self.assertEqual(6, histogram.count)
+        self.assertEqual(1 << 60, histogram.maximum)
+
+        self.assertEqual(1024, histogram.percentile(0.5))
+        self.assertEqual(1 << 60, histogram.percentile(1.0))
+
+        histogram.reset()
+        self.assertEqual(0, histogram.count)
+        self.assertEqual(0, sum(histogram.buckets))
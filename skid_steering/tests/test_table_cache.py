@@ -0,0 +1,216 @@
+__author__ = 'pjp'
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest as ut
+from array import array
+
+import skid_steering
+import skid_steering.Configuration as C
+import skid_steering.InputHandler as IH
+import skid_steering.TableCache as TC
+import skid_steering.TransitionTable as TT
+
+
+class TestTableCache(ut.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+        # Nothing shared in this process, so the tables come from the cache files
+        C.CACHE.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assertSameTable(self, expected, actual):
+        self.assertEqual(expected.lefts, actual.lefts)
+        self.assertEqual(expected.rights, actual.rights)
+        self.assertEqual(expected.next, actual.next)
+        self.assertEqual(expected.errors, actual.errors)
+        self.assertEqual(expected.states, actual.states)
+        self.assertEqual(expected.state_of(20, 40), actual.state_of(20, 40))
+
+    def test_round_trip(self):
+        table   =   TT.TransitionTable(-20, 30, 7)
+        path    =   TC.table_path(-20, 30, 7, self.directory)
+
+        table.next[3]   =   -(table.next[3] + 1)
+        table.errors[3] =   "Some\tmessage"
+
+        TC.write_table(path, table)
+
+        self.assertSameTable(table, TC.read_table(path, -20, 30, 7))
+        self.assertEqual([os.path.basename(path)], os.listdir(self.directory))
+
+    def test_load_table(self):
+        path = TC.table_path(0, 100, 20, self.directory)
+
+        self.assertFalse(os.path.exists(path))
+
+        built = TC.load_table(0, 100, 20, self.directory)
+        self.assertTrue(os.path.exists(path))
+
+        # Shared in this process
+        self.assertTrue(built is TC.load_table(0, 100, 20, self.directory))
+        self.assertTrue(built is TT.TableInputHandler(0, 100, 20)._table)
+
+        C.CACHE.clear()
+        self.assertSameTable(built, TC.load_table(0, 100, 20, self.directory))
+
+    def test_cached_handler(self):
+        keys = [IH.FORWARD, IH.LEFT, IH.LEFT, IH.BACK, IH.RIGHT, IH.STOP, IH.BACK, IH.BACK]
+
+        for run in range(2):
+            ih = TC.cached_handler(0, 100, 20, directory=self.directory)
+
+            self.assertEqual(IH.InputHandler(0, 100, 20, IH.INSTRUMENTATION_OFF).move_many(keys), ih.move_many(keys))
+
+    def test_unusable_cache_file(self):
+        path = TC.table_path(0, 25, 10, self.directory)
+        TC.load_table(0, 25, 10, self.directory)
+
+        with open(path, "rb") as file:
+            data = file.read()
+
+        # Truncated, a different configuration, a different version of the steering logic
+        for bad in [data[:-1], data[:10], data.replace(b"SKIDTBL1", b"SKIDTBL0")]:
+            with open(path, "wb") as file:
+                file.write(bad)
+
+            self.assertEqual(None, TC.read_table(path, 0, 25, 10))
+
+            # Rebuilt and rewritten
+            C.CACHE.clear()
+            self.assertEqual(len(TT.TransitionTable(0, 25, 10)), len(TC.load_table(0, 25, 10, self.directory)))
+            self.assertNotEqual(None, TC.read_table(path, 0, 25, 10))
+
+        self.assertEqual(None, TC.read_table(path, 0, 35, 10))
+
+        fingerprint = TC._fingerprint
+        TC._fingerprint = fingerprint + 1
+
+        try:
+            self.assertEqual(None, TC.read_table(path, 0, 25, 10))
+        finally:
+            TC._fingerprint = fingerprint
+
+    def test_next_out_of_range(self):
+        path    =   TC.table_path(0, 25, 10, self.directory)
+        table   =   TT.TransitionTable(0, 25, 10)
+        states  =   len(table)
+
+        # Beyond the last state either way, and a failing transition without its message
+        for cell, state in [(7, states), (7, -states - 1), (7, -1)]:
+            next        =   array('i', table.next)
+            next[cell]  =   state
+
+            TC.write_table(path, TT.TransitionTable.from_arrays(0, 25, 10, table.lefts, table.rights, next,
+                                                                table.errors))
+            self.assertEqual(None, TC.read_table(path, 0, 25, 10))
+
+            # Rebuilt
+            C.CACHE.clear()
+            self.assertSameTable(table, TC.load_table(0, 25, 10, self.directory))
+
+    def test_keys_and_reference_changed(self):
+        fingerprint =   TC.logic_fingerprint()
+        keys        =   TT.KEYS
+        reference   =   TT.reference_transition
+
+        def reference_transition(handler, left, right, input):
+            return reference(handler, right, left, input)
+
+        try:
+            # The table columns in a different order
+            TT.KEYS         =   tuple(reversed(keys))
+            TC._fingerprint =   None
+            self.assertNotEqual(fingerprint, TC.logic_fingerprint())
+
+            TT.KEYS                 =   keys
+            TT.reference_transition =   reference_transition
+            TC._fingerprint         =   None
+            self.assertNotEqual(fingerprint, TC.logic_fingerprint())
+        finally:
+            TT.KEYS                 =   keys
+            TT.reference_transition =   reference
+            TC._fingerprint         =   None
+
+        self.assertEqual(fingerprint, TC.logic_fingerprint())
+
+    def test_limits_changed(self):
+        path = TC.table_path(0, 25, 10, self.directory)
+        TC.load_table(0, 25, 10, self.directory)
+
+        self.assertNotEqual(None, TC.read_table(path, 0, 25, 10))
+
+        fingerprint =   TC.logic_fingerprint()
+        original    =   C.Configuration.__init__
+
+        # A different limit computation in Configuration
+        def __init__(config, min_motor_value, max_motor_value, step_value):
+            original(config, min_motor_value, max_motor_value, step_value)
+            config.forward_limit = max_motor_value - 2 * step_value
+
+        C.Configuration.__init__ = __init__
+        TC._fingerprint = None
+
+        try:
+            self.assertNotEqual(fingerprint, TC.logic_fingerprint())
+            self.assertEqual(None, TC.read_table(path, 0, 25, 10))
+        finally:
+            C.Configuration.__init__ = original
+            TC._fingerprint = None
+
+        self.assertEqual(fingerprint, TC.logic_fingerprint())
+
+    def test_unwritable_cache(self):
+        directory = os.path.join(self.directory, "file")
+
+        with open(directory, "w"):
+            pass
+
+        self.assertEqual(len(TT.TransitionTable(0, 25, 10)), len(TC.load_table(0, 25, 10, directory)))
+
+    def test_default_directory(self):
+        previous = os.environ.get(TC.CACHE_ENVIRONMENT)
+        os.environ[TC.CACHE_ENVIRONMENT] = self.directory
+
+        try:
+            self.assertEqual(self.directory, TC.default_directory())
+        finally:
+            if previous is None:
+                del os.environ[TC.CACHE_ENVIRONMENT]
+            else:
+                os.environ[TC.CACHE_ENVIRONMENT] = previous
+
+    def test_lazy_package(self):
+        self.assertTrue(skid_steering.TableCache is TC)
+        self.assertTrue("Fleet" in dir(skid_steering))
+        self.assertRaises(AttributeError, getattr, skid_steering, "Nothing")
+
+        # Every module of the package can be reached as an attribute
+        directory = os.path.dirname(skid_steering.__file__)
+        modules = sorted(name[:-3] for name in os.listdir(directory) if name.endswith(".py") and name[0] != "_")
+
+        self.assertEqual(modules, sorted(skid_steering._MODULES))
+
+        for name in modules:
+            self.assertTrue(getattr(skid_steering, name) is sys.modules["skid_steering." + name])
+
+        # Neither the package nor the fast start path import logging
+        code = "import sys, skid_steering.TableCache as TC; " \
+               "TC.cached_handler(0, 25, 10, directory=sys.argv[1]).move(8); " \
+               "print(sorted(name for name in ('logging', 'skid_steering.Fleet') if name in sys.modules))"
+
+        output = subprocess.run([sys.executable, "-c", code, self.directory], check=True, stdout=subprocess.PIPE,
+                                universal_newlines=True).stdout
+
+        self.assertEqual("[]", output.strip())
+
+
+if __name__ == '__main__':
+    ut.main()
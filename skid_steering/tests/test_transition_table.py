@@ -0,0 +1,155 @@
+__author__ = 'pjp'
+
+import random
+import unittest as ut
+
+import skid_steering.InputHandler as IH
+import skid_steering.TransitionTable as TT
+
+CONFIGS = [(0, 25, 10), (0, 35, 10), (0, 29, 10), (0, 100, 20), (0, 30, 7), (5, 30, 10), (-20, 30, 7)]
+
+
+class TestTransitionTable(ut.TestCase):
+
+    def test_stopped_state_is_first(self):
+        table = TT.TransitionTable(0, 25, 10)
+
+        self.assertEqual(0, table.state_of(0, 0))
+        self.assertEqual(0, table.lefts[0])
+        self.assertEqual(0, table.rights[0])
+        self.assertEqual(len(table) * len(TT.KEYS), len(table.next))
+
+    def test_unreachable_state(self):
+        table = TT.TransitionTable(0, 25, 10)
+
+        self.assertEqual(None, table.state_of(0, 10))
+        self.assertEqual(None, table.state_of(5, 5))
+
+    def test_bad_constructor_values(self):
+        self.assertRaises(Exception, TT.TransitionTable, 0, 1, 2)
+        self.assertRaises(Exception, TT.TableInputHandler, 1, 0, 0)
+
+        # Not C ints, even once (0, 100, 20) is shared
+        TT.shared_table(0, 100, 20)
+
+        for configuration in [(0.0, 100.0, 20.0), (0, 1 << 40, 1 << 30)]:
+            self.assertRaises(Exception, TT.TransitionTable, *configuration)
+            self.assertRaises(Exception, TT.shared_table, *configuration)
+
+    def test_reference_transition(self):
+        ih = IH.InputHandler(0, 30, 10)
+
+        self.assertEqual((20, 20, None), TT.reference_transition(ih, 10, 10, IH.FORWARD))
+        self.assertEqual((0, 0, None), TT.reference_transition(ih, -10, 10, IH.FORWARD))
+
+        left, right, error = TT.reference_transition(ih, -10, 20, IH.LEFT)
+        self.assertEqual((-10, 20), (left, right))
+        self.assertTrue(error.startswith("Unknown state"))
+
+    def test_instrumentation(self):
+        self.assertEqual(None, TT.TableInputHandler(0, 25, 10)._logger)
+        self.assertRaises(Exception, TT.TableInputHandler, 0, 25, 10, instrumentation=IH.INSTRUMENTATION_TRACE)
+
+    def test_bad_input(self):
+        ih = TT.TableInputHandler(0, 100, 20)
+
+        self.assertRaises(Exception, ih.move, 999)
+        self.assertRaises(Exception, ih.move, None)
+        self.assertRaises(Exception, ih.move, [IH.FORWARD])
+
+    def test_shared_table(self):
+        table = TT.TransitionTable(0, 25, 10)
+
+        ih1 = TT.TableInputHandler(0, 25, 10, table)
+        ih2 = TT.TableInputHandler(0, 25, 10, table)
+
+        ih1.move(IH.FORWARD)
+        self.assertEqual(10, ih1.left_motor_value())
+        self.assertEqual(0, ih2.left_motor_value())
+
+        self.assertRaises(Exception, TT.TableInputHandler, 0, 35, 10, table)
+
+    def test_matches_reference(self):
+        rnd = random.Random(1234)
+
+        for config in CONFIGS:
+            reference   =   IH.InputHandler(*config)
+            ih          =   TT.TableInputHandler(*config)
+
+            for i in range(2000):
+                key = rnd.choice(TT.KEYS)
+
+                reference.move(key)
+                ih.move(key)
+
+                self.assertEqual(
+                    (reference.left_motor_value(), reference.right_motor_value()),
+                    (ih.left_motor_value(), ih.right_motor_value()),
+                    "Config " + str(config) + " diverged at key " + str(i))
+
+    def test_every_transition_matches_reference(self):
+        for config in CONFIGS:
+            table       =   TT.TransitionTable(*config)
+            reference   =   IH.InputHandler(*config, instrumentation=IH.INSTRUMENTATION_OFF)
+
+            for state in range(len(table)):
+                for slot, key in enumerate(TT.KEYS):
+                    left, right, error = TT.reference_transition(reference, table.lefts[state], table.rights[state], key)
+
+                    self.assertEqual(None, error)
+                    self.assertEqual(table.state_of(left, right), table.next[state * len(TT.KEYS) + slot])
+
+    def test_move_many_matches_reference(self):
+        rnd = random.Random(4321)
+
+        for config in CONFIGS:
+            keys = [rnd.choice(TT.KEYS) for i in range(2000)]
+
+            reference   =   IH.InputHandler(*config, instrumentation=IH.INSTRUMENTATION_OFF)
+            ih          =   TT.TableInputHandler(*config)
+
+            self.assertEqual(reference.move_many(keys), ih.move_many(keys))
+            self.assertEqual(reference.left_motor_value(), ih.left_motor_value())
+            self.assertEqual(reference.right_motor_value(), ih.right_motor_value())
+
+            # And carries on from where it got to
+            ih.move(IH.FORWARD)
+            reference.move(IH.FORWARD)
+            self.assertEqual(reference.left_motor_value(), ih.left_motor_value())
+
+    def test_move_many_bad_input(self):
+        ih = TT.TableInputHandler(0, 25, 10)
+
+        try:
+            ih.move_many([IH.FORWARD, IH.LEFT, 999])
+        except Exception as e:
+            self.assertTrue(str(e).endswith("[999] at index 2"))
+        else:
+            self.fail("Should have thrown an exception")
+
+        self.assertEqual(0, ih.left_motor_value())
+
+    def test_move_many_raised(self):
+        table   =   TT.TransitionTable(0, 25, 10)
+        next    =   table.next[:]
+
+        # FORWARD from the stopped state fails, as a steering logic bug would
+        cell            =   TT.KEY_SLOTS[IH.FORWARD]
+        next[cell]      =   -(next[cell] + 1)
+        errors          =   {cell: "Failed"}
+
+        table = TT.TransitionTable.from_arrays(0, 25, 10, table.lefts, table.rights, next, errors)
+
+        for observed in [False, True]:
+            ih = TT.TableInputHandler(0, 25, 10, table, IH.INSTRUMENTATION_OFF)
+
+            if observed:
+                ih.add_move_listener(lambda key, left, right: None)
+
+            try:
+                ih.move_many([IH.BACK, IH.STOP, IH.FORWARD])
+            except Exception as e:
+                self.assertEqual("Failed at index 2", str(e))
+                self.assertEqual("Failed", str(e.__cause__))
+            else:
+                self.fail("Should have thrown an exception")
@@ -0,0 +1,136 @@
+__author__ = 'pjp'
+
+import asyncio
+import unittest as ut
+
+import skid_steering.Coalescer as C
+import skid_steering.InputHandler as IH
+import skid_steering.OutputSink as OS
+import skid_steering.Scheduler as S
+import skid_steering.Watchdog as W
+
+
+class TestWatchdog(ut.TestCase):
+
+    def setUp(self):
+        self.clock      =   S.SimulatedClock()
+        self.ih         =   IH.InputHandler(0, 35, 10, IH.INSTRUMENTATION_OFF)
+        self.sink       =   OS.MemorySink()
+        self.ih.add_output_sink(self.sink)
+        self.watchdog   =   W.Watchdog(self.ih, 0.5, self.clock)
+
+    def test_input_keeps_going(self):
+        for i in range(10):
+            self.ih.move(IH.FORWARD)
+            self.clock.advance(0.4)
+            self.assertFalse(self.watchdog.poll())
+
+        self.assertEqual(30, self.ih.left_motor_value())
+        self.assertEqual(0, self.watchdog.triggered)
+
+    def test_silence_stops(self):
+        self.ih.move(IH.FORWARD)
+
+        self.clock.advance(0.49)
+        self.assertFalse(self.watchdog.poll())
+        self.assertAlmostEqual(0.01, self.watchdog.remaining())
+
+        self.clock.advance(0.06)
+        self.assertTrue(self.watchdog.poll())
+
+        self.assertEqual(0, self.ih.left_motor_value())
+        self.assertEqual([(0, 0), (10, 10), (0, 0)], self.sink.written)
+        self.assertEqual(1, self.watchdog.triggered)
+        self.assertAlmostEqual(0.05, self.watchdog.latency.maximum)
+
+        # Disarmed until the next input
+        self.clock.advance(10)
+        self.assertFalse(self.watchdog.poll())
+        self.assertEqual(None, self.watchdog.remaining())
+
+        self.ih.move(IH.BACK)
+        self.clock.advance(0.5)
+        self.assertTrue(self.watchdog.poll())
+        self.assertEqual(2, self.watchdog.triggered)
+
+    def test_close(self):
+        self.watchdog.close()
+
+        self.ih.move(IH.FORWARD)
+        self.clock.advance(10)
+
+        self.assertFalse(self.watchdog.poll())
+
+    def test_coalescer_held_key(self):
+        self.watchdog.close()
+
+        coalescer   =   C.Coalescer(self.ih)
+        watchdog    =   W.Watchdog(self.ih, 0.5, self.clock, inputs=[coalescer])
+
+        # Held at full speed, the auto repeat never reaches move()
+        for i in range(20):
+            coalescer.coalesce([IH.FORWARD, IH.FORWARD])
+            self.clock.advance(0.4)
+            self.assertFalse(watchdog.poll())
+
+        self.assertEqual(30, self.ih.left_motor_value())
+        self.assertTrue(coalescer.dropped > 0)
+        self.assertEqual(0, watchdog.triggered)
+
+        # Let go
+        self.clock.advance(0.2)
+        self.assertTrue(watchdog.poll())
+        self.assertEqual(0, self.ih.left_motor_value())
+
+        watchdog.close()
+        self.assertEqual((), coalescer._key_listeners)
+
+    def test_start_twice(self):
+        cancelled = []
+
+        class Timer(object):
+            def cancel(self):
+                cancelled.append(self)
+
+        class Loop(object):
+            def call_later(self, delay, callback):
+                return Timer()
+
+        loop = Loop()
+
+        self.watchdog.start(loop)
+        first = self.watchdog._timer
+        self.watchdog.start(loop)
+
+        self.assertEqual([first], cancelled)
+        self.assertFalse(self.watchdog._timer is first)
+
+    def test_bad_timeout(self):
+        self.assertRaises(Exception, W.Watchdog, self.ih, 0)
+
+    def test_event_loop(self):
+        ih = IH.InputHandler(0, 35, 10, IH.INSTRUMENTATION_OFF)
+
+        async def drive():
+            loop = asyncio.get_running_loop()
+
+            watchdog = W.Watchdog(ih, 0.05, loop.time)
+            watchdog.start(loop)
+
+            for i in range(5):
+                ih.move(IH.FORWARD)
+                await asyncio.sleep(0.02)
+
+            moving = ih.left_motor_value()
+
+            await asyncio.sleep(0.15)
+            watchdog.close()
+
+            return moving, watchdog
+
+        moving, watchdog = asyncio.run(drive())
+
+        self.assertEqual(30, moving)
+        self.assertEqual(0, ih.left_motor_value())
+        self.assertEqual(1, watchdog.triggered)
+        self.assertTrue(watchdog.latency.minimum >= 0.0)